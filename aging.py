@@ -0,0 +1,105 @@
+"""
+Lane Missel
+
+Offseason aging of a whole player population at once. Attributes are read into
+columns, aged with array operations on a single draw and written back. The
+distribution of every player's change is the same as mechanics.age_player.
+"""
+
+from collections import deque
+from itertools import repeat
+
+import numpy as np
+
+from entities import Goaltender, Tracked
+from playertable import PlayerTable, FIELDS, OFFSETS, HEADER, ROW, REMOVED, GOALTENDER
+from snapshot import changing_all
+
+COLUMNS = ["age", "potential", "longevity", "passing", "shooting", "defending", "stopping"]
+
+# Rows of a player table as a numpy record.
+TABLE_DTYPE = np.dtype({
+    "names": [name for name, _ in FIELDS],
+    "formats": [{"q": "<i8", "i": "<i4"}.get(code, "S" + code[:-1]) for _, code in FIELDS],
+    "offsets": [OFFSETS[name] for name, _ in FIELDS],
+    "itemsize": ROW.size,
+})
+
+def numpy_generator(seed) -> np.random.Generator:
+    """Returns a numpy Generator, drawing its seed from seed if it is a random stream."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if hasattr(seed, "getrandbits"):
+        return np.random.default_rng(seed.getrandbits(64))
+    return np.random.default_rng(seed)
+
+def age_columns(columns: dict, goaltender: np.ndarray, generator: np.random.Generator):
+    """Ages a year in place the attribute columns of players, goaltender marks goaltenders' rows."""
+    age = columns["age"]
+    potential = columns["potential"]
+    longevity = columns["longevity"]
+
+    # Young players improve up to a ceiling, older players decline.
+    ceiling = np.select([age < 18, age < 21, age < 25, age < 30, age < 40], [5 + potential, 2 + potential, 1 + potential, potential, 5 - longevity], 10 - longevity)
+    modifier = np.where(age < 30, 1, -1)
+
+    # Goaltenders decline half as fast until 45.
+    halved = goaltender & (modifier < 0) & (age < 45)
+    second = np.where(halved, (ceiling / 2).astype(np.int64), ceiling)
+
+    draws = generator.integers(0, np.stack([ceiling, second, ceiling], axis = 1) + 1) * modifier[:, None]
+
+    columns["passing"][:] = np.clip(columns["passing"] + draws[:, 0], 0, 100)
+    columns["stopping"][:] = np.where(goaltender, np.clip(columns["stopping"] + draws[:, 1], 0, 100), columns["stopping"])
+    columns["shooting"][:] = np.where(goaltender, columns["shooting"], np.clip(columns["shooting"] + draws[:, 1], 0, 100))
+    columns["defending"][:] = np.where(goaltender, columns["defending"], np.clip(columns["defending"] + draws[:, 2], 0, 100))
+    age += 1
+
+def age_players(players, seed = None):
+    """Ages every player a year. Players in a PlayerTable are aged in the table's mapped rows."""
+    generator = numpy_generator(seed)
+    if isinstance(players, PlayerTable):
+        _age_table(players, generator)
+        return
+
+    # Grouped by class, so every column is read and written through its class's descriptor.
+    groups = {}
+    for player in players.values():
+        groups.setdefault(type(player), []).append(player)
+
+    for cls, group in sorted(groups.items(), key = lambda x: issubclass(x[0], Goaltender)):
+        goaltender = issubclass(cls, Goaltender)
+        changed = ("age", "passing", "stopping") if goaltender else ("age", "passing", "shooting", "defending")
+        columns = {}
+        for name in COLUMNS:
+            if name in changed or name in ("potential", "longevity"):
+                columns[name] = np.fromiter(map(getattr(cls, name).__get__, group), np.int64, len(group))
+            else:
+                columns[name] = np.zeros(len(group), np.int64)
+
+        age_columns(columns, np.full(len(group), goaltender), generator)
+
+        # Written past Tracked.__setattr__, so each player is marked changed once.
+        if Tracked.watchers:
+            for player in group:
+                player.touch()
+        else:
+            deque(map(cls.dirty.__set__, group, repeat(True)), 0)
+        for name in changed:
+            deque(map(getattr(cls, name).__set__, group, columns[name].tolist()), 0)
+
+def _age_table(table: PlayerTable, generator: np.random.Generator):
+    # Rows are written past the views, so branches keep every player first.
+    changing_all(table)
+    rows = np.frombuffer(table.buffer, TABLE_DTYPE, table.rows, HEADER.size)
+    try:
+        live = (rows["flags"] & REMOVED) == 0
+        columns = {name: rows[name][live].astype(np.int64) for name in COLUMNS}
+        age_columns(columns, (rows["flags"][live] & GOALTENDER) != 0, generator)
+
+        for name in ("age", "passing", "shooting", "defending", "stopping"):
+            rows[name][live] = columns[name]
+        table.mark_changed(rows["identifier"][live].tolist())
+    finally:
+        # The table can't remap while an array holds its buffer.
+        del rows
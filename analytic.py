@@ -0,0 +1,134 @@
+"""
+Lane Missel
+
+Analytic matchup engine. A play is a small chain of choices (possession, pass,
+shot, goal) whose probabilities are fixed by the two lines on the ice, so the
+score distribution of a game can be computed exactly instead of sampled.
+"""
+
+from dataclasses import dataclass
+from math import lgamma, log, exp
+from typing import Dict, List, Tuple
+
+from engine import Lineup, LineRatings, PERIOD_LENGTH, NUM_PERIODS
+
+@dataclass
+class PlayProbabilities:
+    """Chance that a single play ends in a goal for each team."""
+    home: float
+    away: float
+
+    @property
+    def none(self):
+        return 1 - self.home - self.away
+
+@dataclass
+class Matchup:
+    """Exact outcome probabilities of a game between two lineups."""
+    play: PlayProbabilities
+    distribution: List[List[float]]   # [home goals][away goals] after regulation.
+    home_win: float
+    tie: float
+    away_win: float
+
+    @property
+    def expected_goals(self) -> Tuple[float, float]:
+        home = sum(i * sum(row) for i, row in enumerate(self.distribution))
+        away = sum(j * p for row in self.distribution for j, p in enumerate(row))
+        return home, away
+
+def _ratio(value: float, total: float) -> float:
+    return value / total if total > 0 else 0.0
+
+def goal_probability(attacking: LineRatings, defending: LineRatings) -> float:
+    """Returns the chance a play ends in a goal, given attacking has possession."""
+    total = 0.0
+    pass_total = sum(attacking.pass_weights)
+
+    for passer_index, weight in enumerate(attacking.pass_weights):
+        passing = attacking.passing[passer_index]
+        completed = _ratio(weight, pass_total) * _ratio(passing, passing + defending.defending)
+
+        _, skills = attacking.shooters[passer_index]
+        shot_total = sum(skills)
+        for shooting in skills:
+            total += completed * _ratio(shooting, shot_total) * _ratio(shooting, shooting + defending.stopping + 300)
+
+    return total
+
+def play_probabilities(home: Lineup, away: Lineup) -> PlayProbabilities:
+    """Returns the per play goal chances of each team, averaged over line pairings."""
+    # Lines on the ice, with the chance get_line picks each.
+    home_lines = tuple(zip(home.lines, (home.bias, 1 - home.bias)))
+    away_lines = tuple(zip(away.lines, (away.bias, 1 - away.bias)))
+    home_goal = away_goal = 0.0
+
+    for home_line, home_weight in home_lines:
+        for away_line, away_weight in away_lines:
+            weight = home_weight * away_weight
+            if weight == 0:
+                continue
+
+            possession = _ratio(home_line.possession, home_line.possession + away_line.possession)
+            home_goal += weight * possession * goal_probability(home_line.ratings, away_line.ratings)
+            away_goal += weight * (1 - possession) * goal_probability(away_line.ratings, home_line.ratings)
+
+    return PlayProbabilities(home_goal, away_goal)
+
+def _log(value: float) -> float:
+    return log(value) if value > 0 else float("-inf")
+
+def score_distribution(play: PlayProbabilities, plays: int, max_goals: int = 30) -> List[List[float]]:
+    """
+    Returns the distribution of goals after plays plays, indexed [home][away].
+    This is the plays-fold convolution of a single play's outcome, which
+    collapses to a trinomial.
+    """
+    size = min(plays, max_goals) + 1
+    logs = (_log(play.home), _log(play.away), _log(play.none))
+    distribution = [[0.0] * size for _ in range(size)]
+
+    for home in range(size):
+        for away in range(size):
+            rest = plays - home - away
+            if rest < 0:
+                continue
+            terms = [home * logs[0] if home else 0.0, away * logs[1] if away else 0.0, rest * logs[2] if rest else 0.0]
+            if float("-inf") in terms:
+                continue
+            distribution[home][away] = exp(lgamma(plays + 1) - lgamma(home + 1) - lgamma(away + 1) - lgamma(rest + 1) + sum(terms))
+
+    return distribution
+
+def matchup(home: Lineup, away: Lineup, period_length: int = PERIOD_LENGTH, num_periods: int = NUM_PERIODS, over_time = False) -> Matchup:
+    """Returns exact win, tie and loss chances of home against away."""
+    play = play_probabilities(home, away)
+    plays = -(-period_length // 10) * num_periods
+    distribution = score_distribution(play, plays)
+
+    home_win = tie = away_win = 0.0
+    for i, row in enumerate(distribution):
+        for j, p in enumerate(row):
+            if i > j:
+                home_win += p
+            elif i < j:
+                away_win += p
+            else:
+                tie += p
+
+    # Sudden death over time always ends on the next goal.
+    if over_time and play.home + play.away > 0:
+        home_win += tie * play.home / (play.home + play.away)
+        away_win += tie * play.away / (play.home + play.away)
+        tie = 0.0
+
+    return Matchup(play, distribution, home_win, tie, away_win)
+
+def odds_table(lineups: Dict[int, Lineup], period_length: int = PERIOD_LENGTH, num_periods: int = NUM_PERIODS, over_time = False) -> Dict[Tuple[int, int], Matchup]:
+    """Returns the matchup of every ordered (home, away) pair of teams."""
+    table = {}
+    for home_id, home in lineups.items():
+        for away_id, away in lineups.items():
+            if home_id != away_id:
+                table[(home_id, away_id)] = matchup(home, away, period_length, num_periods, over_time)
+    return table
@@ -0,0 +1,75 @@
+"""
+Lane Missel
+
+Background autosave. The Tk thread takes a cheap, consistent save job after
+each simulated week, a fork of the world and what changed, and a worker thread
+encodes, compresses and writes it. Results are passed back to the Tk thread
+through after() callbacks, so saving never freezes the window.
+"""
+
+import queue
+import threading
+
+POLL_MS = 100
+
+class Autosave:
+    """Saves a world on a worker thread, reporting back on the Tk thread."""
+    def __init__(self, master, data, path: str, report = None, compress = True):
+        self.master = master
+        self.data = data
+        self.path = path
+        self.report = report
+        self.compress = compress
+        self.pending = 0
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.worker = threading.Thread(target = self._work, daemon = True)
+        self.worker.start()
+        self.master.after(POLL_MS, self._poll)
+
+    def save(self):
+        """Queues a save of the world as it is now, call on the Tk thread."""
+        self.jobs.put(self.data.save_job(self.path, self.compress, background = True))
+        self.pending += 1
+        self._report("Saving...")
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            try:
+                self.results.put((job, job(), None))
+            except Exception as error:
+                self.results.put((job, None, error))
+
+    def _poll(self):
+        """Hands finished saves back to the Tk thread."""
+        self._drain()
+        self.master.after(POLL_MS, self._poll)
+
+    def _drain(self):
+        """Finishes every save the worker has returned, on the calling thread."""
+        while not self.results.empty():
+            job, written, error = self.results.get()
+            self.pending -= 1
+            if error is None:
+                # Entities are only marked clean once they are written.
+                job.done()
+                self._report("Saved ({:,} bytes)".format(written))
+                continue
+
+            # Everything the job held stays dirty, so the next save writes it.
+            job.close()
+            self._report("Save failed: {}".format(error))
+
+    def _report(self, message: str):
+        if self.report is not None:
+            self.report(message)
+
+    def close(self):
+        """Waits for every queued save to be written and finishes them, call on the Tk thread."""
+        self.jobs.put(None)
+        self.worker.join()
+        self._drain()
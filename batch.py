@@ -0,0 +1,177 @@
+"""
+Lane Missel
+
+Vectorized batch simulation engine. Every game in flight advances one play at
+a time, with each step of the play done as a single array operation.
+"""
+
+from dataclasses import dataclass
+from math import ceil
+from typing import List, Tuple
+
+import numpy as np
+
+from engine import Lineup, PERIOD_LENGTH, NUM_PERIODS
+from rng import Stream
+
+# Number of seconds a single play takes (see engine.simulate_period).
+PLAY_LENGTH = 10
+
+# Columns of a packed line rating row.
+PASSING = slice(0, 4)
+PASS_WEIGHT = slice(4, 8)
+SHOOTING = slice(8, 11)
+POSSESSION = 11
+DEFENDING = 12
+STOPPING = 13
+COLUMNS = 14
+
+@dataclass
+class LineupArrays:
+    """Energy corrected ratings for many lineups, indexed [game, line, column]."""
+    ratings: np.ndarray
+    bias: np.ndarray
+
+    @classmethod
+    def pack(cls, lineups: List[Lineup]):
+        """Returns ratings of the lineups packed into arrays."""
+        # Pack each distinct lineup once, then expand to one row per game.
+        distinct = {}
+        for lineup in lineups:
+            distinct.setdefault(id(lineup), lineup)
+        rows = {key: i for i, key in enumerate(distinct.keys())}
+        index = np.array([rows[id(x)] for x in lineups], dtype=np.int64)
+
+        ratings = np.zeros((len(distinct), 2, COLUMNS), dtype=np.int64)
+        bias = np.zeros(len(distinct))
+
+        for i, lineup in enumerate(distinct.values()):
+            goaltender = lineup.goaltender
+            bias[i] = lineup.bias
+
+            for j, line in enumerate((lineup.first, lineup.second)):
+                skaters = (line.forward, line.flex, line.defender)
+                row = ratings[i, j]
+                row[PASSING] = [x.passing for x in skaters] + [goaltender.passing]
+                row[PASS_WEIGHT] = [x.passing for x in skaters] + [int(goaltender.passing * 0.5)]
+                row[SHOOTING] = [x.shooting for x in skaters]
+                row[DEFENDING] = sum(x.defending for x in skaters)
+                row[POSSESSION] = row[DEFENDING] + row[PASSING].sum()
+                row[STOPPING] = goaltender.stopping
+
+        return LineupArrays(ratings[index], bias[index])
+
+@dataclass
+class BatchResult:
+    """Totals of a batch of games, indexed [game, team] with home as team 0."""
+    goals: np.ndarray
+    shots: np.ndarray
+    possessions: np.ndarray
+    periods: np.ndarray
+
+    def __len__(self):
+        return len(self.goals)
+
+    @property
+    def home(self):
+        return self.goals[:, 0]
+
+    @property
+    def away(self):
+        return self.goals[:, 1]
+
+    @property
+    def tied(self):
+        return self.home == self.away
+
+def _select(weights: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Vectorized select_uniform_steps over the rows of weights."""
+    steps = np.cumsum(weights, axis=1)
+    choice = (keys[:, None] * steps[:, -1:] >= steps).sum(axis=1)
+    return np.minimum(choice, weights.shape[1] - 1)
+
+def _simulate_plays(home: LineupArrays, away: LineupArrays, games: np.ndarray, result: BatchResult, rng: np.random.Generator):
+    """Simulates one play for each of the games, returns mask of games with a goal."""
+    count = len(games)
+    rows = np.arange(count)
+    keys = rng.random((7, count))
+
+    # Pick the line each team sends out.
+    home_line = (keys[0] >= home.bias[games]).astype(np.int64)
+    away_line = (keys[1] >= away.bias[games]).astype(np.int64)
+
+    # Decide which team has possession (chance to score).
+    home_ratings = home.ratings[games, home_line]
+    away_ratings = away.ratings[games, away_line]
+    home_possession = home_ratings[:, POSSESSION]
+    team = (keys[2] * (home_possession + away_ratings[:, POSSESSION]) >= home_possession).astype(np.int64)
+
+    column = (team == 0)[:, None]
+    attacking = np.where(column, home_ratings, away_ratings)
+    defending = np.where(column, away_ratings, home_ratings)
+    passing = attacking[:, PASSING]
+    shooting = attacking[:, SHOOTING]
+
+    # Each game appears once, so plain fancy index increments are safe.
+    result.possessions[games, team] += 1
+
+    # Get the player passing the puck and try passing.
+    passer = _select(attacking[:, PASS_WEIGHT], keys[3])
+    passer_passing = passing[rows, passer]
+    passed = keys[4] * (passer_passing + defending[:, DEFENDING]) < passer_passing
+
+    # Get the player shooting the puck, never the passer.
+    shooter_weight = shooting.copy()
+    skater_passer = passer < 3
+    shooter_weight[rows[skater_passer], passer[skater_passer]] = 0
+    shooter = _select(shooter_weight, keys[5])
+    shooter_shooting = shooting[rows, shooter]
+
+    # Player takes shot.
+    goal = passed & (keys[6] * (shooter_shooting + defending[:, STOPPING] + 300) < shooter_shooting)
+
+    result.shots[games[passed], team[passed]] += 1
+    result.goals[games[goal], team[goal]] += 1
+
+    return goal
+
+def _simulate_period(home: LineupArrays, away: LineupArrays, games: np.ndarray, length: int, result: BatchResult, rng: np.random.Generator, sudden_death = False):
+    for _ in range(ceil(length / PLAY_LENGTH)):
+        if len(games) == 0:
+            break
+
+        goal = _simulate_plays(home, away, games, result, rng)
+
+        # Games end on a goal scored in sudden death period.
+        if sudden_death:
+            games = games[~goal]
+
+def simulate_games(matchups: List[Tuple[Lineup, Lineup]], period_length: int = PERIOD_LENGTH, num_periods: int = NUM_PERIODS, over_time = False, seed = None) -> BatchResult:
+    """
+    Simulates every (home, away) matchup at once, returns the totals of each game.
+    Results are statistically equivalent to engine.simulate_game.
+    """
+    if isinstance(seed, np.random.Generator):
+        rng = seed
+    elif isinstance(seed, Stream):
+        rng = seed.numpy()
+    else:
+        rng = np.random.default_rng(seed)
+    home = LineupArrays.pack([x[0] for x in matchups])
+    away = LineupArrays.pack([x[1] for x in matchups])
+
+    count = len(matchups)
+    result = BatchResult(np.zeros((count, 2), dtype=np.int64), np.zeros((count, 2), dtype=np.int64), np.zeros((count, 2), dtype=np.int64), np.full(count, num_periods, dtype=np.int64))
+    games = np.arange(count)
+
+    for _ in range(num_periods):
+        _simulate_period(home, away, games, period_length, result, rng)
+
+    # Over time periods for tied games.
+    tied = games[result.tied]
+    while over_time and len(tied) > 0:
+        result.periods[tied] += 1
+        _simulate_period(home, away, tied, period_length, result, rng, True)
+        tied = tied[result.tied[tied]]
+
+    return result
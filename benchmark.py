@@ -0,0 +1,232 @@
+"""
+Lane Missel
+
+Throughput benchmarks for the engine, player mechanics and save files. Results
+are written as JSON and compared against a stored baseline, any benchmark
+slower than the baseline by more than the tolerance fails the run.
+
+    python benchmark.py [--output FILE] [--baseline FILE] [--update-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+import aging
+import engine
+import mechanics
+import rng
+from data import Data
+from handler import Regions, load_names
+
+BASELINE = "benchmark_baseline.json"
+SAVES = ["data/save1.dat", "data/save2.dat", "data/save3.dat"]
+SEED = 2022
+
+# Rates every run must reach, whatever its baseline.
+FLOORS = {
+    "age_players_100000": 100000 / 0.08,    # a 100k player dict aged in 80 ms.
+}
+
+def measure(function, units: int, repeat: int = 3) -> float:
+    """Returns the best rate of units per second over repeat runs of function."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return units / max(best, 1e-9)
+
+def _load_world() -> Data:
+    data = Data.init_from_file(SAVES[0])
+    for league in data.leagues.values():
+        league.games[data.other.current_year] = league.create_schedule(data.other.other['games_per_team'].get(league.identifier, 1), data.other.current_year, rng.Stream(SEED))
+    return data
+
+def _lineups(data: Data):
+    home = mechanics.get_lineup(data.organizations.get(1), data.players)
+    away = mechanics.get_lineup(data.organizations.get(2), data.players)
+    return home, away
+
+def _synthetic_world(data: Data, scale: int) -> Data:
+    """Returns a world with scale copies of every player."""
+    players = {}
+    offset = max(data.players.keys())
+    for copy in range(scale):
+        for identifier, player in data.players.items():
+            new_id = identifier + copy * offset
+            players[new_id] = replace(player, identifier = new_id)
+    return Data(players, data.organizations, data.leagues, data.other)
+
+def bench_simulate_play(results: dict):
+    home, away = _lineups(_load_world())
+    stream = rng.Stream(SEED)
+    log = engine.Score()
+    plays = 20000
+
+    def run():
+        for i in range(plays):
+            engine.simulate_play(home.get_line(stream), away.get_line(stream), log, 0, i, stream)
+
+    results["simulate_play"] = {"unit": "plays/s", "rate": measure(run, plays)}
+
+def bench_simulate_game(results: dict):
+    home, away = _lineups(_load_world())
+    stream = rng.Stream(SEED)
+    games = 200
+
+    def run():
+        for _ in range(games):
+            engine.simulate_game(home, away, rng = stream)
+
+    results["simulate_game"] = {"unit": "games/s", "rate": measure(run, games)}
+
+def bench_sim_week(results: dict):
+    data = _load_world()
+    stream = rng.Stream(SEED)
+    year = data.other.current_year
+    games = [x for league in data.leagues.values() for x in league.games[year].regular if x.week == 0]
+
+    def run():
+        for game in games:
+            mechanics.play_game(game, data.players, data.organizations, year, rng = stream)
+
+    results["sim_week"] = {"unit": "weeks/s", "rate": measure(run, 1)}
+
+def bench_sim_season(results: dict):
+    data = _load_world()
+    stream = rng.Stream(SEED)
+    year = data.other.current_year
+    games = [x for league in data.leagues.values() for x in league.games[year].regular]
+
+    def run():
+        for game in games:
+            mechanics.play_game(game, data.players, data.organizations, year, rng = stream)
+
+    results["sim_season"] = {"unit": "seasons/s", "rate": measure(run, 1)}
+
+def bench_create_players(results: dict):
+    regions = Regions.load_from_csv("data/regions.csv")
+
+    def run():
+        mechanics.create_players(load_names("data/names.dat", 500), regions, rng.Stream(SEED))
+
+    results["create_players"] = {"unit": "players/s", "rate": measure(run, 480)}
+
+def bench_age_player(results: dict, sizes = (480, 4800, 48000)):
+    base = _load_world()
+
+    for size in sizes:
+        world = _synthetic_world(base, -(-size // len(base.players)))
+        players = list(world.players.values())[:size]
+        stream = rng.Stream(SEED)
+
+        def run():
+            for player in players:
+                mechanics.age_player(player, stream)
+
+        results["age_player_{}".format(size)] = {"unit": "players/s", "rate": measure(run, size, 1)}
+
+def bench_age_players(results: dict, sizes = (480, 4800, 48000, 100000)):
+    base = _load_world()
+
+    for size in sizes:
+        world = _synthetic_world(base, -(-size // len(base.players)))
+        players = dict(list(world.players.items())[:size])
+        stream = rng.Stream(SEED)
+
+        results["age_players_{}".format(size)] = {"unit": "players/s", "rate": measure(lambda: aging.age_players(players, stream), size)}
+
+def bench_save_files(results: dict, scales = (10, 100)):
+    with tempfile.TemporaryDirectory() as directory:
+        _bench_save_files(results, scales, directory)
+
+def _bench_save_files(results: dict, scales, directory: str):
+    paths = [(os.path.basename(x), x) for x in SAVES]
+
+    # Synthetic saves larger than the shipped ones.
+    base = Data.init_from_file(SAVES[0])
+    for scale in scales:
+        path = os.path.join(directory, "save_x{}.dat".format(scale))
+        _synthetic_world(base, scale).save_to_file(path)
+        paths.append(("save_x{}.dat".format(scale), path))
+
+    for name, path in paths:
+        size = os.path.getsize(path)
+        repeat = 5 if path in SAVES else 1
+        data = Data.init_from_file(path)
+        results["init_from_file_" + name] = {"unit": "MB/s", "rate": measure(lambda: Data.init_from_file(path), size / 1e6, repeat)}
+
+        # Saves are rated by the size they write, which isn't the size read for text saves.
+        target = os.path.join(directory, "out.dat")
+        data.save_to_file(target)
+        written = os.path.getsize(target)
+        results["save_to_file_" + name] = {"unit": "MB/s", "rate": measure(lambda: data.save_to_file(target), written / 1e6, repeat)}
+
+BENCHMARKS = [bench_simulate_play, bench_simulate_game, bench_sim_week, bench_sim_season, bench_create_players, bench_age_player, bench_age_players, bench_save_files]
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns descriptions of every benchmark slower than its baseline budget or its floor."""
+    failures = []
+    for name, floor in FLOORS.items():
+        if name in results and results[name]["rate"] < floor:
+            failures.append("{}: {:.1f} {} below floor of {:.1f}".format(name, results[name]["rate"], results[name]["unit"], floor))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        budget = baseline[name]["rate"] * (1 - tolerance)
+        if result["rate"] < budget:
+            failures.append("{}: {:.1f} {} below budget of {:.1f}".format(name, result["rate"], result["unit"], budget))
+    return failures
+
+def main(arguments = None):
+    parser = argparse.ArgumentParser(description = "Run throughput benchmarks.")
+    parser.add_argument("--output", help = "write results JSON to this file")
+    parser.add_argument("--baseline", default = BASELINE, help = "baseline JSON to compare against")
+    parser.add_argument("--tolerance", type = float, default = 0.3, help = "allowed fractional slowdown")
+    parser.add_argument("--update-baseline", action = "store_true", help = "store these results as the baseline")
+    parser.add_argument("--only", nargs = "*", help = "names of benchmark functions to run")
+    options = parser.parse_args(arguments)
+
+    results = {}
+    for benchmark in BENCHMARKS:
+        if options.only and benchmark.__name__ not in options.only:
+            continue
+        benchmark(results)
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "seed": SEED, "results": results}
+    text = json.dumps(report, indent = 2, sort_keys = True)
+
+    if options.output:
+        with open(options.output, "w") as outfile:
+            outfile.write(text)
+    else:
+        print(text)
+
+    if options.update_baseline:
+        with open(options.baseline, "w") as outfile:
+            outfile.write(text)
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print("No baseline at {}, nothing to compare.".format(options.baseline), file = sys.stderr)
+        return 0
+
+    with open(options.baseline, "r") as infile:
+        baseline = json.load(infile)["results"]
+
+    failures = compare(results, baseline, options.tolerance)
+    for failure in failures:
+        print("REGRESSION " + failure, file = sys.stderr)
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,79 +1,358 @@
-"""
-Lane Missel
-
-Objects and function for managing the applications data.
-"""
-
-
-import os.path
-
-from entities import *
-from handler import Players, Leagues, Organizations, Regions, Other, load_names
-from mechanics import create_players
-
-class Data:
-    """An object storing the applications data."""
-    def __init__(self, players: dict = None, organizations: dict = None, leagues: dict = None, other: dict = None):
-        self.players = players
-        self.organizations = organizations
-        self.leagues = leagues
-        self.other = other
-
-    def __repr__(self):
-        return "Data({},{},{},{})".format(self.players, self.organizations, self.leagues, self.other)
-
-    @classmethod
-    def load_from_files(cls, players_path: str, organizations_path: str, leagues_path: str, other_path: str):
-        """Returns an object instantiated with data from provided files."""
-        # get excecuatable strings from data files.
-        with open(players_path, 'r') as datafile:
-            players_executable = datafile.read()
-        with open(organizations_path, 'r') as datafile:
-            organizations_executable = datafile.read()
-        with open(leagues_path, 'r') as datafile:
-            leagues_executable = datafile.read()
-        with open(other_path, 'r') as datafile:
-            other_executable = datafile.read()
-
-        # load dictionaries from strings.
-        players = Players.load_from_exec(players_executable)
-        organizations = Organizations.load_from_exec(organizations_executable)
-        leagues = Leagues.load_from_exec(leagues_executable)
-        other = Other.load_from_exec(other_executable)
-
-        return Data(players, organizations, leagues, other)
-
-    @classmethod
-    def create(cls):
-        """Returns an object with data loaded from default files."""
-        names = load_names("data/names.dat", 500)
-        regions = Regions.load_from_csv("data/regions.csv")
-        players = create_players(names, regions)
-        organizations = Organizations.load_from_csv("data/organizations.csv")
-        leagues = Leagues.load_from_csv("data/leagues.csv")
-        other = Other.new()
-
-        return Data(players, organizations, leagues, other)
-
-    @classmethod
-    def init_from_file(cls, path: str):
-        """Returns an objected with data loaded from a file."""
-        """Loads application from excecutable text file."""
-        with open(path, "r") as datafile:
-            text = datafile.read()
-
-        exec("data = {}".format(text), globals())
-        return globals()['data']
-
-    def load_from_file(self, path: str):
-        """Sets data of object from provided file."""
-        temp_app = Data.init_from_file(path)
-        self.players = temp_app.players
-        self.organizations = temp_app.organizations
-        self.leagues = temp_app.leagues
-
-    def save_to_file(self, path: str):
-        """Writes representation of pbject to file."""
-        """Saves python object to excecutable text file."""
-        with open(path, 'w') as savefile:
-            savefile.write(repr(self))
+"""
+Lane Missel
+
+Objects and function for managing the applications data.
+"""
+
+
+import os.path
+import random
+from copy import deepcopy
+
+from entities import *
+from handler import Players, Leagues, Organizations, Regions, Other, load_names
+from mechanics import create_players
+from database import Changes, Database
+from journal import Journal, new_generation
+from leaders import Leaders
+from playertable import PlayerTable
+import savefile
+from snapshot import Branch, Store
+
+def _store(mapping):
+    """Returns a dict of entities as a Store, so branches of the world can follow it."""
+    return Store(mapping) if type(mapping) is dict else mapping
+
+def _branch(mapping, games = False) -> Branch:
+    return mapping.fork() if isinstance(mapping, Branch) else Branch(mapping, games = games)
+
+def _promote(mapping, branch):
+    """Returns mapping with a branch of it committed, or the branch if it follows another mapping."""
+    if isinstance(branch, Branch) and branch.base is mapping:
+        branch.commit()
+        return mapping
+    return branch
+
+class Data:
+    """An object storing the applications data."""
+    def __init__(self, players: dict = None, organizations: dict = None, leagues: dict = None, other: dict = None):
+        self.players = _store(players)
+        self.organizations = organizations
+        self.leagues = _store(leagues)
+        self.other = other
+        if organizations is not None:
+            organizations.organizations = _store(organizations.organizations)
+        self.journal = None
+        self.database = None
+        self.changes = None         # what changed since the database was synced.
+        self.leaders = None
+        self._saved = set()
+
+    def __repr__(self):
+        return "Data({},{},{},{})".format(self.players, self.organizations, self.leagues, self.other)
+
+    @classmethod
+    def load_from_files(cls, players_path: str, organizations_path: str, leagues_path: str, other_path: str):
+        """Returns an object instantiated with data from provided files."""
+        # get excecuatable strings from data files.
+        with open(players_path, 'r') as datafile:
+            players_executable = datafile.read()
+        with open(organizations_path, 'r') as datafile:
+            organizations_executable = datafile.read()
+        with open(leagues_path, 'r') as datafile:
+            leagues_executable = datafile.read()
+        with open(other_path, 'r') as datafile:
+            other_executable = datafile.read()
+
+        # load dictionaries from strings.
+        players = Players.load_from_exec(players_executable)
+        organizations = Organizations.load_from_exec(organizations_executable)
+        leagues = Leagues.load_from_exec(leagues_executable)
+        other = Other.load_from_exec(other_executable)
+
+        return Data(players, organizations, leagues, other)
+
+    @classmethod
+    def create(cls, rng = random):
+        """Returns an object with data loaded from default files."""
+        names = load_names("data/names.dat", 500)
+        regions = Regions.load_from_csv("data/regions.csv")
+        players = create_players(names, regions, rng)
+        organizations = Organizations.load_from_csv("data/organizations.csv")
+        leagues = Leagues.load_from_csv("data/leagues.csv")
+        other = Other.new()
+
+        return Data(players, organizations, leagues, other)
+
+    @classmethod
+    def init_from_file(cls, path: str):
+        """Returns an objected with data loaded from a file."""
+        if savefile.is_binary(path):
+            players, organizations, leagues, other = savefile.load(path, players = False)
+
+            # A player table left as this save wrote it is opened as it is, else rebuilt from the save.
+            table = other.other.get('player_table')
+            if table is not None:
+                players = PlayerTable.open_saved(table, savefile.read_generation(path) or 0)
+            if players is None:
+                players = savefile.load(path)[0]
+
+            journal = Journal(path)
+            other = journal.replay(players, organizations.organizations, leagues, other)
+            if table is not None and not isinstance(players, PlayerTable):
+                players = PlayerTable.create(table, players)
+
+            data = Data(players, organizations, leagues, other)
+            data.journal = journal
+            data.mark_clean()
+            return data
+
+        # Older saves are excecutable text files.
+        with open(path, "r") as datafile:
+            text = datafile.read()
+
+        exec("data = {}".format(text), globals())
+        data = globals()['data']
+
+        # Older saves were written without other.
+        if data.other is None:
+            data.other = Other.new()
+
+        return data
+
+    def load_from_file(self, path: str):
+        """Sets data of object from provided file."""
+        temp_app = Data.init_from_file(path)
+        self.players = temp_app.players
+        self.organizations = temp_app.organizations
+        self.leagues = temp_app.leagues
+        self.other = temp_app.other
+        self.journal = temp_app.journal
+        self.leaders = temp_app.leaders
+        self._saved = temp_app._saved
+
+    def save_to_file(self, path: str, compress = False):
+        """Writes object to a binary save file, folding in any journal."""
+        self._run(SaveJob(self, self, path, compress, full = True))
+
+    def save_changes(self, path: str, compress = False) -> int:
+        """
+        Appends what changed since the last save to the journal of path and
+        returns the number of bytes written. Writes a full save if path has no
+        binary base yet, or to compact a journal that grew too large.
+        """
+        return self._run(self.save_job(path, compress))
+
+    @staticmethod
+    def _run(job) -> int:
+        try:
+            written = job()
+        except BaseException:
+            job.close()
+            raise
+        job.done()
+        return written
+
+    def save_job(self, path: str, compress = False, background = False) -> "SaveJob":
+        """
+        Returns a job that saves what changed since the last save to path.
+        Taking the job records a consistent state cheaply, with background the
+        job may then run on another thread while the world keeps changing.
+        """
+        full = self.journal is None or self.journal.path != path or not os.path.exists(path)
+
+        # In the background the journal is compacted from the files, else from memory.
+        compact = not full and self.journal.should_compact()
+        world = self.snapshot() if background else self
+        if full or (compact and not background):
+            return SaveJob(self, world, path, compress, full = True)
+
+        players, removed = self._changed_players()
+        return SaveJob(self, world, path, compress, compact = compact,
+                       players = players,
+                       organizations = [x.identifier for x in self.organizations.organizations.values() if x.dirty],
+                       leagues = [x.identifier for x in self.leagues.values() if x.changed],
+                       other = self.other.dirty, removed = removed)
+
+    def _changed_players(self):
+        """Returns identifiers of players changed and of players removed since the last save."""
+        if isinstance(self.players, PlayerTable):
+            return sorted(self.players.changed), set(self.players.deleted)
+        return [x.identifier for x in self.players.values() if x.dirty], self._saved.difference(self.players)
+
+    def snapshot(self):
+        """
+        Returns a fork of the world in O(1). Neither world copies an entity
+        until one of them changes it, and this world's entities stay in use as
+        they are, so references taken before the fork remain valid.
+        """
+        return Data(_branch(self.players), Organizations(_branch(self.organizations.organizations)), _branch(self.leagues, games = True), deepcopy(self.other))
+
+    def promote(self, branch):
+        """Replaces this world with a fork of it, keeping this object's save file. The fork must no longer be used."""
+        self.players = _promote(self.players, branch.players)
+        self.organizations.organizations = _promote(self.organizations.organizations, branch.organizations.organizations)
+        self.leagues = _promote(self.leagues, branch.leagues)
+        self.other = branch.other
+        self.other.touch()
+        self.leaders = None
+
+    def close(self):
+        """Stops a fork of a world following that world, the fork must no longer be used."""
+        for mapping in (self.players, self.organizations.organizations, self.leagues):
+            if isinstance(mapping, Branch):
+                mapping.close()
+
+    def get_leaders(self) -> Leaders:
+        """Returns the league leaders, pass a league's season to play_game to keep it up to date."""
+        if self.leaders is None:
+            self.leaders = Leaders(self.players, self.leagues, database = self.database)
+        return self.leaders
+
+    def get_statistics(self, identifier: int, year: int = None) -> Statistics:
+        """Returns a player's statistics of year, the latest if none is given, from the database if in use."""
+        if self.database is not None:
+            return self.database.statistics(identifier, year)
+        return self.players[identifier].get_statistics(year)
+
+    def use_database(self, path: str):
+        """Writes all data to a database at path, kept in sync after each week simmed and queried for stats."""
+        self.database = Database.create(path, self)
+        self.changes = Changes()
+        self.changes.follow(self.players, self.organizations.organizations, self.leagues)
+        self.changes.clear()
+        self.leaders = None
+
+    def sync_database(self):
+        """
+        Writes everything changed since the last sync to the database in one
+        transaction, of players only records changed since the last save.
+        Rows are replaced, so syncing twice is harmless.
+        """
+        if self.database is None:
+            return
+
+        changes = self.changes
+        organizations = self.organizations.organizations
+        changes.follow(self.players, organizations, self.leagues)
+        if changes.everything:
+            players = list(self.players)
+            changes.organizations.update(organizations)
+        else:
+            players = sorted(changes.players)
+
+        games = changes.game_rows(self.leagues)
+        self.database.write([self.players[x] for x in players if x in self.players], [organizations[x] for x in sorted(changes.organizations) if x in organizations], changed = True, games = games)
+        self.database.remove([x for x in changes.players if x not in self.players])
+        changes.clear()
+
+    def use_player_table(self, path: str):
+        """Moves players into a memory-mapped table at path, which later saves open on load."""
+        self.players = PlayerTable.create(path, self.players)
+        self.mark_clean()
+        self.other.touch()
+        self.other.other['player_table'] = path
+
+    def mark_clean(self):
+        """Marks every entity as saved."""
+        for entity in list(self.organizations.organizations.values()) + list(self.leagues.values()):
+            entity.clean()
+        self.other.clean()
+
+        if isinstance(self.players, PlayerTable):
+            self.players.clean()
+            return
+        for player in self.players.values():
+            player.clean()
+        self._saved = set(self.players)
+
+class SaveJob:
+    """
+    A save of a world taken on its thread. Calling the job encodes and writes
+    the save, possibly on another thread, and returns the number of bytes
+    written. Once it returns, done() marks what it saved as clean back on the
+    world's thread, so entities stay dirty until they are on disk. A job that
+    fails is closed instead, and everything it held is saved next time.
+    """
+    def __init__(self, data: Data, world: Data, path: str, compress = False, full = False, compact = False, players = (), organizations = (), leagues = (), other = False, removed = ()):
+        self.data = data
+        self.world = world
+        self.path = path
+        self.compress = compress
+        self.full = full
+        self.compact = compact
+        self.players = players
+        self.organizations = organizations
+        self.leagues = leagues
+        self.other = other
+        self.removed = removed
+        self.journal = Journal(path, new_generation()) if full else data.journal
+
+    def __call__(self) -> int:
+        world = self.world
+        if self.full:
+            savefile.save(self.path, world.players, world.organizations, world.leagues, world.other, self.compress, self.journal.generation)
+
+            # The base now holds every journal entry.
+            self.journal.clear()
+            return os.path.getsize(self.path)
+
+        if not (self.players or self.organizations or self.leagues or self.other or self.removed or self.compact):
+            return 0
+
+        entities = (savefile.values(world.players, self.players), savefile.values(world.organizations.organizations, self.organizations), savefile.values(world.leagues, self.leagues))
+        with savefile.reading(*entities):
+            sections = savefile.encode(*entities, world.other if self.other else None, self.removed, changed = True)
+        written = self.journal.append(sections, self.compress)
+        if self.compact:
+            self.journal.compact(self.compress)
+        return written
+
+    def _since(self, mapping) -> set:
+        """Returns keys of mapping changed since the job was taken."""
+        if isinstance(mapping, Branch):
+            return set(mapping.local) | mapping.removed
+        return set()
+
+    def done(self):
+        """Marks what the job saved as clean, call on the world's thread once it returned."""
+        data = self.data
+        world = self.world
+        changed = [self._since(x) for x in (world.players, world.organizations.organizations, world.leagues)]
+        self.close()
+
+        if self.full:
+            data.journal = self.journal
+            saved = [data.players.keys(), data.organizations.organizations.keys(), data.leagues.keys()]
+            data._saved = set(world.players)
+        else:
+            saved = [self.players, self.organizations, self.leagues]
+            data._saved.difference_update(self.removed)
+            data._saved.update(self.players)
+
+        table = data.players
+        if isinstance(table, PlayerTable):
+            if self.full:
+                table.clean(keep = changed[0])
+            else:
+                table.clean_players(set(self.players) - changed[0])
+                table.deleted.difference_update(set(self.removed) - changed[0])
+            saved[0] = ()
+
+            # A table holding nothing unsaved matches the save, so it's opened as it is on load.
+            if not table.changed and not table.deleted:
+                table.generation = self.journal.generation
+                table.flush()
+
+        for mapping, keys, since in zip((data.players, data.organizations.organizations, data.leagues), saved, changed):
+            for key in keys:
+                if key not in since and key in mapping:
+                    mapping[key].clean()
+
+        if (self.full or self.other) and data.other == world.other:
+            data.other.clean()
+
+    def close(self):
+        """Releases the world the job saved, call on the world's thread."""
+        if self.world is not self.data:
+            self.world.close()
@@ -1,8 +1,72 @@
-import data
-
-def test_data_1():
-    data_obj = data.Data.create()
-    print(data_obj.other)
-
-if __name__ == '__main__':
-    test_data_1()
\ No newline at end of file
+import os
+import tempfile
+
+import data
+import savefile
+
+def test_data_1():
+    data_obj = data.Data.create()
+    print(data_obj.other)
+
+def test_lazy_history():
+    """Loading a save leaves history in the file, a past year reads only its player's block."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "save.dat")
+        data.Data.init_from_file("data/save1.dat").save_to_file(path)
+        world = data.Data.init_from_file(path)
+
+        records = {x.identifier: x.statistics for x in world.players.values()}
+        assert all(x._block is None and x._pending is None and len(x.records) == 0 for x in records.values())
+
+        identifier, statistics = next((k, v) for k, v in records.items() if v._count > 0)
+        year = statistics.pending_years().pop()
+        assert statistics.get_record_by_year(year).games_played > 0
+        assert year not in statistics.pending and len(statistics.records) > 0
+
+        # No other player's history was decoded.
+        assert all(x._block is None and x._pending is None and len(x.records) == 0 for k, x in records.items() if k != identifier)
+        del world, records, statistics
+
+class _Master:
+    """Stands in for a Tk window, after() callbacks are never run."""
+    def after(self, ms, function):
+        pass
+
+def test_autosave_close():
+    """Closing an autosave finishes every save, so no fork keeps following the world."""
+    from autosave import Autosave
+    from entities import Tracked
+
+    with tempfile.TemporaryDirectory() as directory:
+        world = data.Data.init_from_file("data/save1.dat")
+        messages = []
+        autosave = Autosave(_Master(), world, os.path.join(directory, "save.dat"), messages.append)
+        autosave.save()
+        autosave.save()
+        autosave.close()
+
+        assert len(Tracked.watchers) == 0
+        assert autosave.pending == 0 and messages[-1].startswith("Saved")
+
+def test_lottery_weights():
+    """A lottery needs a positive weight for every team, and the heaviest team mostly picks first."""
+    import random
+    from draft import lottery
+
+    for weights in ([1, 0, 1], [1, -2, 1], [1, float("nan"), 1], [1, 1]):
+        try:
+            lottery(3, 1, weights)
+        except ValueError:
+            continue
+        raise AssertionError("lottery accepted {}".format(weights))
+
+    rng = random.Random(7)
+    firsts = [next(lottery(3, 2, [1, 1000, 1], rng))[1] for _ in range(200)]
+    assert firsts.count(1) > 190
+    assert sorted(team for _, team in lottery(3, 2, rng = rng)) == [0, 0, 1, 1, 2, 2]
+
+if __name__ == '__main__':
+    test_data_1()
+    test_lazy_history()
+    test_autosave_close()
+    test_lottery_weights()
@@ -0,0 +1,239 @@
+"""
+Lane Missel
+
+SQLite storage for the applications data. Players, statistical records,
+organizations and games are kept in indexed tables, so stat queries such as
+league leaders are lookups instead of passes over every player.
+"""
+
+import sqlite3
+import weakref
+from typing import List, Tuple
+
+import savefile
+from savefile import PLAYER_COLUMNS, RECORD_COLUMNS, GAME_COLUMNS, PHASES
+from engine import PERIOD_LENGTH, NUM_PERIODS
+from entities import Game, League, Organization, Player, Statistics, Tracked
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players ({players}, PRIMARY KEY (identifier));
+CREATE TABLE IF NOT EXISTS statistics ({statistics});
+CREATE TABLE IF NOT EXISTS organizations (identifier INTEGER PRIMARY KEY, name TEXT, location TEXT, abbreviation TEXT, colors TEXT);
+CREATE TABLE IF NOT EXISTS games ({games});
+CREATE INDEX IF NOT EXISTS statistics_year_team ON statistics (year, team);
+CREATE UNIQUE INDEX IF NOT EXISTS statistics_key ON statistics (player, year, team, type);
+CREATE UNIQUE INDEX IF NOT EXISTS games_key ON games (league, year, phase, game);
+"""
+
+TYPES = {savefile.INTEGER: "INTEGER", savefile.REAL: "REAL", savefile.STRING: "TEXT"}
+
+# Statistics that can be ranked, name -> (total, True if higher is better, goaltenders only).
+STATISTICS = {name: ("SUM({})".format(name), True, False) for name, _ in RECORD_COLUMNS[5:]}
+STATISTICS.update({
+    "points": ("SUM(goals + assists)", True, False),
+    "plus_minus": ("SUM(plus) - SUM(minus)", True, False),
+    "save_percentage": ("1.0 - CAST(SUM(goals_against) AS REAL) / NULLIF(SUM(shots_against), 0)", True, True),
+    "goals_against_average": ("CAST(SUM(goals_against) AS REAL) * {} / NULLIF(SUM(seconds_played), 0)".format(PERIOD_LENGTH * NUM_PERIODS), False, True),
+})
+
+def _definition(columns) -> str:
+    return ", ".join("{} {}".format(name, TYPES[code]) for name, code in columns)
+
+def _insert(table: str, columns) -> str:
+    return "INSERT OR REPLACE INTO {} VALUES ({})".format(table, ", ".join("?" * len(columns)))
+
+def _forget(watcher):
+    if watcher in Tracked.watchers:
+        Tracked.watchers.remove(watcher)
+
+class _Keys:
+    """Follows a mapping of the world like a branch, keeping the keys set or removed."""
+    def __init__(self, changes: "Changes", keys: set):
+        self.changes = changes
+        self.keys = keys
+
+    def replacing(self, key):
+        self.keys.add(key)
+
+    def changing_all(self):
+        self.changes.everything = True
+
+class Changes:
+    """
+    What changed in a world since it was last synced to its database. Tracked
+    objects tell it before they change, as they tell snapshots, and the world's
+    mappings tell it before a key is set or removed.
+    """
+    def __init__(self):
+        self.players = set()
+        self.organizations = set()
+        self.leagues = set()
+        self.games = {}             # id -> game
+        self.everything = False     # every player changed, or a mapping was replaced.
+        self._mappings = ()
+        self._keys = [_Keys(self, x) for x in (self.players, self.organizations, self.leagues)]
+
+        self._watcher = weakref.ref(self, _forget)
+        Tracked.watchers.append(self._watcher)
+
+    def follow(self, players, organizations, leagues):
+        """Follows the world's mappings, everything changed if they aren't those followed so far."""
+        mappings = (players, organizations, leagues)
+        if all(x is y for x, y in zip(mappings, self._mappings)) and len(self._mappings) == 3:
+            return
+        for mapping, keys in zip(self._mappings, self._keys):
+            mapping.branches.discard(keys)
+        for mapping, keys in zip(mappings, self._keys):
+            mapping.branches.add(keys)
+        self._mappings = mappings
+        self.everything = True
+
+    def changing(self, entity):
+        if isinstance(entity, Player):
+            self.players.add(entity.identifier)
+        elif isinstance(entity, Game):
+            self.games[id(entity)] = entity
+        elif isinstance(entity, Organization):
+            self.organizations.add(entity.identifier)
+        elif isinstance(entity, League):
+            self.leagues.add(entity.identifier)
+
+    def game_rows(self, leagues) -> list:
+        """Returns rows of the changed games of leagues, searching changed leagues from their latest year."""
+        rows = []
+        wanted = dict(self.games)
+        for identifier in sorted(self.leagues):
+            league = leagues.get(identifier)
+            if league is None or not wanted:
+                continue
+            for year in sorted(league.games, reverse = True):
+                for phase, name in enumerate(PHASES):
+                    for index, game in enumerate(getattr(league.games[year], name)):
+                        if wanted.pop(id(game), None) is game:
+                            savefile.add_game_row(rows, identifier, year, phase, index, game)
+                if not wanted:
+                    break
+        return rows
+
+    def clear(self):
+        self.players.clear()
+        self.organizations.clear()
+        self.leagues.clear()
+        self.games.clear()
+        self.everything = False
+
+class Database:
+    """
+    A connection to a database of the applications data. Identifiers of no team
+    or game type are stored as -1, as they are in binary saves.
+    """
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA.format(players = _definition(PLAYER_COLUMNS), statistics = _definition(RECORD_COLUMNS), games = _definition(GAME_COLUMNS)))
+
+    @classmethod
+    def create(cls, path: str, data):
+        """Returns a database at path holding all of data."""
+        database = cls(path)
+        database.write(data.players.values(), data.organizations.organizations.values(), data.leagues.values())
+        return database
+
+    def write(self, players, organizations = (), leagues = (), changed = False, games = None):
+        """
+        Writes the given entities, replacing what was stored for them, in one
+        transaction. With changed, only records and games changed since last
+        cleaned are written over those stored. Rows of games, if given, are
+        written instead of those of leagues.
+        """
+        players = list(players)
+        player_table, _ = savefile.player_rows(players)
+        records = []
+        for player in players:
+            savefile.record_rows(player.identifier, player.statistics, records, changed)
+
+        leagues = list(leagues)
+        if games is None:
+            games = []
+            for league in leagues:
+                savefile.game_rows(league, games, changed)
+
+        with self.connection:
+            self.connection.executemany(_insert("players", PLAYER_COLUMNS), player_table)
+            if not changed:
+                self.connection.executemany("DELETE FROM statistics WHERE player = ?", [(x.identifier,) for x in players])
+            self.connection.executemany(_insert("statistics", RECORD_COLUMNS), records)
+            self.connection.executemany(_insert("organizations", range(5)), [(x.identifier, x.name, x.location, x.abbreviation, x.colors) for x in organizations])
+            if not changed:
+                self.connection.executemany("DELETE FROM games WHERE league = ?", [(x.identifier,) for x in leagues])
+            self.connection.executemany(_insert("games", GAME_COLUMNS), games)
+
+    def remove(self, identifiers):
+        """Removes players and their statistics."""
+        with self.connection:
+            self.connection.executemany("DELETE FROM players WHERE identifier = ?", [(x,) for x in identifiers])
+            self.connection.executemany("DELETE FROM statistics WHERE player = ?", [(x,) for x in identifiers])
+
+    def leaders(self, year: int, statistic: str = "points", limit: int = 50, team: int = None, game_type: int = None, teams = None, qualifying_games: int = 1) -> List[Tuple[int, int]]:
+        """
+        Returns (player, total) of the players with the best total of statistic
+        in year, of team or any of teams if given. Goaltending statistics only
+        rank goaltenders with qualifying_games.
+        """
+        assert statistic in STATISTICS, "Unknown statistic {}.".format(statistic)
+        total, higher, goaltenders = STATISTICS[statistic]
+        query = "SELECT player, {} AS total FROM statistics WHERE year = ?".format(total)
+        arguments = [year]
+
+        if team is not None:
+            query += " AND team = ?"
+            arguments.append(team)
+        if teams is not None:
+            teams = list(teams)
+            query += " AND team IN ({})".format(", ".join("?" * len(teams)))
+            arguments += teams
+        if game_type is not None:
+            query += " AND type = ?"
+            arguments.append(game_type)
+        if goaltenders:
+            query += " AND goaltender = 1"
+
+        query += " GROUP BY player HAVING total IS NOT NULL"
+        if goaltenders:
+            query += " AND SUM(games_played) >= ?"
+            arguments.append(qualifying_games)
+        query += " ORDER BY total {}, player LIMIT ?".format("DESC" if higher else "ASC")
+        arguments.append(limit)
+        return self.connection.execute(query, arguments).fetchall()
+
+    def statistics(self, identifier: int, year: int = None) -> Statistics:
+        """Returns a player's statistics of every record of year, the latest year if none is given."""
+        if year is None:
+            year = self.connection.execute("SELECT MAX(year) FROM statistics WHERE player = ?", (identifier,)).fetchone()[0]
+
+        totals = ", ".join("SUM({})".format(name) for name, _ in RECORD_COLUMNS[5:])
+        row = self.connection.execute("SELECT player, year, -1, -1, MAX(goaltender), {} FROM statistics WHERE player = ? AND year = ?".format(totals), (identifier, year)).fetchone()
+        if row[0] is None:
+            return Statistics()
+        return savefile.build_record({name: [value] for (name, _), value in zip(RECORD_COLUMNS, row)}, 0)[1]
+
+    def player_statistics(self, identifier: int, year: int = None) -> list:
+        """Returns rows of a player's statistical records, of every year if none is given."""
+        query = "SELECT * FROM statistics WHERE player = ?"
+        arguments = [identifier]
+        if year is not None:
+            query += " AND year = ?"
+            arguments.append(year)
+        return self.connection.execute(query + " ORDER BY year", arguments).fetchall()
+
+    def games(self, league: int, year: int, played: bool = None) -> list:
+        """Returns rows of a league's games in year."""
+        query = "SELECT * FROM games WHERE league = ? AND year = ?"
+        arguments = [league, year]
+        if played is not None:
+            query += " AND played = ?"
+            arguments.append(int(played))
+        return self.connection.execute(query, arguments).fetchall()
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,93 @@
+"""
+Lane Missel
+
+Drafting rosters from a pool of players. Each position is a heap of the players
+left, best overall first, and draft orders are generated pick by pick, so a
+draft takes O(n + picks log n).
+"""
+
+import heapq
+import random
+from typing import Dict, Iterator, List, Tuple
+
+# Roster slots to fill by position, goaltenders are drafted first.
+SLOTS = {0: 2, 1: 6, 2: 10}
+
+class Pool:
+    """Players not drafted yet, ties of overall go to the lower identifier."""
+    def __init__(self, players):
+        self.positions = {}
+        for player in players:
+            self.positions.setdefault(player.position_id, []).append((-player.overall, player.identifier))
+        for heap in self.positions.values():
+            heapq.heapify(heap)
+
+    def __len__(self):
+        return sum(len(x) for x in self.positions.values())
+
+    def pick(self, position: int) -> int:
+        """Returns the identifier of the best player left at position, or None."""
+        heap = self.positions.get(position)
+        if not heap:
+            return None
+        return heapq.heappop(heap)[1]
+
+def snake(teams: int, rounds: int) -> Iterator[Tuple[int, int]]:
+    """Yields (round, team) picks, the order reversing every round."""
+    forward = list(range(teams))
+    backward = forward[::-1]
+    for round in range(rounds):
+        for team in (forward if round % 2 == 0 else backward):
+            yield round, team
+
+def lottery(teams: int, rounds: int, weights: List[float] = None, rng = random) -> Iterator[Tuple[int, int]]:
+    """
+    Returns (round, team) picks in one order drawn by weighted lottery, higher
+    weights pick earlier. Weights are checked and the order drawn when called.
+    """
+    if weights is None:
+        weights = [1] * teams
+    if len(weights) != teams:
+        raise ValueError("A weight is needed for every team, got {} for {} teams.".format(len(weights), teams))
+    if not all(x > 0 for x in weights):
+        raise ValueError("Lottery weights must be positive: {}".format(weights))
+
+    # Weighted sampling without replacement, sort on random() ** (1 / weight).
+    order = sorted(range(teams), key = lambda x: rng.random() ** (1 / weights[x]), reverse = True)
+    return ((round, team) for round in range(rounds) for team in order)
+
+def grouped(teams: int, rounds: int, group_size: int = 4, rng = random) -> Iterator[Tuple[int, int]]:
+    """
+    Yields (round, team) picks of consecutive groups of teams. A group makes
+    all of its picks before the next starts, in a new random order each round.
+    """
+    for start in range(0, teams, group_size):
+        group = list(range(start, min(start + group_size, teams)))
+        for round in range(rounds):
+            for team in rng.sample(group, len(group)):
+                yield round, team
+
+def draft(players, teams: int, slots: Dict[int, int] = SLOTS, order: str = "snake", rng = random, group_size: int = 4, weights: List[float] = None) -> List[List[int]]:
+    """
+    Returns a roster of player identifiers for each team, for Organization.set_roster.
+    Picks at a position with no players left are skipped.
+    """
+    positions = [position for position, count in slots.items() for _ in range(count)]
+
+    if order == "snake":
+        picks = snake(teams, len(positions))
+    elif order == "lottery":
+        picks = lottery(teams, len(positions), weights, rng)
+    elif order == "grouped":
+        picks = grouped(teams, len(positions), group_size, rng)
+    else:
+        raise ValueError("Unknown draft order: {}".format(order))
+
+    pool = Pool(players.peek_values() if hasattr(players, "peek_values") else players.values())
+    rosters = [[] for _ in range(teams)]
+    for round, team in picks:
+        identifier = pool.pick(positions[round])
+        if identifier is not None:
+            rosters[team].append(identifier)
+
+    return rosters
@@ -0,0 +1,253 @@
+"""
+Lane Missel
+
+Headless dynasty mode. Simulates season after season without a window: the
+schedule, regular season and playoffs of every league, then an offseason of
+aging, retirement, a draft class and roster refills. The world is checkpointed
+to its save file as it goes, so a run can be stopped and resumed.
+
+    python dynasty.py SAVE [--seasons 100] [--seed N] [--checkpoint 1] [--world FILE | --players N] [--workers N] [--report FILE]
+"""
+
+import argparse
+import json
+import os.path
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import aging
+import generator
+import mechanics
+import rng
+import slate
+from data import Data
+from draft import Pool, SLOTS
+from entities import *
+from handler import NameIndex, Regions
+from leaders import standings
+from playertable import PlayerTable
+
+PLAYOFF_TEAMS = 4
+RETIREMENT_AGE = 35     # Players retire from this age, with rising odds.
+MAXIMUM_AGE = 42        # Every player this age retires.
+
+def schedule_season(data: Data, year: int, stream) -> Dict[int, Schedule]:
+    """Creates this year's schedule of every league with at least two teams, returns them by league."""
+    schedules = {}
+    for league in data.leagues.values():
+        if len(league.teams) < 2:
+            continue
+        league.touch()
+        league.games[year] = league.create_schedule(data.other.other['games_per_team'].get(league.identifier, 1), year, stream)
+        schedules[league.identifier] = league.games[year]
+    return schedules
+
+def play_week(data: Data, year: int, week: int, stream, executor = None) -> List[Game]:
+    """Plays every league's regular season games of a week, across executor's workers if given, returns them."""
+    return slate.play_week(data, year, week, stream.child(week), 1 if executor is None else None, executor)
+
+def play_playoffs(data: Data, league: League, year: int, stream) -> int:
+    """Plays a single elimination bracket of the league's best teams, returns the champion."""
+    size = 1
+    while size * 2 <= min(PLAYOFF_TEAMS, len(league.teams)):
+        size *= 2
+    bracket = [team for team, _ in standings(league, data.organizations, year)[:size]]
+
+    league.touch()
+    schedule = league.games[year]
+    week = max((x.week for x in schedule.regular), default = 0) + 1
+    while len(bracket) > 1:
+        winners = []
+        for i in range(len(bracket) // 2):
+            game = Game(bracket[i], bracket[-1 - i], week = week)
+            schedule.playoff.append(game)
+            score = mechanics.play_game(game, data.players, data.organizations, year, GameTypes.postseason.value, over_time = True, rng = stream)
+            winners.append(game.home if score.home > score.away else game.away)
+        bracket = winners
+        week += 1
+
+    return bracket[0]
+
+def retire_players(data: Data, stream) -> List[int]:
+    """Removes players that retire this offseason from the world and their rosters, returns their identifiers."""
+    retired = []
+    for player in list(data.players.values()):
+        if player.age < RETIREMENT_AGE:
+            continue
+        if player.age >= MAXIMUM_AGE or stream.random() < (player.age - RETIREMENT_AGE + 1) / (MAXIMUM_AGE - RETIREMENT_AGE + 1):
+            retired.append(player.identifier)
+
+    gone = set(retired)
+    for organization in data.organizations.organizations.values():
+        if organization.roster.reserves.isdisjoint(gone) and organization.roster.active.isdisjoint(gone):
+            continue
+        organization.touch()
+        organization.roster.reserves -= gone
+        organization.roster.active -= gone
+
+        # A lineup naming a retired player is generated again.
+        lineup = organization.lineup
+        if gone.intersection((lineup.goaltender, lineup.backup) + tuple(vars(lineup.first).values()) + tuple(vars(lineup.second).values())):
+            organization.lineup = Lineup()
+
+    for identifier in retired:
+        del data.players[identifier]
+    return retired
+
+def add_draft_class(data: Data, count: int, names: NameIndex, regions: Regions, stream) -> List[int]:
+    """Adds count new 17 and 18 year old players to the world, returns their identifiers."""
+    if count == 0:
+        return []
+    start = max(data.players.keys(), default = 0) + 1
+    rows = generator.generate_rows(count, names, regions, aging.numpy_generator(stream), start, cohorts = 2)
+    data.players.update(generator.build_players(rows))
+    return rows["identifier"].tolist()
+
+def refill_rosters(data: Data, order: List[int], slots: Dict[int, int] = SLOTS):
+    """
+    Tops up every roster to slots from the players not on one. Teams pick in
+    order, one player a round at each position they still need.
+    """
+    organizations = data.organizations.organizations
+    signed = set().union(*(x.players for x in organizations.values()))
+    pool = Pool(x for x in data.players.values() if x.identifier not in signed)
+
+    needs = {}
+    for team in order:
+        counts = {}
+        for identifier in organizations[team].players:
+            position = data.players[identifier].position_id
+            counts[position] = counts.get(position, 0) + 1
+        needs[team] = {position: count - counts.get(position, 0) for position, count in slots.items()}
+
+    for position, count in slots.items():
+        for round in range(count):
+            for team in order:
+                if needs[team][position] <= round:
+                    continue
+                identifier = pool.pick(position)
+                if identifier is not None:
+                    organizations[team].set_roster([identifier])
+
+def draft_order(data: Data, year: int) -> List[int]:
+    """Returns every organization, the worst of each league's standings picking first."""
+    order = []
+    for league in data.leagues.values():
+        rows = standings(league, data.organizations, year)
+        order += [team for team, _ in reversed(rows) if team not in order]
+    order += [x for x in data.organizations.organizations if x not in order]
+    return order
+
+def sim_season(data: Data, seed: int, names: NameIndex, regions: Regions, executor = None) -> dict:
+    """Simulates the current season and offseason, returns a summary of it."""
+    year = data.other.current_year
+    stream = rng.Stream(seed).child(year)
+
+    # New worlds may start with empty rosters.
+    refill_rosters(data, draft_order(data, year - 1))
+
+    schedules = schedule_season(data, year, stream)
+    weeks = max((x.week for schedule in schedules.values() for x in schedule.regular), default = -1) + 1
+    games = []
+    for week in range(weeks):
+        data.other.set_week(week)
+        games += play_week(data, year, week, stream, executor)
+
+    champions = {league: play_playoffs(data, data.leagues[league], year, stream) for league in schedules}
+    data.other.other.setdefault('champions', {})[year] = champions
+
+    # Offseason.
+    aging.age_players(data.players, stream)
+    retired = retire_players(data, stream)
+    drafted = add_draft_class(data, len(retired), names, regions, stream)
+    refill_rosters(data, draft_order(data, year))
+
+    data.other.set_week(None)
+    data.other.year += 1
+    data.sync_database()
+
+    population = list(data.players.values())
+    return {
+        "year": year,
+        "games": len(games),
+        "goals_per_game": sum(sum(x.score) for x in games) / max(len(games), 1),
+        "champions": champions,
+        "players": len(population),
+        "retired": len(retired),
+        "drafted": len(drafted),
+        "mean_age": sum(x.age for x in population) / max(len(population), 1),
+        "mean_overall": sum(x.overall for x in population) / max(len(population), 1),
+    }
+
+def load_world(path: str, world: str = None, players: int = None, seed: int = None) -> Data:
+    """Returns the world saved at path to resume, else a new one from world, or generated with players."""
+    if os.path.exists(path):
+        return Data.init_from_file(path)
+    if world is not None:
+        return Data.init_from_file(world)
+    if players is not None:
+        return generator.generate_world(players = players, seed = seed)
+    return Data.create(rng.Stream(seed))
+
+def run(path: str, seasons: int, seed: int = None, checkpoint: int = 1, world: str = None, players: int = None, workers: int = None, log = sys.stdout) -> dict:
+    """
+    Simulates seasons of the world at path, saving it every checkpoint seasons,
+    returns a report. Weeks are played across workers processes, all cores if None.
+    """
+    data = load_world(path, world, players, seed)
+
+    # A resumed run keeps the seed it started with.
+    if seed is None:
+        seed = data.other.other.get('seed', rng.Stream().entropy)
+    data.other.other.setdefault('seed', seed)
+    data.other.touch()
+
+    names = NameIndex(generator.NAMES)
+    regions = Regions.load_from_csv(generator.REGIONS)
+    summaries = []
+    executor = ProcessPoolExecutor(workers) if (workers or os.cpu_count() or 1) > 1 else None
+    start = time.perf_counter()
+
+    for season in range(seasons):
+        began = time.perf_counter()
+        summary = sim_season(data, data.other.other['seed'], names, regions, executor)
+        summary["seconds"] = time.perf_counter() - began
+        summaries.append(summary)
+
+        if (season + 1) % checkpoint == 0 or season + 1 == seasons:
+            data.save_changes(path, compress = True)
+
+        elapsed = time.perf_counter() - start
+        print("{year}: {games} games, {goals_per_game:.2f} goals/game, {players} players, {retired} retired, mean overall {mean_overall:.1f}, {seconds:.2f}s".format(**summary), file = log, flush = True)
+        print("  {:.2f} seasons/min".format((season + 1) * 60 / elapsed), file = log, flush = True)
+
+    elapsed = time.perf_counter() - start
+    if executor is not None:
+        executor.shutdown()
+    if isinstance(data.players, PlayerTable):
+        data.players.flush()
+    return {"seed": data.other.other['seed'], "seasons": seasons, "seconds": elapsed, "seasons_per_minute": seasons * 60 / max(elapsed, 1e-9), "summaries": summaries}
+
+def main(arguments = None):
+    parser = argparse.ArgumentParser(description = "Simulate seasons without a window.")
+    parser.add_argument("save", help = "save file to resume from and checkpoint to")
+    parser.add_argument("--seasons", type = int, default = 100, help = "seasons to simulate")
+    parser.add_argument("--seed", type = int, default = None, help = "seed of a new run")
+    parser.add_argument("--checkpoint", type = int, default = 1, help = "seasons between saves")
+    parser.add_argument("--world", help = "save file to start a new run from")
+    parser.add_argument("--players", type = int, default = None, help = "start a new run from a generated world of this many players")
+    parser.add_argument("--workers", type = int, default = None, help = "processes to play weeks across, all cores by default")
+    parser.add_argument("--report", help = "write the report JSON to this file")
+    options = parser.parse_args(arguments)
+
+    report = run(options.save, options.seasons, options.seed, options.checkpoint, options.world, options.players, options.workers)
+    print("{seasons} seasons in {seconds:.1f}s, {seasons_per_minute:.2f} seasons/min".format(**report))
+
+    if options.report:
+        with open(options.report, "w") as outfile:
+            outfile.write(json.dumps(report, indent = 2))
+
+if __name__ == '__main__':
+    main()
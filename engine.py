@@ -1,283 +1,715 @@
-"""
-Lane Missel
-
-The simulation engine for the application.
-"""
-
-
-from dataclasses import dataclass
-from random import random
-from typing import List
-
-
-class Player:
-    def __init__(self, identifier, energy, passing):
-        self.identifier = identifier
-        self.energy = energy
-        self._passing = passing
-
-    @property
-    def passing(self):
-        return self._correct_for_energy(self._passing)
-
-    def _correct_for_energy(self, value):
-        return int(value / (self.energy / 100))
-
-class Skater(Player):
-    def __init__(self, identifier, passing, shooting, defending, energy = 100):
-        self.identifier = identifier
-        self._passing = passing
-        self._shooting = shooting
-        self._defending = defending
-        self.energy = energy
-
-    @property
-    def shooting(self):
-        return self._correct_for_energy(self._shooting)
-
-    @property
-    def defending(self):
-        return self._correct_for_energy(self._defending)
-
-class Goaltender(Player):
-    def __init__(self, identifier, passing, stopping, energy):
-        self.identifier = identifier
-        self._passing = passing
-        self._stopping = stopping
-        self.ebergy = energy
-
-    @property
-    def stopping(self):
-        return self._correct_for_energy(self._stopping)
-
-@dataclass
-class GameStatistics:
-    seconds_played: int = 0
-    assists: int = 0
-
-@dataclass
-class SkaterGameStatistics(GameStatistics):
-    shots: int = 0
-    goals: int = 0
-    assists: int = 0
-    plus: int = 0
-    minus: int = 0
-
-@dataclass
-class GoaltenderGameStatistics(GameStatistics):
-    goals_against: int = 0
-    shots_against: int = 0
-
-@dataclass
-class Players:
-    forward: Skater = None
-    flex: Skater = None
-    defender: Skater = None
-    goaltender: Goaltender = None
-
-    def __iter__(self):
-        self._index = 0
-        return
-
-    def __next__(self) -> Player:
-        if self._index > 3:
-            delattr(self, "_index")
-            raise StopIteration
-
-        self._index += 1
-
-        return self[self._index]
-
-    def __getitem___(self, i) -> Player:
-        if i == 0:
-            return self.forward
-        elif i == 1:
-            return self.flex
-        elif i == 2:
-            return self.defender
-        elif i == 3:
-            return self.goaltender
-        else:
-            raise IndexError
-
-    @property
-    def possession(self):
-        return self.defending + self.passing
-
-    @property
-    def defending(self):
-        defending = 0
-        player: Skater
-
-        for player in self:
-            if type(player) is Goaltender:
-                break
-            defending += player.defending
-        
-        return defending
-
-    @property
-    def passing(self):
-        passing = 0
-        player: Skater
-
-        for player in self:
-            passing += player.passing
-
-        return passing
-
-    @property
-    def skater_ids(self):
-        """Return set of identifiers of skaters."""
-        identifiers = set()
-        player: Skater
-
-        for player in self:
-            if type(player) is Skater:
-                identifiers.add(player.identifier)
-
-        return identifiers
-
-@dataclass
-class Lineup:
-    first: Players
-    second: Players
-    goaltender: Goaltender
-    backup: Goaltender = None
-    bias: float = 0.5
-
-    def swap_goalie(self):
-        self.goaltender, self.backup = self.backup, self.goaltender
-
-    def get_line(self):
-        if random() < self.bias:
-            forward = self.first.forward
-            flex = self.first.flex
-            defender = self.first.flex
-        else:
-            forward = self.second.forward
-            flex = self.second.flex
-            defender = self.second.defender
-
-        return Players(forward, flex, defender, self.goaltender)
-
-@dataclass(frozen=True)
-class Event:
-    time: int
-    length: int
-
-@dataclass(frozen=True)
-class Possession(Event):
-    team: int
-
-@dataclass(frozen=True)
-class Shot(Possession):
-    shooter: int
-    goaltender: int
-
-@dataclass(frozen=True)
-class Goal(Shot):
-    passer: int
-    plus: set
-    minus: set
-
-@dataclass
-class Score:
-    home: int
-    away: int
-    
-    @property
-    def tied(self):
-        return self.home == self.away
-
-    def update(self, events: List[Event]):
-        for event in events:
-            if type(event) != Goal:
-                continue
-            if event.team == 0:
-                self.home += 1
-                continue
-            self.away += 1
-
-def select_uniform_steps(values: List[int]) -> int:
-    reference = values[0]
-    key = random() * sum(values)
-
-    for i in range(len(values)):
-        if key < reference:
-            return i
-        
-        reference += values[i + 1]
-
-def simulate_play(home: Players, away: Players, time: int = 0) -> Event:
-    attacking: Players
-    defending: Players
-
-    # Decide which team has possession (chance to score).
-    if select_uniform_steps(home.possession, away.possession) == 0:
-        attacking = home
-        defending = away
-    else:
-        attacking = away
-        defending = home
-
-    team = home == defending
-
-    # Get the player passing the puck.
-    passer_index = select_uniform_steps([attacking.forward.passing, attacking.flex.passing, attacking.defender.passing, int(attacking.goaltender.passing * 0.5)])
-    passer: Player = attacking[passer_index]
-
-    # Try passing the puck.
-    if select_uniform_steps([passer.passing, defending.defending]) == 1:
-        return Possession(time, 10, team)
-
-    # Get the player shooting the puck.
-    shooter_indices = [0,1,2]
-    if passer_index in shooter_indices: shooter_indices.remove(passer_index)
-    shooters: List[Skater] = []
-    shooter_skills: List[int] = []
-    for index in shooter_indices:
-        player: Skater = attacking[index]
-        shooters.append(player)
-        shooter_skills.append(player.shooting)
-    shooter_index = select_uniform_steps(shooter_skills)
-    shooter: Skater = shooters[shooter_index]
-
-    # Player takes shot.
-    if select_uniform_steps([shooter, defending.goaltender.stopping + 300]) == 0:
-        return Goal(time, 10, team, shooter.identifier, defending.goaltender.identifier, passer.identifier, attacking.skater_ids, defending.shooting_ids)
-
-    return Shot(time, 10, team, shooter.identifier, defending.goaltender.identifier)
-
-def simulate_period(home: Lineup, away: Lineup, length: int, shift_length: int, sudden_death = False):
-    time = 0
-    events = list()
-    duration = 10
-
-    # Simulate through the period.
-    while time < length:
-        home_players = home.get_line()
-        away_players = away.get_line()
-        events.append(simulate_play(home_players, away_players, time))
-        time += duration
-
-        # Exit if goal scored in sudden death period.
-        if sudden_death and type(events[-1]) == Goal:
-            break
-
-    return events
-
-def simulate_game(home: Lineup, away:Lineup, period_length: int, num_periods: int, shift_length: int = 10, over_time = False):
-    events = {}
-    score = Score()
-
-    for period in range(num_periods):
-        events[period] = simulate_period(home, away, period_length, shift_length, over_time)
-        score.update(events[period])
-
-    while over_time and score.tied:
-        period += 1
-        events[period] = simulate_period(home, away, period_length, shift_length, True)
-        score.update(events[period])
-
-    return events, score
+"""
+Lane Missel
+
+The simulation engine for the application.
+"""
+
+
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from math import exp
+import random
+from typing import Dict, List
+import weakref
+
+from sampling import AliasTable, select, select_pair
+
+# Default game format.
+PERIOD_LENGTH = 600
+NUM_PERIODS = 3
+
+# Event type codes.
+POSSESSION = 0
+SHOT = 1
+GOAL = 2
+
+# On ice masks of a lineup's skater slots.
+FIRST_LINE = 0b000111
+SECOND_LINE = 0b111000
+
+# Cached line ratings are only refreshed when energy moves to a new bucket.
+ENERGY_BUCKET = 5
+
+class _Watched:
+    """Mixin for objects that tell their owners when they are mutated."""
+    _owners = ()
+
+    def watch(self, owner):
+        """Registers owner to be invalidated when this object changes."""
+        owners = [x for x in self._owners if x() is not None]
+        owners.append(weakref.ref(owner))
+        object.__setattr__(self, "_owners", owners)
+
+    def __getstate__(self):
+        # Owners are weak references, the unpickled owners watch again.
+        state = dict(self.__dict__)
+        state.pop("_owners", None)
+        return state
+
+    def _notify(self):
+        for reference in self._owners:
+            owner = reference()
+            if owner is not None:
+                owner.invalidate()
+
+class Player(_Watched):
+    _RATINGS = ("_passing", "_shooting", "_defending", "_stopping")
+
+    def __init__(self, identifier, energy, passing):
+        self.identifier = identifier
+        self.energy = energy
+        self._passing = passing
+
+    def __setattr__(self, name, value):
+        if name == "energy":
+            changed = self.__dict__.get("energy", value) // ENERGY_BUCKET != value // ENERGY_BUCKET
+        else:
+            changed = name in Player._RATINGS
+
+        object.__setattr__(self, name, value)
+        if changed:
+            self._notify()
+
+    @property
+    def passing(self):
+        return self._correct_for_energy(self._passing)
+
+    def _correct_for_energy(self, value):
+        return int(value / (self.energy / 100))
+
+class Skater(Player):
+    def __init__(self, identifier, passing, shooting, defending, energy = 100):
+        self.identifier = identifier
+        self._passing = passing
+        self._shooting = shooting
+        self._defending = defending
+        self.energy = energy
+
+    @property
+    def shooting(self):
+        return self._correct_for_energy(self._shooting)
+
+    @property
+    def defending(self):
+        return self._correct_for_energy(self._defending)
+
+class Goaltender(Player):
+    def __init__(self, identifier, passing, stopping, energy = 100):
+        self.identifier = identifier
+        self._passing = passing
+        self._stopping = stopping
+        self.energy = energy
+
+    @property
+    def stopping(self):
+        return self._correct_for_energy(self._stopping)
+
+@dataclass
+class GameStatistics:
+    seconds_played: int = 0
+    assists: int = 0
+
+@dataclass
+class SkaterGameStatistics(GameStatistics):
+    shots: int = 0
+    goals: int = 0
+    assists: int = 0
+    plus: int = 0
+    minus: int = 0
+
+@dataclass
+class GoaltenderGameStatistics(GameStatistics):
+    goals_against: int = 0
+    shots_against: int = 0
+
+@dataclass
+class LineRatings:
+    """Precomputed ratings of a line used by simulate_play."""
+    possession: int
+    defending: int
+    passing: List[int]
+    pass_weights: List[int]
+    shooters: List[tuple]
+    stopping: int
+    passers: AliasTable = None          # draws from pass_weights.
+    shooter_tables: List[AliasTable] = None  # draws of each passer's shooters.
+
+    @classmethod
+    def create(cls, players):
+        skaters = [players.forward, players.flex, players.defender]
+        passing = [x.passing for x in players]
+        defending = sum(x.defending for x in skaters)
+
+        # Shooters and their weights for each possible passer.
+        shooters = []
+        for passer_index in range(4):
+            options = [x for i, x in enumerate(skaters) if i != passer_index]
+            shooters.append((options, [x.shooting for x in options]))
+
+        # The line is fixed until it changes, so its draws are alias tables.
+        pass_weights = passing[:3] + [int(players.goaltender.passing * 0.5)]
+        return LineRatings(defending + sum(passing), defending, passing, pass_weights, shooters, players.goaltender.stopping,
+                           AliasTable(pass_weights), [AliasTable(weights) for _, weights in shooters])
+
+@dataclass
+class Players(_Watched):
+    forward: Skater = None
+    flex: Skater = None
+    defender: Skater = None
+    goaltender: Goaltender = None
+    mask: int = 0
+
+    _ratings = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ("forward", "flex", "defender", "goaltender"):
+            if value is not None:
+                value.watch(self)
+            self.invalidate()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_ratings", None)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def invalidate(self):
+        object.__setattr__(self, "_ratings", None)
+        self._notify()
+
+    @property
+    def ratings(self) -> LineRatings:
+        """Cached ratings, rebuilt after a player or the line changes."""
+        if self._ratings is None:
+            object.__setattr__(self, "_ratings", LineRatings.create(self))
+        return self._ratings
+
+    def __iter__(self):
+        for i in range(4):
+            yield self[i]
+
+    def __getitem__(self, i) -> Player:
+        if i == 0:
+            return self.forward
+        elif i == 1:
+            return self.flex
+        elif i == 2:
+            return self.defender
+        elif i == 3:
+            return self.goaltender
+        else:
+            raise IndexError
+
+    @property
+    def possession(self):
+        return self.ratings.possession
+
+    @property
+    def defending(self):
+        return self.ratings.defending
+
+    @property
+    def passing(self):
+        return sum(self.ratings.passing)
+
+    @property
+    def skater_ids(self):
+        """Return set of identifiers of skaters."""
+        identifiers = set()
+        player: Skater
+
+        for player in self:
+            if type(player) is Skater:
+                identifiers.add(player.identifier)
+
+        return identifiers
+
+@dataclass
+class Lineup:
+    first: Players
+    second: Players
+    goaltender: Goaltender
+    backup: Goaltender = None
+    bias: float = 0.5
+
+    _lines = None
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ("first", "second", "goaltender"):
+            if value is not None:
+                value.watch(self)
+            self.invalidate()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_lines", None)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def invalidate(self):
+        object.__setattr__(self, "_lines", None)
+
+    @classmethod
+    def from_entities(cls, lineup, players: dict):
+        """Returns an engine lineup from an entities.Lineup of player identifiers."""
+        def _skater(identifier):
+            player = players[identifier]
+            return Skater(identifier, player.passing, player.shooting, player.defending)
+
+        def _goaltender(identifier):
+            if identifier is None:
+                return None
+            player = players[identifier]
+            return Goaltender(identifier, player.passing, getattr(player, "stopping", 0))
+
+        goaltender = _goaltender(lineup.goaltender)
+        lines = []
+        for line in (lineup.first, lineup.second):
+            lines.append(Players(_skater(line.forward), _skater(line.flex), _skater(line.defender), goaltender))
+
+        return Lineup(lines[0], lines[1], goaltender, _goaltender(lineup.backup), lineup.bias)
+
+    def swap_goalie(self):
+        self.goaltender, self.backup = self.backup, self.goaltender
+
+    @property
+    def skater_ids(self) -> tuple:
+        """Identifiers of the skaters by slot, the bits of an on ice mask."""
+        return tuple(x.identifier for x in (self.first.forward, self.first.flex, self.first.defender, self.second.forward, self.second.flex, self.second.defender))
+
+    @property
+    def lines(self) -> List[Players]:
+        """The two lines as they go on the ice, built once and reused until the lineup changes."""
+        if self._lines is None:
+            lines = []
+            for line, mask in ((self.first, FIRST_LINE), (self.second, SECOND_LINE)):
+                lines.append(Players(line.forward, line.flex, line.defender, self.goaltender, mask))
+            object.__setattr__(self, "_lines", lines)
+
+        return self._lines
+
+    def get_line(self, rng = random):
+        if rng.random() < self.bias:
+            return self.lines[0]
+        return self.lines[1]
+
+@dataclass(frozen=True)
+class Event:
+    time: int
+    length: int
+
+@dataclass(frozen=True)
+class Possession(Event):
+    team: int
+
+@dataclass(frozen=True)
+class Shot(Possession):
+    shooter: int
+    goaltender: int
+
+@dataclass(frozen=True)
+class Goal(Shot):
+    passer: int
+    plus: set
+    minus: set
+
+class EventLog:
+    """
+    A game's events stored as columns of typed arrays. Storage is preallocated
+    and doubled when full. Missing players are recorded as -1.
+    """
+    COLUMNS = (("period", "h"), ("time", "i"), ("type", "b"), ("team", "b"), ("shooter", "i"), ("passer", "i"), ("goaltender", "i"), ("home_ice", "B"), ("away_ice", "B"))
+
+    def __init__(self, home_skaters: tuple = (), away_skaters: tuple = (), capacity: int = 256):
+        self.skaters = (tuple(home_skaters), tuple(away_skaters))
+        self.length = 0
+        self.capacity = capacity
+
+        for name, code in EventLog.COLUMNS:
+            setattr(self, name, array(code, bytes(capacity * array(code).itemsize)))
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self.event(i)
+
+    def _grow(self):
+        for name, code in EventLog.COLUMNS:
+            getattr(self, name).extend(array(code, bytes(self.capacity * array(code).itemsize)))
+        self.capacity *= 2
+
+    def append(self, period: int, time: int, type: int, team: int, shooter: int = -1, passer: int = -1, goaltender: int = -1, home_ice: int = 0, away_ice: int = 0):
+        if self.length == self.capacity:
+            self._grow()
+
+        i = self.length
+        self.period[i] = period
+        self.time[i] = time
+        self.type[i] = type
+        self.team[i] = team
+        self.shooter[i] = shooter
+        self.passer[i] = passer
+        self.goaltender[i] = goaltender
+        self.home_ice[i] = home_ice
+        self.away_ice[i] = away_ice
+        self.length += 1
+
+    record = append
+
+    def on_ice(self, team: int, mask: int) -> set:
+        """Returns identifiers of the team's skaters in an on ice mask."""
+        return {identifier for bit, identifier in enumerate(self.skaters[team]) if mask >> bit & 1}
+
+    def event(self, i: int) -> Event:
+        """Returns event i as an Event object."""
+        if self.type[i] == POSSESSION:
+            return Possession(self.time[i], 10, self.team[i])
+        if self.type[i] == SHOT:
+            return Shot(self.time[i], 10, self.team[i], self.shooter[i], self.goaltender[i])
+
+        masks = (self.home_ice[i], self.away_ice[i])
+        team = self.team[i]
+        return Goal(self.time[i], 10, team, self.shooter[i], self.goaltender[i], self.passer[i], self.on_ice(team, masks[team]), self.on_ice(1 - team, masks[1 - team]))
+
+    def period_events(self, period: int) -> List[Event]:
+        return [self.event(i) for i in range(self.length) if self.period[i] == period]
+
+    def indices(self, type: int, start: int = 0) -> List[int]:
+        """Returns indices of events of a type from start."""
+        return [i for i in range(start, self.length) if self.type[i] == type]
+
+    def goals(self, team: int, start: int = 0) -> int:
+        return sum(1 for i in self.indices(GOAL, start) if self.team[i] == team)
+
+    def goals_by_player(self) -> Dict[int, int]:
+        return Counter(self.shooter[i] for i in self.indices(GOAL))
+
+    def assists_by_player(self) -> Dict[int, int]:
+        return Counter(self.passer[i] for i in self.indices(GOAL))
+
+    def shots_by_player(self) -> Dict[int, int]:
+        return Counter(self.shooter[i] for i in range(self.length) if self.type[i] != POSSESSION)
+
+    def plus_minus_by_player(self) -> Dict[int, int]:
+        plus_minus = Counter()
+        for i in self.indices(GOAL):
+            masks = (self.home_ice[i], self.away_ice[i])
+            team = self.team[i]
+            for identifier in self.on_ice(team, masks[team]):
+                plus_minus[identifier] += 1
+            for identifier in self.on_ice(1 - team, masks[1 - team]):
+                plus_minus[identifier] -= 1
+        return plus_minus
+
+@dataclass
+class Score:
+    home: int = 0
+    away: int = 0
+    
+    @property
+    def tied(self):
+        return self.home == self.away
+
+    def update(self, events: EventLog, start: int = 0):
+        """Adds goals of events logged from start."""
+        self.home += events.goals(0, start)
+        self.away += events.goals(1, start)
+
+    def record(self, period: int, time: int, type: int, team: int, *args):
+        if type != GOAL:
+            return
+        if team == 0:
+            self.home += 1
+            return
+        self.away += 1
+
+class BoxScore:
+    """Running player and team totals of a game, updated as each play is recorded."""
+    def __init__(self, home: Lineup, away: Lineup):
+        self.lineups = (home, away)
+        self.skaters = (home.skater_ids, away.skater_ids)
+        self.players = {}
+        self.sides = {}
+        self.goals = [0, 0]
+        self.shots = [0, 0]
+        self.possessions = [0, 0]
+        self.goaltenders = ({}, {})
+        self.decisions = [None, None]
+
+        # Seconds and plus minus are kept per on ice mask and expanded once.
+        self._seconds = ({}, {})
+        self._plus = ({}, {})
+        self._minus = ({}, {})
+
+    def _skater(self, identifier: int, side: int) -> SkaterGameStatistics:
+        if identifier not in self.players:
+            self.players[identifier] = SkaterGameStatistics()
+            self.sides[identifier] = side
+        return self.players[identifier]
+
+    def _goaltender(self, identifier: int, side: int) -> GoaltenderGameStatistics:
+        if identifier not in self.players:
+            self.players[identifier] = GoaltenderGameStatistics()
+            self.sides[identifier] = side
+        return self.players[identifier]
+
+    def record(self, period: int, time: int, type: int, team: int, shooter: int = -1, passer: int = -1, goaltender: int = -1, home_ice: int = 0, away_ice: int = 0):
+        masks = (home_ice, away_ice)
+        for side in (0, 1):
+            seconds = self._seconds[side]
+            seconds[masks[side]] = seconds.get(masks[side], 0) + 10
+            identifier = self.lineups[side].goaltender.identifier
+            self.goaltenders[side][identifier] = self.goaltenders[side].get(identifier, 0) + 10
+
+        self.possessions[team] += 1
+        if type == POSSESSION:
+            return
+
+        self.shots[team] += 1
+        self._skater(shooter, team).shots += 1
+        self._goaltender(goaltender, 1 - team).shots_against += 1
+        if type == SHOT:
+            return
+
+        self.goals[team] += 1
+        self._skater(shooter, team).goals += 1
+        self._goaltender(goaltender, 1 - team).goals_against += 1
+        if passer == self.lineups[team].goaltender.identifier:
+            self._goaltender(passer, team).assists += 1
+        else:
+            self._skater(passer, team).assists += 1
+
+        plus = self._plus[team]
+        minus = self._minus[1 - team]
+        plus[masks[team]] = plus.get(masks[team], 0) + 1
+        minus[masks[1 - team]] = minus.get(masks[1 - team], 0) + 1
+
+    def _expand(self, totals: dict, side: int, attribute: str):
+        for mask, value in totals.items():
+            for bit, identifier in enumerate(self.skaters[side]):
+                if mask >> bit & 1:
+                    statistic = self._skater(identifier, side)
+                    setattr(statistic, attribute, getattr(statistic, attribute) + value)
+
+    def finish(self) -> dict:
+        """Returns the game statistics of every player who played, by identifier."""
+        # Goaltender of record is the one who played the most.
+        for side in (0, 1):
+            if self.goaltenders[side]:
+                self.decisions[side] = max(self.goaltenders[side], key = self.goaltenders[side].get)
+
+        for side in (0, 1):
+            self._expand(self._seconds[side], side, "seconds_played")
+            self._expand(self._plus[side], side, "plus")
+            self._expand(self._minus[side], side, "minus")
+            for identifier, seconds in self.goaltenders[side].items():
+                self._goaltender(identifier, side).seconds_played += seconds
+            self._seconds[side].clear()
+            self._plus[side].clear()
+            self._minus[side].clear()
+            self.goaltenders[side].clear()
+
+        return self.players
+
+    def team(self, side: int):
+        """Returns goals, shots and possessions of a team as (for, against) pairs."""
+        return ((self.goals[side], self.goals[1 - side]), (self.shots[side], self.shots[1 - side]), (self.possessions[side], self.possessions[1 - side]))
+
+class WinProbability:
+    """
+    Tracks the home team's chance of winning as the game is played. Remaining
+    goals are modelled as Poisson, with each team's scoring rate per play
+    shrunk towards a prior rate.
+    """
+    def __init__(self, period_length: int = PERIOD_LENGTH, num_periods: int = NUM_PERIODS, rate: float = 0.01, weight: int = 180, over_time = False):
+        self.plays = (period_length // 10) * num_periods
+        self.rate = rate
+        self.weight = weight
+        self.over_time = over_time
+        self.played = 0
+        self.goals = [0, 0]
+        self.probability = 0.5
+
+    def record(self, period: int, time: int, type: int, team: int, *args):
+        self.played += 1
+        if type == GOAL:
+            self.goals[team] += 1
+        self.probability = self._estimate()
+
+    def _estimate(self) -> float:
+        remaining = max(self.plays - self.played, 0)
+        lead = self.goals[0] - self.goals[1]
+        rates = [(goals + self.rate * self.weight) / (self.played + self.weight) for goals in self.goals]
+
+        # Distribution of remaining goals for each team.
+        home = _poisson(rates[0] * remaining)
+        away = _poisson(rates[1] * remaining)
+        win = tie = 0.0
+        for i, p_home in enumerate(home):
+            for j, p_away in enumerate(away):
+                margin = lead + i - j
+                if margin > 0:
+                    win += p_home * p_away
+                elif margin == 0:
+                    tie += p_home * p_away
+
+        # Over time is decided by the next goal.
+        if self.over_time:
+            win += tie * rates[0] / (rates[0] + rates[1])
+
+        return win
+
+def _poisson(mean: float, size: int = 20) -> List[float]:
+    probabilities = [exp(-mean)]
+    for k in range(1, size):
+        probabilities.append(probabilities[-1] * mean / k)
+    return probabilities
+
+class PlayWriter:
+    """Writes each recorded play as a comma seperated line to a file."""
+    def __init__(self, file):
+        self.file = file
+
+    def record(self, *play):
+        self.file.write(",".join(str(x) for x in play) + "\n")
+
+class Recorders:
+    """Passes each recorded play on to several recorders."""
+    def __init__(self, *recorders):
+        self.recorders = [x for x in recorders if x is not None]
+
+    def record(self, *args):
+        for recorder in self.recorders:
+            recorder.record(*args)
+
+def select_uniform_steps(values: List[int], rng = random) -> int:
+    return select(values, rng)
+
+def simulate_play(home: Players, away: Players, log: EventLog, period: int = 0, time: int = 0, rng = random) -> int:
+    """Simulates a play, records it in log (or any recorder) and returns its event type."""
+    attacking: Players
+    defending: Players
+
+    # Decide which team has possession (chance to score).
+    if select_pair(home.possession, away.possession, rng) == 0:
+        attacking = home
+        defending = away
+        team = 0
+    else:
+        attacking = away
+        defending = home
+        team = 1
+
+    ratings = attacking.ratings
+
+    # Get the player passing the puck.
+    passer_index = ratings.passers.draw(rng)
+    passer: Player = attacking[passer_index]
+
+    # Try passing the puck.
+    if select_pair(ratings.passing[passer_index], defending.ratings.defending, rng) == 1:
+        log.record(period, time, POSSESSION, team, -1, -1, -1, home.mask, away.mask)
+        return POSSESSION
+
+    # Get the player shooting the puck.
+    shooters, shooter_skills = ratings.shooters[passer_index]
+    shooter_index = ratings.shooter_tables[passer_index].draw(rng)
+    shooter: Skater = shooters[shooter_index]
+
+    # Player takes shot.
+    result = SHOT
+    if select_pair(shooter_skills[shooter_index], defending.ratings.stopping + 300, rng) == 0:
+        result = GOAL
+
+    log.record(period, time, result, team, shooter.identifier, passer.identifier, defending.goaltender.identifier, home.mask, away.mask)
+    return result
+
+def _simulate_plays(home: Lineup, away: Lineup, length: int, sudden_death, rng, log, period: int):
+    """Simulates the plays of a period, yielding the event type of each."""
+    time = 0
+    duration = 10
+
+    # Simulate through the period.
+    while time < length:
+        home_players = home.get_line(rng)
+        away_players = away.get_line(rng)
+        result = simulate_play(home_players, away_players, log, period, time, rng)
+        time += duration
+        yield result
+
+        # Exit if goal scored in sudden death period.
+        if sudden_death and result == GOAL:
+            break
+
+def simulate_period(home: Lineup, away: Lineup, length: int, shift_length: int, sudden_death = False, rng = random, log: EventLog = None, period: int = 0) -> EventLog:
+    if log is None:
+        log = EventLog(home.skater_ids, away.skater_ids)
+
+    for _ in _simulate_plays(home, away, length, sudden_death, rng, log, period):
+        pass
+
+    return log
+
+class _LastPlay:
+    """Recorder that keeps only the most recent play."""
+    play: tuple = None
+
+    def record(self, *play):
+        self.play = play
+
+def stream_game(home: Lineup, away: Lineup, period_length: int = PERIOD_LENGTH, num_periods: int = NUM_PERIODS, over_time = False, rng = random, reducers: tuple = (), batch_size: int = None):
+    """
+    Simulates a game as a generator, with memory independent of its length.
+    Yields each play as a tuple of EventLog columns, or EventLogs of up to
+    batch_size plays. Reducers (any recorder) are updated before each yield.
+    """
+    score = Score()
+    last = _LastPlay()
+    recorder = Recorders(last, score, *reducers)
+    batch = None
+    period = 0
+
+    while period < num_periods or (over_time and score.tied):
+        for _ in _simulate_plays(home, away, period_length, period >= num_periods, rng, recorder, period):
+            if batch_size is None:
+                yield last.play
+                continue
+
+            if batch is None:
+                batch = EventLog(home.skater_ids, away.skater_ids, batch_size)
+            batch.append(*last.play)
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = None
+
+        period += 1
+
+    if batch is not None:
+        yield batch
+
+def simulate_game(home: Lineup, away:Lineup, period_length: int = PERIOD_LENGTH, num_periods: int = NUM_PERIODS, shift_length: int = 10, over_time = False, rng = random, box_score: BoxScore = None):
+    """
+    Returns the log of the game's events and the final score. A box score, if
+    given, is kept up to date as each play is simulated.
+    """
+    log = EventLog(home.skater_ids, away.skater_ids, (num_periods * period_length) // 10 + 1)
+
+    for _ in stream_game(home, away, period_length, num_periods, over_time, rng, (log, box_score)):
+        pass
+
+    # Goals are in the log, so the score is counted from it once.
+    score = Score()
+    score.update(log)
+    return log, score
@@ -1,402 +1,614 @@
-"""
-Lane Missel
-
-General objects for the application.
-"""
-
-from dataclasses import dataclass, field
-from enum import Enum
-from itertools import combinations
-from random import randint
-from typing import Dict, List, Tuple
-
-class Position(Enum):
-    goaltender = 0
-    defender = 1
-    forward = 2
-
-class GameTypes(Enum):
-    regular = 0
-    postseason = 1
-    exhibition = 2
-
-@dataclass
-class Person:
-    """An object representing a person in the game."""
-    identifier: int
-    first: str
-    last: str
-    region_id: int
-    age: int
-    special: str
-
-    @property
-    def name(self):
-        return "{} {}".format(self.first, self.last)
-
-@dataclass(frozen=True)
-class Contract:
-    """An object with contract information"""
-    salary: int
-    type_id: int
-
-@dataclass
-class Record:
-    """An object for tracking team/goalie records."""
-    wins: int = 0
-    losses: int = 0
-    ties: int = 0
-
-@dataclass
-class Statistics:
-    """An object for tracking general player statistics."""
-    goals: int = 0
-    assists: int = 0
-    shots: int = 0
-    games_played: int = 0
-    seconds_played: int = 0
-    plus: int = 0
-    minus: int = 0
-
-    @property
-    def points(self):
-        return self.goals + self.assists
-
-    @property
-    def plus_minus(self):
-        return self.plus - self.minus
-
-    @classmethod
-    def randomized(self):
-        return Statistics(randint(0,30), randint(0, 30), randint(0, 90), randint(10, 30), 0, randint(0, 60), randint(0, 60))
-
-@dataclass
-class GoaltenderStatistics(Statistics):
-    """An object fro tracking goaltending statistics."""
-    goals_against: int = 0
-    shots_against: int = 0
-    record: Record = field(default_factory = Record)
-
-@dataclass(frozen=True)
-class StatisticalRecordKey:
-    """An object for indexing statistics"""
-    year: int
-    team: int = None
-    type: int = None
-
-    def has_year(self, year: int):
-        return year == self.year
-
-@dataclass
-class StatisticalRecords:
-    """An object for managing statistics objects."""
-    records: dict = field(default_factory=dict)
-
-    @property
-    def keys(self):
-        return set(self.records.keys())
-
-    @property
-    def active_years(self):
-        years = set()
-        for key in self.keys:
-            years.add(key.year)
-        return years
-
-    def add_record(self, key: StatisticalRecordKey, stat: Statistics):
-        assert key not in self.keys, "Record Clash"
-        assert type(stat) is Statistics, "stat isn't child of Statistics."
-
-        self.records[key] = stat
-
-    def get_record(self, key: StatisticalRecordKey):
-        # Check that record exists.
-        if key in self.keys:
-            return self.records[key]
-
-        # Record not found.
-        return None
-
-    def replace_record(self, key: StatisticalRecordKey, stat: Statistics):
-        assert key in self.keys, "Key not found"
-        self.records[key] = stat
-
-    def add_to_record(self, key: StatisticalRecordKey, stat: Statistics):
-        """Return sTrue if the record already exists and a sum has been taken, else False."""
-        if key in self.keys:
-            self.records[key] += stat
-            return True
-
-        self.add_record(key, stat)
-        return False
-
-    def get_record_by_year(self, year: int, seperate_by_team = False) -> dict:
-        keys = []
-
-        # get keys with specified year.
-        for key in self.keys:
-            if key.has_year(year):
-                keys.append(key)
-
-        # No record
-        if len(keys) == 0:
-            return Statistics()
-
-        # On eteam
-        if len(keys) == 1:
-            return self.records[keys[0]]
-
-        # multiple records:
-        if seperate_by_team:
-            records = {}
-            for key in keys:
-                team = key.year
-
-                if team in records.keys():
-                    records[team] += self.get_record(key)
-                    continue
-
-                records[team] = self.get_record(key)
-            return records
-
-        # Amalgamate statistics:
-        stats = Statistics()
-        for key in keys:
-            stats += self.get_record(key)
-        return stats            
-
-@dataclass
-class ForAgainst:
-    _for: int = 0
-    _againts: int = 0
-
-@dataclass
-class TeamStatistics:
-    """An object for tracking a teams statistics."""
-    record: Record = field(default_factory = Record)
-    goals: ForAgainst = field(default_factory = ForAgainst)
-    shots: ForAgainst = field(default_factory = ForAgainst)
-    possession: ForAgainst = field(default_factory = ForAgainst)
-    games: int = 0
-
-    @property
-    def wins(self):
-        return self.record.wins
-
-    @property
-    def losses(self):
-        return self.record.losses
-
-    @property
-    def ties(self):
-        return self.record.ties
-
-    def points(self, per_win, per_tie):
-        return per_win * self.wins + per_tie * self.ties
-
-@dataclass
-class Player(Person):
-    """A player in the game."""
-    position_id: int
-    potential: int
-    longevity: int
-    fitness: int
-    passing: int
-    contracts: Dict[int, Contract]
-    statistics: StatisticalRecords = field(default_factory = StatisticalRecords)
-    rights: dict = field(default_factory = dict)
-
-    def get_statistics(self, year=None, team=None):
-        # get lastest year.
-        if year == None and len(self.statistics.keys) > 0:
-            year = max(self.statistics.active_years)
-
-        # check if year has a statistic
-        if year not in self.statistics.active_years:
-            return Statistics()
-
-        # return statistic of year.
-        return self.statistics.get_record_by_year(year)
-
-    @property
-    def active_years(self) -> list:
-        return sorted(self.statistics.active_years)
-
-    def get_condition(self) -> str:
-        """Return string description of a players condition."""
-        if self.fitness >= 90:
-            return "A"
-        if self.fitness >= 80:
-            return "B"
-        if self.fitness >= 70:
-            return "C"
-        if self.fitness >= 60:
-            return "D"
-        return "F"
-
-@dataclass
-class Skater(Player):
-    """A player that plays out."""
-    shooting: int = 0
-    defending: int = 0
-
-    def _calculate_grade(self, val1, val2):
-        total = val1 + val2
-        if total > 160:
-            return 'A'
-        if total > 120:
-            return 'B'
-        if total > 100:
-            return 'C'
-        if total > 80:
-            return 'D'
-        return 'F'
-
-    @property
-    def overall(self):
-        return int((self.shooting + self.passing + self.defending) / 3)
-
-    @property
-    def offensive_grade(self) -> str:
-        return self._calculate_grade(self.shooting, self.passing)
-
-    @property
-    def defensive_grade(self) -> str:
-        return self._calculate_grade(self.passing, self.defending)
-
-@dataclass
-class Goaltender(Player):
-    """A goaltender."""
-    stopping: int = 0
-
-    @property
-    def overall(self):
-        return int(self.stopping * 0.8 + self.passing * 0.2)
-
-@dataclass
-class Spending:
-    """An object for tracking team spending."""
-    start: int
-    income: int
-    expenses: int
-    
-    @property
-    def balance(self):
-        return self.start + self.income - self.expenses
-
-@dataclass
-class Roster:
-    """A teams roster."""
-    active: set
-    reserves: set
- 
-    def __len__(self):
-        return len(self.active)
-
-    def add_player_by_id(self, id: int) -> bool:
-        if id in self.active or self.reserves:
-            return False
-        
-        self.active.add(id)
-        return True
-
-    def add_player_by_object(self, player: Player) -> bool:
-        return self.add_player_by_id(player.identifier)
-
-    def get_active(self):
-        return set(self.active)
-
-    def get_reserves(self):
-        return set(self.reserves)
-
-    def set_roster(self, interable):
-        for identifier in interable:
-            self.reserves.add(identifier)
-
-@dataclass
-class Line:
-    forward: int = None
-    flex: int = None
-    defender: int = None
-
-@dataclass
-class Lineup:
-    first: Line = field(default_factory = Line)
-    second: Line = field(default_factory = Line)
-    goaltender: int = None
-    backup: int = None
-    bias: float = 0.5
-
-@dataclass
-class Organization:
-    identifier: int
-    name: str
-    location: str
-    abbreviation: str
-    colors: str
-    roster: Roster
-    statistics: Dict[int, TeamStatistics] = field(default_factory=dict)
-    spending: Dict[int, Spending] = field(default_factory=dict)
-    lineup: Lineup = field(default_factory = Lineup)
-
-    @property
-    def players(self) -> list:
-        """
-        Returns id of all players owned by organizations.
-        """
-        return set.union(self.roster.get_reserves(), self.roster.get_active())
-
-    @property
-    def active(self):
-        return self.roster.get_active()
-
-    def set_roster(self, iterator):
-        self.roster.set_roster(iterator)
-
-@dataclass
-class Game:
-    home: int
-    away: int
-    score: List[int] = field(default_factory=list([0,0]))
-
-@dataclass
-class Schedule:
-    preseason: List[Game] = field(default_factory=list)
-    regular: List[Game] = field(default_factory=list)
-    playoff: List[Game] = field(default_factory=list)
-
-@dataclass
-class League:
-    identifier: int
-    name: int
-    abreviation: int
-    teams: List[int]
-    games: Dict[int, Schedule]
-
-    def get_teams(self, teams: Dict[int, Organization]):
-        to_return = []
-        for team_id in self.teams:
-            to_return.append(teams.get(team_id))
-
-        return to_return
-
-    def keys(self):
-        return self.teams
-
-    def create_schedule(self, size: int, year: int):
-        simple = list(combinations(self.teams, 2)).shuffle()
-        schedule = []
-        
-        # Ensure each team plays on seperate weeks.
-        for i in len(simple) / 2:
-            combo1 = simple[i*2]
-            combo2 = simple[i*2 + 1]
-            if combo1[0] in combo2 or combo1[1] in combo2:
-                # swap
-                pass
-
-
-if __name__ == '__main__':
-    league = League(0, "League", "LG", [1, 2, 3, 4], {})
-    print(league.create_schedule(1, 2022))
+"""
+Lane Missel
+
+General objects for the application.
+"""
+
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from itertools import combinations
+import random
+from typing import Dict, List, Tuple
+
+class Tracked:
+    """
+    Mixin for objects that remember being changed since they were last saved.
+    Snapshots sharing the object are told before it changes, so a change made
+    inside one of its attributes must come after touch().
+    """
+    __slots__ = ("dirty",)
+    watchers = []   # Weak references to snapshots told before any tracked object changes.
+
+    def __setattr__(self, name, value):
+        if name != "dirty":
+            if Tracked.watchers:
+                self._changing()
+            object.__setattr__(self, name, value)
+            object.__setattr__(self, "dirty", True)
+        else:
+            object.__setattr__(self, name, value)
+
+    def _changing(self):
+        for watcher in tuple(Tracked.watchers):
+            snapshot = watcher()
+            if snapshot is not None:
+                snapshot.changing(self)
+
+    def touch(self):
+        """Marks a change about to be made inside one of the object's attributes."""
+        if Tracked.watchers:
+            self._changing()
+        self.dirty = True
+
+    def clean(self):
+        self.dirty = False
+
+class Position(Enum):
+    goaltender = 0
+    defender = 1
+    forward = 2
+
+class GameTypes(Enum):
+    regular = 0
+    postseason = 1
+    exhibition = 2
+
+@dataclass(slots=True)
+class Person(Tracked):
+    """An object representing a person in the game."""
+    identifier: int
+    first: str
+    last: str
+    region_id: int
+    age: int
+    special: str
+
+    @property
+    def name(self):
+        return "{} {}".format(self.first, self.last)
+
+@dataclass(frozen=True, slots=True)
+class Contract:
+    """An object with contract information"""
+    salary: int
+    type_id: int
+
+@dataclass
+class Record:
+    """An object for tracking team/goalie records."""
+    wins: int = 0
+    losses: int = 0
+    ties: int = 0
+
+    def __add__(self, other):
+        return Record(self.wins + other.wins, self.losses + other.losses, self.ties + other.ties)
+
+@dataclass(slots=True)
+class Statistics:
+    """An object for tracking general player statistics."""
+    goals: int = 0
+    assists: int = 0
+    shots: int = 0
+    games_played: int = 0
+    seconds_played: int = 0
+    plus: int = 0
+    minus: int = 0
+
+    def __add__(self, other):
+        """Returns the sum of two statistics, keeping the fields of the most specific."""
+        result, smaller = (other, self) if isinstance(other, type(self)) else (self, other)
+        values = {}
+        for item in fields(result):
+            value = getattr(result, item.name)
+            if hasattr(smaller, item.name):
+                value = value + getattr(smaller, item.name)
+            values[item.name] = value
+        return type(result)(**values)
+
+    @property
+    def points(self):
+        return self.goals + self.assists
+
+    @property
+    def plus_minus(self):
+        return self.plus - self.minus
+
+    @classmethod
+    def randomized(self, rng = random):
+        return Statistics(rng.randint(0,30), rng.randint(0, 30), rng.randint(0, 90), rng.randint(10, 30), 0, rng.randint(0, 60), rng.randint(0, 60))
+
+@dataclass(slots=True)
+class GoaltenderStatistics(Statistics):
+    """An object fro tracking goaltending statistics."""
+    goals_against: int = 0
+    shots_against: int = 0
+    record: Record = field(default_factory = Record)
+
+_KEYS = {}
+
+@dataclass(frozen=True, slots=True)
+class StatisticalRecordKey:
+    """An object for indexing statistics, equal keys are the same interned object."""
+    year: int
+    team: int = None
+    type: int = None
+
+    def __new__(cls, year: int, team: int = None, type: int = None):
+        key = _KEYS.get((year, team, type))
+        if key is None:
+            key = _KEYS[(year, team, type)] = object.__new__(cls)
+        return key
+
+    def __reduce__(self):
+        return (StatisticalRecordKey, (self.year, self.team, self.type))
+
+    def has_year(self, year: int):
+        return year == self.year
+
+@dataclass(slots=True)
+class StatisticalRecords:
+    """
+    An object for managing statistics objects. Records are indexed by year the
+    first time a year is asked for, then as they are added. Totals of a year,
+    (year, team) or career are summed the first time they are asked for, then
+    kept up to date. A year or team with a single record returns that record,
+    so only totals of several are kept.
+    """
+    records: dict = field(default_factory=dict)
+    _index: tuple = field(default=None, init=False, repr=False, compare=False)    # (year -> key or [key], totals by year, (year, team) or None for the career)
+    _changed: object = field(default=None, init=False, repr=False, compare=False)    # Keys changed since cleaned, () for none, None if never cleaned.
+
+    def _load(self, year: int):
+        """Makes sure records of year are present, for subclasses that load them late."""
+        pass
+
+    def _load_all(self):
+        pass
+
+    def _indexed(self) -> tuple:
+        """Returns keys by year and cached totals, indexing every record the first time."""
+        if self._index is None:
+            self._index = ({}, {})
+            for key in self.records:
+                self._add_key(key)
+        return self._index
+
+    def _add_key(self, key: StatisticalRecordKey):
+        years = self._index[0]
+        keys = years.get(key.year)
+        if keys is None:
+            years[key.year] = key
+        elif type(keys) is list:
+            keys.append(key)
+        else:
+            years[key.year] = [keys, key]
+
+    def _keys(self, year: int) -> list:
+        keys = self._indexed()[0].get(year)
+        if keys is None:
+            return []
+        return keys if type(keys) is list else [keys]
+
+    def _total(self, total, keys) -> Statistics:
+        """Returns the cached total of keys' records, summing them the first time."""
+        totals = self._indexed()[1]
+        value = totals.get(total)
+        if value is None:
+            value = totals[total] = sum((self.records[x] for x in keys), Statistics())
+        return value
+
+    def _add_totals(self, key: StatisticalRecordKey, stat: Statistics):
+        totals = self._index[1]
+        for total in (key.year, (key.year, key.team), None):
+            current = totals.get(total)
+            if current is not None:
+                totals[total] = current + stat
+
+    def _drop_totals(self, key: StatisticalRecordKey):
+        totals = self._index[1]
+        for total in (key.year, (key.year, key.team), None):
+            totals.pop(total, None)
+
+    def _mark(self, key: StatisticalRecordKey):
+        if self._changed == ():
+            self._changed = {key}
+        elif self._changed is not None:
+            self._changed.add(key)
+
+    @property
+    def changed(self):
+        """Returns keys of records changed since last cleaned, or None if every record is."""
+        return self._changed
+
+    def clean(self):
+        self._changed = ()
+
+    def update(self, other: "StatisticalRecords"):
+        """Sets every record of other, replacing the records with the same key."""
+        for key in list(other.keys):
+            if self.get_record(key) is None:
+                self.add_record(key, other.records[key])
+            else:
+                self.replace_record(key, other.records[key])
+
+    @property
+    def keys(self):
+        return self.records.keys()
+
+    @property
+    def active_years(self):
+        return self._indexed()[0].keys()
+
+    @property
+    def latest_year(self):
+        """Returns the latest year with a record, or None."""
+        return max(self.active_years, default = None)
+
+    @property
+    def career(self) -> Statistics:
+        """Returns the total of every record."""
+        self._load_all()
+        return self._total(None, self.records)
+
+    def add_record(self, key: StatisticalRecordKey, stat: Statistics):
+        self._load(key.year)
+        assert key not in self.records, "Record Clash"
+        assert isinstance(stat, Statistics), "stat isn't child of Statistics."
+
+        self.records[key] = stat
+        self._mark(key)
+        if self._index is not None:
+            self._add_key(key)
+            self._add_totals(key, stat)
+
+    def get_record(self, key: StatisticalRecordKey):
+        self._load(key.year)
+
+        # None if record not found.
+        return self.records.get(key)
+
+    def replace_record(self, key: StatisticalRecordKey, stat: Statistics):
+        self._load(key.year)
+        assert key in self.records, "Key not found"
+        self.records[key] = stat
+        self._mark(key)
+        if self._index is not None:
+            self._drop_totals(key)
+
+    def add_to_record(self, key: StatisticalRecordKey, stat: Statistics):
+        """Return sTrue if the record already exists and a sum has been taken, else False."""
+        self._load(key.year)
+        if key in self.records:
+            self.records[key] += stat
+            self._mark(key)
+            if self._index is not None:
+                self._add_totals(key, stat)
+            return True
+
+        self.add_record(key, stat)
+        return False
+
+    def keys_by_year(self, year: int) -> list:
+        """Returns keys of records in the specified year."""
+        self._load(year)
+        return list(self._keys(year))
+
+    def get_record_by_team(self, year: int, team: int) -> Statistics:
+        """Returns the total of a year's records with a team."""
+        self._load(year)
+        keys = [x for x in self._keys(year) if x.team == team]
+        if len(keys) == 0:
+            return Statistics()
+        if len(keys) == 1:
+            return self.records[keys[0]]
+        return self._total((year, team), keys)
+
+    def get_record_by_year(self, year: int, seperate_by_team = False) -> dict:
+        self._load(year)
+        keys = self._keys(year)
+
+        # No record
+        if len(keys) == 0:
+            return Statistics()
+
+        # On eteam
+        if len(keys) == 1:
+            return self.records[keys[0]]
+
+        # multiple records:
+        if seperate_by_team:
+            return {key.team: self.get_record_by_team(year, key.team) for key in keys}
+
+        # Amalgamate statistics:
+        return self._total(year, keys)
+
+@dataclass
+class ForAgainst:
+    _for: int = 0
+    _againts: int = 0
+
+@dataclass
+class TeamStatistics:
+    """An object for tracking a teams statistics."""
+    record: Record = field(default_factory = Record)
+    goals: ForAgainst = field(default_factory = ForAgainst)
+    shots: ForAgainst = field(default_factory = ForAgainst)
+    possession: ForAgainst = field(default_factory = ForAgainst)
+    games: int = 0
+
+    @property
+    def wins(self):
+        return self.record.wins
+
+    @property
+    def losses(self):
+        return self.record.losses
+
+    @property
+    def ties(self):
+        return self.record.ties
+
+    def points(self, per_win, per_tie):
+        return per_win * self.wins + per_tie * self.ties
+
+@dataclass(slots=True)
+class Player(Person):
+    """A player in the game."""
+    position_id: int
+    potential: int
+    longevity: int
+    fitness: int
+    passing: int
+    contracts: Dict[int, Contract]
+    statistics: StatisticalRecords = field(default_factory = StatisticalRecords)
+    rights: dict = field(default_factory = dict)
+
+    def get_statistics(self, year=None, team=None):
+        # get lastest year.
+        if year == None:
+            year = self.statistics.latest_year
+
+        # check if year has a statistic
+        if year not in self.statistics.active_years:
+            return Statistics()
+
+        # return statistic of year.
+        return self.statistics.get_record_by_year(year)
+
+    @property
+    def active_years(self) -> list:
+        return sorted(self.statistics.active_years)
+
+    def clean(self):
+        self.dirty = False
+        self.statistics.clean()
+
+    def get_condition(self) -> str:
+        """Return string description of a players condition."""
+        if self.fitness >= 90:
+            return "A"
+        if self.fitness >= 80:
+            return "B"
+        if self.fitness >= 70:
+            return "C"
+        if self.fitness >= 60:
+            return "D"
+        return "F"
+
+@dataclass(slots=True)
+class Skater(Player):
+    """A player that plays out."""
+    shooting: int = 0
+    defending: int = 0
+
+    def _calculate_grade(self, val1, val2):
+        total = val1 + val2
+        if total > 160:
+            return 'A'
+        if total > 120:
+            return 'B'
+        if total > 100:
+            return 'C'
+        if total > 80:
+            return 'D'
+        return 'F'
+
+    @property
+    def overall(self):
+        return int((self.shooting + self.passing + self.defending) / 3)
+
+    @property
+    def offensive_grade(self) -> str:
+        return self._calculate_grade(self.shooting, self.passing)
+
+    @property
+    def defensive_grade(self) -> str:
+        return self._calculate_grade(self.passing, self.defending)
+
+@dataclass(slots=True)
+class Goaltender(Player):
+    """A goaltender."""
+    stopping: int = 0
+
+    @property
+    def overall(self):
+        return int(self.stopping * 0.8 + self.passing * 0.2)
+
+@dataclass
+class Spending:
+    """An object for tracking team spending."""
+    start: int
+    income: int
+    expenses: int
+    
+    @property
+    def balance(self):
+        return self.start + self.income - self.expenses
+
+@dataclass
+class Roster:
+    """A teams roster."""
+    active: set
+    reserves: set
+ 
+    def __len__(self):
+        return len(self.active)
+
+    def add_player_by_id(self, id: int) -> bool:
+        if id in self.active or self.reserves:
+            return False
+        
+        self.active.add(id)
+        return True
+
+    def add_player_by_object(self, player: Player) -> bool:
+        return self.add_player_by_id(player.identifier)
+
+    def get_active(self):
+        return set(self.active)
+
+    def get_reserves(self):
+        return set(self.reserves)
+
+    def set_roster(self, interable):
+        for identifier in interable:
+            self.reserves.add(identifier)
+
+@dataclass
+class Line:
+    forward: int = None
+    flex: int = None
+    defender: int = None
+
+@dataclass
+class Lineup:
+    first: Line = field(default_factory = Line)
+    second: Line = field(default_factory = Line)
+    goaltender: int = None
+    backup: int = None
+    bias: float = 0.5
+
+@dataclass
+class Organization(Tracked):
+    identifier: int
+    name: str
+    location: str
+    abbreviation: str
+    colors: str
+    roster: Roster
+    statistics: Dict[int, TeamStatistics] = field(default_factory=dict)
+    spending: Dict[int, Spending] = field(default_factory=dict)
+    lineup: Lineup = field(default_factory = Lineup)
+    changed_years: object = field(default = None, init = False, repr = False, compare = False)    # Years of statistics changed since cleaned, () for none, None if never cleaned.
+
+    @property
+    def players(self) -> list:
+        """
+        Returns id of all players owned by organizations.
+        """
+        return set.union(self.roster.get_reserves(), self.roster.get_active())
+
+    @property
+    def active(self):
+        return self.roster.get_active()
+
+    def set_roster(self, iterator):
+        self.touch()
+        self.roster.set_roster(iterator)
+
+    def change_statistics(self, year: int) -> TeamStatistics:
+        """Touches the organization and returns its statistics of year to be changed, adding them if missing."""
+        self.touch()
+        if self.statistics is None:
+            self.statistics = {}
+        if year not in self.statistics:
+            self.statistics[year] = TeamStatistics()
+
+        # Kept past Tracked.__setattr__, it's part of being changed.
+        if self.changed_years == ():
+            object.__setattr__(self, "changed_years", {year})
+        elif self.changed_years is not None:
+            self.changed_years.add(year)
+        return self.statistics[year]
+
+    def clean(self):
+        self.dirty = False
+        object.__setattr__(self, "changed_years", ())
+
+@dataclass
+class Game(Tracked):
+    home: int
+    away: int
+    score: List[int] = field(default_factory=lambda: [0, 0])
+    week: int = 0
+    played: bool = False
+
+@dataclass
+class Schedule:
+    preseason: List[Game] = field(default_factory=list)
+    regular: List[Game] = field(default_factory=list)
+    playoff: List[Game] = field(default_factory=list)
+
+@dataclass
+class League(Tracked):
+    identifier: int
+    name: int
+    abreviation: int
+    teams: List[int]
+    games: Dict[int, Schedule]
+
+    def get_teams(self, teams: Dict[int, Organization]):
+        to_return = []
+        for team_id in self.teams:
+            to_return.append(teams.get(team_id))
+
+        return to_return
+
+    def keys(self):
+        return self.teams
+
+    @property
+    def changed(self) -> bool:
+        """Returns True if the league or any of its games changed since last saved."""
+        if self.dirty:
+            return True
+        return any(game.dirty for schedule in self.games.values() for games in (schedule.preseason, schedule.regular, schedule.playoff) for game in games)
+
+    def clean(self):
+        self.dirty = False
+        for schedule in self.games.values():
+            for game in schedule.preseason + schedule.regular + schedule.playoff:
+                game.clean()
+
+    def create_schedule(self, size: int, year: int, rng = random) -> Schedule:
+        """Returns a round robin schedule where each pair of teams meets size times."""
+        teams = list(self.teams)
+        rng.shuffle(teams)
+
+        # Odd number of teams, one team sits out each week.
+        if len(teams) % 2 == 1:
+            teams.append(None)
+
+        schedule = Schedule()
+        week = 0
+
+        # Ensure each team plays on seperate weeks (circle method).
+        for meeting in range(size):
+            order = list(teams)
+            for _ in range(len(order) - 1):
+                for i in range(len(order) // 2):
+                    home, away = order[i], order[-1 - i]
+                    if meeting % 2 == 1:
+                        home, away = away, home
+                    if home is not None and away is not None:
+                        schedule.regular.append(Game(home, away, week=week))
+
+                order.insert(1, order.pop())
+                week += 1
+
+        return schedule
+
+if __name__ == '__main__':
+    league = League(0, "League", "LG", [1, 2, 3, 4], {})
+    print(league.create_schedule(1, 2022))
     
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Lane Missel
+
+Synthetic worlds of any size. Names are drawn by offset from names.dat without
+replacement, regions, positions and attributes are drawn in batches and aged
+as columns, then players are built in bulk or written straight into a player
+table, so worlds of a million players take seconds.
+
+    python generator.py [--leagues 4] [--teams 8] [--players 100000] [--table FILE] [--output FILE]
+"""
+
+import argparse
+import gc
+import time
+from dataclasses import fields
+
+import numpy as np
+
+from aging import TABLE_DTYPE, age_columns, numpy_generator
+from data import Data
+from draft import SLOTS
+from entities import *
+from handler import NameIndex, Organizations, Other, Regions
+from playertable import PlayerTable, HEADER, ROW, MAGIC, VERSION, GOALTENDER
+
+NAMES = "data/names.dat"
+REGIONS = "data/regions.csv"
+POSITIONS = [2, 3, 5]           # Relative weights of goaltenders, defenders and forwards.
+COHORTS = 24                    # Players start at 16 and age 1 to COHORTS years.
+GAMES_PER_TEAM = 2
+
+def sample_names(index: NameIndex, amount: int, generator: np.random.Generator) -> np.ndarray:
+    """
+    Returns amount line numbers of index drawn without replacement. Past the
+    number of names a new pass starts, so names only repeat in large worlds.
+    """
+    passes = [generator.permutation(len(index)) for _ in range(-(-amount // len(index)))]
+    return np.concatenate(passes)[:amount]
+
+def generate_rows(count: int, names: NameIndex, regions: Regions, generator: np.random.Generator, start: int = 1, cohorts: int = COHORTS) -> np.ndarray:
+    """Returns count players as player table rows, with identifiers from start, aged 1 to cohorts years past 16."""
+    rows = np.zeros(count, TABLE_DTYPE)
+    rows["identifier"] = np.arange(start, start + count)
+    rows["fitness"] = 100
+
+    keys = sorted(regions.keys)
+    weights = np.array([regions.regions[x][2] for x in keys], dtype = np.float64)
+    rows["region_id"] = np.array(keys)[generator.choice(len(keys), count, p = weights / weights.sum())]
+    rows["position_id"] = generator.choice(len(POSITIONS), count, p = np.array(POSITIONS) / sum(POSITIONS))
+    goaltender = rows["position_id"] == 0
+    rows["flags"] = np.where(goaltender, GOALTENDER, 0)
+
+    columns = {
+        "age": np.full(count, 16, np.int64),
+        "potential": generator.integers(1, 4, count),
+        "longevity": generator.integers(1, 4, count),
+        "passing": generator.integers(10, 51, count),
+        "shooting": np.where(goaltender, 0, generator.integers(10, 51, count)),
+        "defending": np.where(goaltender, 0, generator.integers(10, 51, count)),
+        "stopping": np.where(goaltender, generator.integers(20, 51, count), 0),
+    }
+
+    # Each cohort ages once for every cohort created after it.
+    years = generator.integers(1, cohorts + 1, count)
+    for year in range(cohorts):
+        aging = np.flatnonzero(years > year)
+        cohort = {name: values[aging] for name, values in columns.items()}
+        age_columns(cohort, goaltender[aging], generator)
+        for name, values in cohort.items():
+            columns[name][aging] = values
+
+    for name, values in columns.items():
+        rows[name] = values
+
+    # Only names drawn are read and split.
+    lines = sample_names(names, count, generator)
+    used, inverse = np.unique(lines, return_inverse = True)
+    split = [(names[x].split() + ["", ""])[:2] for x in used.tolist()]
+    rows["first"] = np.array([x[0].encode() for x in split], dtype = "S32")[inverse]
+    rows["last"] = np.array([x[1].encode() for x in split], dtype = "S32")[inverse]
+    return rows
+
+def build_players(rows: np.ndarray) -> dict:
+    """Returns players by identifier from player table rows."""
+    columns = {name: rows[name].tolist() for name in rows.dtype.names}
+    columns["first"] = [x.decode() for x in columns["first"]]
+    columns["last"] = [x.decode() for x in columns["last"]]
+    columns["special"] = [""] * len(rows)
+    goaltender = (rows["flags"] & GOALTENDER) != 0
+    factories = {"contracts": dict, "statistics": StatisticalRecords, "rights": dict}
+
+    # Nothing built can be garbage yet, collections would only rescan it.
+    gc.disable()
+    try:
+        players = _build(columns, goaltender, factories)
+    finally:
+        gc.enable()
+    return dict(sorted(players.items()))
+
+def _build(columns: dict, goaltender: np.ndarray, factories: dict) -> dict:
+    players = {}
+    for cls, selected in ((Goaltender, goaltender), (Skater, ~goaltender)):
+        selected = np.flatnonzero(selected).tolist()
+        names = [x.name for x in fields(cls) if x.name not in factories]
+        setters = [getattr(cls, x).__set__ for x in names]
+        made = [(getattr(cls, x).__set__, factory) for x, factory in factories.items()]
+        dirty = cls.dirty.__set__
+
+        # Slots are set directly, past Tracked.__setattr__ marking every one.
+        for values in zip(*([columns[x][i] for i in selected] for x in names)):
+            player = object.__new__(cls)
+            for setter, value in zip(setters, values):
+                setter(player, value)
+            for setter, factory in made:
+                setter(player, factory())
+            dirty(player, True)
+            players[values[0]] = player
+    return players
+
+def write_table(path: str, rows: np.ndarray) -> PlayerTable:
+    """Returns a new player table at path holding rows, which must be in identifier order."""
+    with open(path, "wb") as tablefile:
+        tablefile.write(HEADER.pack(MAGIC, VERSION, ROW.size, len(rows), 0, 0))
+        tablefile.write(rows.tobytes())
+    return PlayerTable(path)
+
+def generate_rosters(organizations: Organizations, rows: np.ndarray):
+    """Fills each organization's roster with the first players of each position not yet signed."""
+    by_position = {position: rows["identifier"][rows["position_id"] == position].tolist() for position in SLOTS}
+    for i, organization in enumerate(organizations.organizations.values()):
+        roster = []
+        for position, size in SLOTS.items():
+            roster += by_position[position][i * size:(i + 1) * size]
+        organization.set_roster(roster)
+
+def generate_world(leagues: int = 4, teams: int = 8, players: int = 100000, seed = None, table: str = None, names: str = NAMES, regions: str = REGIONS) -> Data:
+    """
+    Returns a world of leagues, each with teams organizations, and players. With
+    table the players are written to a player table at that path.
+    """
+    generator = numpy_generator(seed)
+    rows = generate_rows(players, NameIndex(names), Regions.load_from_csv(regions), generator)
+
+    organizations = {}
+    world_leagues = {}
+    for league in range(1, leagues + 1):
+        identifiers = list(range((league - 1) * teams + 1, league * teams + 1))
+        for identifier in identifiers:
+            organizations[identifier] = Organization(identifier, "Team {}".format(identifier), "City {}".format(identifier), "T{:02}".format(identifier % 100), "", Roster(set(), set()))
+        world_leagues[league] = League(league, "League {}".format(league), "L{}".format(league), identifiers, {})
+
+    organizations = Organizations(organizations)
+    generate_rosters(organizations, rows)
+
+    other = Other.new()
+    other.other['games_per_team'] = {league: GAMES_PER_TEAM for league in world_leagues}
+
+    return Data(write_table(table, rows) if table else build_players(rows), organizations, world_leagues, other)
+
+def main(arguments = None):
+    parser = argparse.ArgumentParser(description = "Generate a synthetic world.")
+    parser.add_argument("--leagues", type = int, default = 4, help = "number of leagues")
+    parser.add_argument("--teams", type = int, default = 8, help = "teams in each league")
+    parser.add_argument("--players", type = int, default = 100000, help = "number of players")
+    parser.add_argument("--seed", type = int, default = None, help = "seed of the world")
+    parser.add_argument("--table", help = "write players to a player table at this path")
+    parser.add_argument("--output", help = "write the world to this save file")
+    options = parser.parse_args(arguments)
+
+    start = time.perf_counter()
+    world = generate_world(options.leagues, options.teams, options.players, options.seed, options.table)
+    print("Generated {:,} players in {:.2f}s".format(len(world.players), time.perf_counter() - start))
+
+    if options.output:
+        start = time.perf_counter()
+        world.save_to_file(options.output)
+        print("Saved to {} in {:.2f}s".format(options.output, time.perf_counter() - start))
+
+if __name__ == '__main__':
+    main()
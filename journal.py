@@ -0,0 +1,156 @@
+"""
+Lane Missel
+
+Append-only save journal. A binary save is the base snapshot, and each save
+after it appends only the entities that changed to a journal beside it. Loading
+replays the journal over the base, and compaction folds it back into the base.
+
+An entry is a header (magic, payload length, crc32, generation) followed by a
+packed save holding the changed entities, with only their changed records,
+team statistics and schedules. A torn or corrupt entry at the end of the
+journal is ignored, so a crash while appending never loses the previous state.
+
+Each base is stamped with a new generation, and entries with the generation of
+the base they follow. A crash after a base is replaced but before its journal
+is cleared leaves entries of an older generation, which are never replayed.
+"""
+
+import os
+import struct
+import zlib
+
+import savefile
+
+MAGIC = b"THMG"
+HEADER = struct.Struct("<4sIIQ")
+
+# Entries from before generations, replayed only over a base without one.
+LEGACY_MAGIC = b"THMJ"
+LEGACY_HEADER = struct.Struct("<4sII")
+
+# Compact once the journal is larger than this fraction of the base.
+COMPACT_RATIO = 0.5
+
+def new_generation() -> int:
+    """Returns a generation for a new base, unlike any before it."""
+    return int.from_bytes(os.urandom(8), "little") >> 1 or 1
+
+class Journal:
+    """The journal of changes to a binary save."""
+    def __init__(self, path: str, generation: int = None):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.entries = 0
+        self.end = 0    # Offset after the last valid entry.
+        self.generation = generation    # Of the base, read from it if None. 0 if the base has none.
+
+    @property
+    def size(self) -> int:
+        return self.end
+
+    def read(self) -> list:
+        """Returns the decoded tables of every valid entry of the base's generation, in order."""
+        self.entries = 0
+        self.end = 0
+        self.generation = savefile.read_generation(self.path) or 0
+        if not os.path.exists(self.journal_path):
+            return []
+
+        with open(self.journal_path, "rb") as journal:
+            raw = memoryview(journal.read())
+
+        entries = []
+        position = 0
+        while position + LEGACY_HEADER.size <= len(raw):
+            if bytes(raw[position:position + 4]) == LEGACY_MAGIC:
+                header = LEGACY_HEADER
+                magic, length, checksum = header.unpack_from(raw, position)
+                generation = 0
+            elif position + HEADER.size <= len(raw):
+                header = HEADER
+                magic, length, checksum, generation = header.unpack_from(raw, position)
+            else:
+                break
+
+            # Entries after a crash between replacing the base and clearing the journal are stale.
+            payload = raw[position + header.size:position + header.size + length]
+            if magic not in (MAGIC, LEGACY_MAGIC) or len(payload) != length or zlib.crc32(payload) != checksum or generation != self.generation:
+                break
+
+            entries.append(savefile.read_sections(payload))
+            position += header.size + length
+            self.entries += 1
+            self.end = position
+
+        return entries
+
+    def replay(self, players: dict, organizations: dict, leagues: dict, other):
+        """
+        Applies every entry to the given entities, returns other. Records, team
+        statistics and schedules of an entry are merged into those already there.
+        """
+        for tables in self.read():
+            changed_players, changed_organizations, changed_leagues, changed_other, removed = savefile.decode(tables)
+            for identifier, player in changed_players.items():
+                if identifier in players:
+                    statistics = players[identifier].statistics
+                    statistics.update(player.statistics)
+                    player.statistics = statistics
+            for identifier, organization in changed_organizations.items():
+                if identifier in organizations:
+                    organization.statistics = {**(organizations[identifier].statistics or {}), **organization.statistics}
+            for identifier, league in changed_leagues.items():
+                if identifier in leagues:
+                    games = dict(leagues[identifier].games)
+                    for year, schedule in league.games.items():
+                        games[year] = savefile.merge_schedule(games[year], schedule) if year in games else schedule
+                    league.games = games
+
+            players.update(changed_players)
+            organizations.update(changed_organizations)
+            leagues.update(changed_leagues)
+            for identifier in removed:
+                players.pop(identifier, None)
+            if changed_other is not None:
+                other = changed_other
+        return other
+
+    def append(self, sections: dict, compress = False) -> int:
+        """Appends an entry of sections, returns the number of bytes written."""
+        if self.generation is None:
+            self.generation = savefile.read_generation(self.path) or 0
+        payload = savefile.pack_sections(sections, compress)
+        entry = HEADER.pack(MAGIC, len(payload), zlib.crc32(payload), self.generation) + payload
+
+        mode = "r+b" if os.path.exists(self.journal_path) else "wb"
+        with open(self.journal_path, mode) as journal:
+            # Drop whatever a crashed append left after the last valid entry.
+            journal.seek(self.end)
+            journal.truncate()
+            journal.write(entry)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+        self.entries += 1
+        self.end += len(entry)
+        return len(entry)
+
+    def clear(self):
+        """Removes the journal, once its entries are part of the base."""
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.entries = 0
+        self.end = 0
+
+    def compact(self, compress = False):
+        """Folds the journal into its base, reading only the files."""
+        players, organizations, leagues, other = savefile.load(self.path)
+        other = self.replay(players, organizations.organizations, leagues, other)
+        generation = new_generation()
+        savefile.save(self.path, players, organizations, leagues, other, compress, generation)
+        self.generation = generation
+        self.clear()
+
+    def should_compact(self) -> bool:
+        base = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return self.end > base * COMPACT_RATIO
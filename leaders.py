@@ -0,0 +1,156 @@
+"""
+Lane Missel
+
+League leaders. Every league season keeps a heap per category that is updated
+as box scores are committed, so a leaderboard is read in O(k) however many
+players the world holds.
+"""
+
+import heapq
+from typing import Dict, List, Tuple
+
+from engine import PERIOD_LENGTH, NUM_PERIODS
+from entities import *
+
+SIZE = 10
+GAME_LENGTH = PERIOD_LENGTH * NUM_PERIODS
+
+def _save_percentage(stat: Statistics):
+    if stat.shots_against == 0:
+        return None
+    return 1 - stat.goals_against / stat.shots_against
+
+def _goals_against_average(stat: Statistics):
+    if stat.seconds_played == 0:
+        return None
+    return stat.goals_against * GAME_LENGTH / stat.seconds_played
+
+# name -> (value of statistics, True if higher is better, goaltenders only)
+CATEGORIES = {
+    "goals": (lambda x: x.goals, True, False),
+    "assists": (lambda x: x.assists, True, False),
+    "points": (lambda x: x.points, True, False),
+    "plus_minus": (lambda x: x.plus_minus, True, False),
+    "save_percentage": (_save_percentage, True, True),
+    "goals_against_average": (_goals_against_average, False, True),
+}
+
+class Leaderboard:
+    """
+    Players ordered by one category. Changed values are pushed onto a heap and
+    stale entries are dropped when they reach the top, ties go to the lower
+    identifier.
+    """
+    def __init__(self, higher: bool = True):
+        self.higher = higher
+        self.heap = []
+        self.current = {}   # player -> heap entry
+        self._top = []      # valid entries read from the top of the heap
+
+    def __len__(self):
+        return len(self.current)
+
+    def update(self, player: int, value):
+        """Sets the value of a player, None takes them off the board."""
+        entry = None if value is None else ((-value if self.higher else value), player)
+        if self.current.get(player) == entry:
+            return
+
+        # Entries read are returned to the heap, any may have gone stale.
+        for x in self._top:
+            heapq.heappush(self.heap, x)
+        self._top = []
+
+        if entry is None:
+            del self.current[player]
+        else:
+            self.current[player] = entry
+            heapq.heappush(self.heap, entry)
+
+        # Rebuild once stale entries outnumber live ones.
+        if len(self.heap) > 2 * len(self.current) + 64:
+            self.heap = list(self.current.values())
+            heapq.heapify(self.heap)
+
+    def top(self, k: int) -> List[Tuple[int, float]]:
+        """Returns the best k (player, value) pairs, best first."""
+        while len(self._top) < k and len(self.heap) > 0:
+            entry = heapq.heappop(self.heap)
+            # An entry pushed twice pops twice in a row.
+            if self.current.get(entry[1]) == entry and (len(self._top) == 0 or self._top[-1] != entry):
+                self._top.append(entry)
+
+        return [(player, -value if self.higher else value) for value, player in self._top[:k]]
+
+class Season:
+    """Leaderboards of a league season, counting regular season games only."""
+    def __init__(self, qualifying_games: int = 1):
+        self.qualifying_games = qualifying_games
+        self.totals = {}    # player -> Statistics
+        self.boards = {name: Leaderboard(higher) for name, (_, higher, _) in CATEGORIES.items()}
+
+    def add(self, key: StatisticalRecordKey, player: int, stat: Statistics):
+        """Adds a player's statistics of a game, or games, to the boards."""
+        if key.type != GameTypes.regular.value:
+            return
+
+        total = self.totals.get(player)
+        total = self.totals[player] = stat if total is None else total + stat
+
+        goaltender = isinstance(total, GoaltenderStatistics)
+        for name, (value, _, goaltenders) in CATEGORIES.items():
+            if goaltenders and not (goaltender and total.games_played >= self.qualifying_games):
+                continue
+            self.boards[name].update(player, value(total))
+
+    def get(self, category: str, k: int = SIZE) -> List[Tuple[int, float]]:
+        """Returns the best k (player, value) pairs of a category."""
+        assert category in CATEGORIES, "Unknown category"
+        return self.boards[category].top(k)
+
+class Leaders:
+    """
+    Leaderboards of every league season. A season is read from statistical
+    records the first time it's asked for, after that the box scores committed
+    to it keep it up to date. Records don't name a league, so when read a team
+    in several leagues counts towards each. Given a database, leaders are
+    queried from it instead.
+    """
+    def __init__(self, players: dict, leagues: dict, qualifying_games: int = 1, database = None):
+        self.players = players
+        self.leagues = leagues
+        self.qualifying_games = qualifying_games
+        self.database = database
+        self.seasons = {}   # (league, year) -> Season
+
+    def season(self, league: int, year: int) -> Season:
+        """Returns the leaderboards of a league season, to pass to play_game."""
+        season = self.seasons.get((league, year))
+        if season is not None:
+            return season
+
+        season = self.seasons[(league, year)] = Season(self.qualifying_games)
+        teams = set(self.leagues[league].teams)
+        players = self.players.peek_values() if hasattr(self.players, "peek_values") else self.players.values()
+        for player in players:
+            for key in player.statistics.keys_by_year(year):
+                if key.team in teams:
+                    season.add(key, player.identifier, player.statistics.get_record(key))
+        return season
+
+    def get(self, league: int, year: int, category: str, k: int = SIZE) -> List[Tuple[int, float]]:
+        """Returns the best k (player, value) pairs of a category in a league season."""
+        if self.database is not None:
+            assert category in CATEGORIES, "Unknown category"
+            return self.database.leaders(year, category, k, game_type = GameTypes.regular.value, teams = self.leagues[league].teams, qualifying_games = self.qualifying_games)
+        return self.season(league, year).get(category, k)
+
+def standings(league: League, organizations, year: int, per_win: int = 2, per_tie: int = 1) -> List[Tuple[int, TeamStatistics]]:
+    """Returns (team, statistics) of a league season by points, then goal differential, then identifier."""
+    rows = []
+    for team in league.teams:
+        statistics = (organizations.get(team).statistics or {}).get(year) or TeamStatistics()
+        rows.append((team, statistics))
+
+    rows.sort(key = lambda x: (-x[1].points(per_win, per_tie), x[1].goals._againts - x[1].goals._for, x[0]))
+    return rows
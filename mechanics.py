@@ -1,193 +1,248 @@
-#from email.mime import base
-from random import randint, sample
-from typing import List
-from math import sqrt
-
-from handler import load_names, Regions
-from entities import Skater, Goaltender, Player, Statistics, StatisticalRecords, StatisticalRecordKey
-from engine import select_uniform_steps
-
-class FreeAgency:
-    def __init__(self, length: int = 10, decision_time: int = 3, offers_per_period: int = 3):
-        self.length = length
-        self.decision_time = decision_time
-        self.offers_per_period = offers_per_period
-
-    def get_unsigned(self):
-        pass
-
-def age_player(player: Player):
-    def _ensure_bounds(value, min = 0, max = 100):
-        if value < min:
-            return min
-        elif value > max:
-            return max
-        return value
-    
-    age = player.age
-    modifier = 1
-
-    if age < 18:
-        ceiling = 5 + player.potential
-    elif age < 21:
-        ceiling = 2 + player.potential
-    elif age < 25:
-        ceiling = 1 + player.potential
-    elif age < 30:
-        ceiling = player.potential
-    elif age < 40:
-        ceiling = 5 - player.longevity
-        modifier = -1
-    else:
-        ceiling = 10 - player.longevity
-        modifier = -1
-
-    player.passing = _ensure_bounds(player.passing + randint(0, ceiling) * modifier)
-
-    if type(player) == Goaltender:
-        if modifier < 0 and age < 45:
-            ceiling = int(ceiling / 2)
-
-        player.stopping = _ensure_bounds(player.stopping + randint(0, ceiling) * modifier)
-
-    elif type(player) == Skater:
-        player.shooting = _ensure_bounds(player.shooting + randint(0, ceiling) * modifier)
-        player.defending = _ensure_bounds(player.defending + randint(0, ceiling) * modifier)
-        
-    player.age += 1
-
-def create_players(names: list, regions: Regions):
-    players = dict()
-    region_populations = [regions.regions[x][2] for x in sorted(list(regions.keys))]
-    identifier = 0
-
-    for i in range(24):
-        for _ in range(20):
-            identifier += 1
-            region = select_uniform_steps(region_populations) + 1
-            position = select_uniform_steps([2, 3, 5])
-            potential = randint(1,3)
-            longevity = randint(1,3)
-            first, last = names.pop(0).split()
-            passing = randint(10,50)
-
-            if position in (1,2):
-                shooting = randint(10,50)
-                defending = randint(10,50)
-                stat = Statistics.randomized()
-                players[identifier] = Skater(identifier, first, last, region, 16, "", position, potential, longevity, 100, passing, {}, StatisticalRecords({StatisticalRecordKey(2000, None, None): Statistics.randomized()}), {}, shooting, defending)       
-                continue
-
-            stopping = randint(20, 50)
-            players[identifier] = Goaltender(identifier, first, last, region, 16, "", position, potential, longevity, 100, passing, {}, StatisticalRecords(), {}, stopping)
-
-        for key in players.keys():
-            player = players[key]
-            age_player(player)
-
-    return players
-
-def generate_random_rosters(players, num_teams: int = 12, group_num: int = 4) -> list:
-    goalies = [players[x] for x in players.keys() if players[x].position_id == 0]
-    goalies.sort(key = lambda x: x.overall, reverse = True)
-    defenders = [players[x] for x in players.keys() if players[x].position_id == 1]
-    defenders.sort(key = lambda x: x.overall, reverse = True)
-    forwards = [players[x] for x in players.keys() if players[x].position_id == 2]
-    forwards.sort(key = lambda x: x.overall, reverse = True)
-
-    teams = []
-    for _ in range(num_teams):
-        teams.append([])
-
-    # loop through groups.
-    for i in range(int(num_teams / group_num)):
-        # loop through draft rounds.
-        padding = i * group_num
-        # Goalies
-        for ii in range(2):
-            order = sample([padding + x for x in range(group_num)], 4)
-
-            for team_index in order:
-                teams[team_index].append(goalies.pop(0).identifier)
-
-        # Defenders
-        for ii in range(3):
-            # loop through draft rounds.
-            padding = i * group_num
-            for ii in range(2):
-                order = sample([padding + x for x in range(group_num)], 4)
-
-                for team_index in order:
-                    teams[team_index].append(defenders.pop(0).identifier)
-
-        # Forwards
-        for ii in range(5):
-            # loop through draft rounds.
-            padding = i * group_num
-            for ii in range(2):
-                order = sample([padding + x for x in range(group_num)], 4)
-
-                for team_index in order:
-                    teams[team_index].append(forwards.pop(0).identifier)
-
-    return teams
-
-def get_players_age_restriction(players: List[Player], maximum: int, minimum: int = 0):
-    """minimum and maximumns are inclusive."""
-    eligible = []
-
-    for player in players:
-        if minimum <= player.age and player.age <= maximum:
-            eligible.append(player)
-
-    return eligible
-
-def get_attendance(capacity: int, point_percentage: float):
-    return int(sqrt(point_percentage) * capacity)
-
-def get_revenue(attendance: int, ticket_price: float):
-    return attendance * ticket_price
-
-def calculate_ticket_price(base_price: float, increase_per_win: float, wins: int):
-    return round(base_price + wins * increase_per_win, 2)
-
-def player_performance_score(plus_minus: int, goals: int, assists: int, team_goals_for: int, league_average_goals: float):
-    return round(plus_minus + (league_average_goals * goals / team_goals_for) + (goals + assists), 1)
-
-if __name__ == '__main__':
-    names = load_names("data/names.dat", 600)
-    regions = Regions.load_from_csv("data/regions.csv")
-
-    players = create_players(names, regions)
-
-    skaters = []
-    goaltenders = []
-    all_p = []
-
-    for key in players.keys():
-        player = players[key]
-
-        if type(player) == Goaltender:
-            goaltenders.append(player)
-        else:
-            skaters.append(player)
-
-        all_p.append(player)
-
-    all_p.sort(key = lambda x: x.overall, reverse=True)
-    #skaters.sort(key = lambda x: x.overall, reverse = True)
-    #goal
-
-    teams = generate_random_rosters(players)
-
-    for team in teams:
-        print("\n")
-
-        overall = 0
-        team.sort(key = lambda x: x.overall, reverse = True)
-
-        for player in team:
-            print("{:3} {:20} {:1}".format(player.overall, player.name, player.position_id))
-            overall += player.overall
-
-        print("Team Overall: {}".format(overall))
+#from email.mime import base
+import random
+from typing import List
+from math import sqrt
+
+from handler import load_names, Regions
+from entities import Skater, Goaltender, Player, Statistics, GoaltenderStatistics, StatisticalRecords, StatisticalRecordKey, Line, Lineup, Record, TeamStatistics, Game, GameTypes
+from draft import draft
+from sampling import AliasTable
+import engine
+
+class FreeAgency:
+    def __init__(self, length: int = 10, decision_time: int = 3, offers_per_period: int = 3):
+        self.length = length
+        self.decision_time = decision_time
+        self.offers_per_period = offers_per_period
+
+    def get_unsigned(self):
+        pass
+
+def age_player(player: Player, rng = random):
+    def _ensure_bounds(value, min = 0, max = 100):
+        if value < min:
+            return min
+        elif value > max:
+            return max
+        return value
+    
+    age = player.age
+    modifier = 1
+
+    if age < 18:
+        ceiling = 5 + player.potential
+    elif age < 21:
+        ceiling = 2 + player.potential
+    elif age < 25:
+        ceiling = 1 + player.potential
+    elif age < 30:
+        ceiling = player.potential
+    elif age < 40:
+        ceiling = 5 - player.longevity
+        modifier = -1
+    else:
+        ceiling = 10 - player.longevity
+        modifier = -1
+
+    player.passing = _ensure_bounds(player.passing + rng.randint(0, ceiling) * modifier)
+
+    if type(player) == Goaltender:
+        if modifier < 0 and age < 45:
+            ceiling = int(ceiling / 2)
+
+        player.stopping = _ensure_bounds(player.stopping + rng.randint(0, ceiling) * modifier)
+
+    elif type(player) == Skater:
+        player.shooting = _ensure_bounds(player.shooting + rng.randint(0, ceiling) * modifier)
+        player.defending = _ensure_bounds(player.defending + rng.randint(0, ceiling) * modifier)
+        
+    player.age += 1
+
+def create_players(names: list, regions: Regions, rng = random):
+    from aging import age_players
+
+    players = dict()
+    region_populations = [regions.regions[x][2] for x in sorted(list(regions.keys))]
+    identifier = 0
+
+    # Draw every players region and position up front.
+    region_draws = AliasTable(region_populations).draw_many(24 * 20, rng)
+    position_draws = AliasTable([2, 3, 5]).draw_many(24 * 20, rng)
+
+    for i in range(24):
+        for _ in range(20):
+            region = region_draws[identifier] + 1
+            position = position_draws[identifier]
+            identifier += 1
+            potential = rng.randint(1,3)
+            longevity = rng.randint(1,3)
+            first, last = names[identifier - 1].split()
+            passing = rng.randint(10,50)
+
+            if position in (1,2):
+                shooting = rng.randint(10,50)
+                defending = rng.randint(10,50)
+                players[identifier] = Skater(identifier, first, last, region, 16, "", position, potential, longevity, 100, passing, {}, StatisticalRecords({StatisticalRecordKey(2000, None, None): Statistics.randomized(rng)}), {}, shooting, defending)       
+                continue
+
+            stopping = rng.randint(20, 50)
+            players[identifier] = Goaltender(identifier, first, last, region, 16, "", position, potential, longevity, 100, passing, {}, StatisticalRecords(), {}, stopping)
+
+        # Every cohort so far ages a year.
+        age_players(players, rng)
+
+    return players
+
+def generate_random_rosters(players, num_teams: int = 12, group_num: int = 4, rng = random) -> list:
+    """Returns rosters drafted in groups of group_num teams, each group picking from the best left."""
+    return draft(players, num_teams, order = "grouped", rng = rng, group_size = group_num)
+
+def generate_lineup(roster, players) -> Lineup:
+    """Returns a lineup of the best players available in roster (player identifiers)."""
+    members = sorted([players[x] for x in roster], key = lambda x: x.overall, reverse = True)
+    goalies = [x.identifier for x in members if x.position_id == 0]
+    skaters = [x for x in members if x.position_id != 0]
+    lines = []
+
+    assert len(goalies) + len(skaters) >= 7 and len(skaters) >= 6, "Not enough players for a lineup."
+
+    for _ in range(2):
+        # Prefer a forward and defender by position, fill the rest with the best available.
+        forward = next((x for x in skaters if x.position_id == 2), skaters[0])
+        skaters.remove(forward)
+        defender = next((x for x in skaters if x.position_id == 1), skaters[0])
+        skaters.remove(defender)
+        flex = skaters.pop(0)
+        lines.append(Line(forward.identifier, flex.identifier, defender.identifier))
+
+    # Without a goaltender the best remaining skater plays in net.
+    if len(goalies) == 0:
+        goalies.append(skaters.pop(0).identifier)
+
+    backup = goalies[1] if len(goalies) > 1 else None
+
+    return Lineup(lines[0], lines[1], goalies[0], backup)
+
+def get_lineup(organization, players) -> engine.Lineup:
+    """Returns the engine lineup of an organization, generating one if it has none set."""
+    lineup = organization.lineup
+    if lineup.goaltender is None:
+        lineup = generate_lineup(organization.players, players)
+    return engine.Lineup.from_entities(lineup, players)
+
+def commit_box_score(box: engine.BoxScore, game: Game, players: dict, organizations, year: int, game_type: int = GameTypes.regular.value, leaders = None):
+    """Adds a finished game's box score to its players and teams statistics, and to a league season's leaders if given, in one step."""
+    statistics = box.finish()
+    teams = (game.home, game.away)
+    goals = box.goals
+    game.score = list(goals)
+    game.played = True
+
+    # Result of the game for each side.
+    results = []
+    for side in (0, 1):
+        if goals[side] > goals[1 - side]:
+            results.append(Record(1, 0, 0))
+        elif goals[side] < goals[1 - side]:
+            results.append(Record(0, 1, 0))
+        else:
+            results.append(Record(0, 0, 1))
+
+    for identifier, stat in statistics.items():
+        side = box.sides[identifier]
+        key = StatisticalRecordKey(year, teams[side], game_type)
+
+        if isinstance(stat, engine.GoaltenderGameStatistics):
+            record = results[side] if box.decisions[side] == identifier else Record()
+            total = GoaltenderStatistics(0, stat.assists, 0, 1, stat.seconds_played, 0, 0, stat.goals_against, stat.shots_against, record)
+        else:
+            total = Statistics(stat.goals, stat.assists, stat.shots, 1, stat.seconds_played, stat.plus, stat.minus)
+
+        players[identifier].touch()
+        players[identifier].statistics.add_to_record(key, total)
+        if leaders is not None:
+            leaders.add(key, identifier, total)
+
+    # Team statistics are the standings, so only regular season games count.
+    # Postseason results stay with the schedule's playoff games.
+    if game_type != GameTypes.regular.value:
+        return
+
+    for side in (0, 1):
+        team = organizations.get(teams[side]).change_statistics(year)
+        team.record = team.record + results[side]
+        team.games += 1
+        for total, (scored, allowed) in zip((team.goals, team.shots, team.possession), box.team(side)):
+            total._for += scored
+            total._againts += allowed
+
+def play_game(game: Game, players: dict, organizations, year: int, game_type: int = GameTypes.regular.value, over_time = False, rng = random, leaders = None) -> engine.Score:
+    """Simulates a scheduled game and commits its box score."""
+    home = get_lineup(organizations.get(game.home), players)
+    away = get_lineup(organizations.get(game.away), players)
+    box = engine.BoxScore(home, away)
+
+    _, score = engine.simulate_game(home, away, over_time = over_time, rng = rng, box_score = box)
+    commit_box_score(box, game, players, organizations, year, game_type, leaders)
+
+    return score
+
+def get_players_age_restriction(players: List[Player], maximum: int, minimum: int = 0):
+    """minimum and maximumns are inclusive."""
+    eligible = []
+
+    for player in players:
+        if minimum <= player.age and player.age <= maximum:
+            eligible.append(player)
+
+    return eligible
+
+def get_attendance(capacity: int, point_percentage: float):
+    return int(sqrt(point_percentage) * capacity)
+
+def get_revenue(attendance: int, ticket_price: float):
+    return attendance * ticket_price
+
+def calculate_ticket_price(base_price: float, increase_per_win: float, wins: int):
+    return round(base_price + wins * increase_per_win, 2)
+
+def player_performance_score(plus_minus: int, goals: int, assists: int, team_goals_for: int, league_average_goals: float):
+    return round(plus_minus + (league_average_goals * goals / team_goals_for) + (goals + assists), 1)
+
+if __name__ == '__main__':
+    names = load_names("data/names.dat", 600)
+    regions = Regions.load_from_csv("data/regions.csv")
+
+    players = create_players(names, regions)
+
+    skaters = []
+    goaltenders = []
+    all_p = []
+
+    for key in players.keys():
+        player = players[key]
+
+        if type(player) == Goaltender:
+            goaltenders.append(player)
+        else:
+            skaters.append(player)
+
+        all_p.append(player)
+
+    all_p.sort(key = lambda x: x.overall, reverse=True)
+    #skaters.sort(key = lambda x: x.overall, reverse = True)
+    #goal
+
+    teams = generate_random_rosters(players)
+
+    for team in teams:
+        print("\n")
+
+        overall = 0
+        team.sort(key = lambda x: x.overall, reverse = True)
+
+        for player in team:
+            print("{:3} {:20} {:1}".format(player.overall, player.name, player.position_id))
+            overall += player.overall
+
+        print("Team Overall: {}".format(overall))
@@ -0,0 +1,92 @@
+"""
+Lane Missel
+
+Memory measurement of the entity classes. Builds synthetic worlds of players
+with a career of statistical records each and reports the bytes used per
+player and per stat record. The run fails if either is over its budget.
+
+    python memory.py [--sizes 10000 100000] [--years 10] [--tolerance 0.05]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from entities import *
+
+SEED = 2022
+
+# Measured 568 bytes per player and 136 per stat record with slotted entities,
+# records indexed on first query and changed records kept per player. Budgets
+# are those plus a margin of two slots a player and one a record (16 and 8 bytes),
+# so a new field has room to land and --tolerance only covers platform noise.
+BUDGETS = {"bytes_per_player": 584, "bytes_per_record": 144}
+
+def _player(identifier: int, rng) -> Player:
+    values = (identifier, "First{}".format(identifier % 500), "Last{}".format(identifier % 700), rng.randint(1, 13), rng.randint(18, 40), "", rng.randint(0, 2), rng.randint(1, 5), rng.randint(1, 5), 100, rng.randint(20, 90), {})
+    if identifier % 8 == 0:
+        return Goaltender(*values, stopping = rng.randint(20, 90))
+    return Skater(*values, shooting = rng.randint(20, 90), defending = rng.randint(20, 90))
+
+def _records(player: Player, years: int, rng):
+    for year in range(2022, 2022 + years):
+        key = StatisticalRecordKey(year, rng.randint(1, 24), GameTypes.regular.value)
+        if isinstance(player, Goaltender):
+            stat = GoaltenderStatistics(0, rng.randint(0, 3), 0, rng.randint(10, 30), 0, 0, 0, rng.randint(20, 90), rng.randint(300, 900), Record(rng.randint(0, 15), rng.randint(0, 15), rng.randint(0, 5)))
+        else:
+            stat = Statistics.randomized(rng)
+        player.statistics.add_record(key, stat)
+
+def _allocated(function) -> tuple:
+    """Returns what function returns and the bytes it left allocated."""
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = function()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return result, used
+
+def measure(size: int, years: int) -> dict:
+    """Returns bytes per player, without history, and per stat record of a synthetic world."""
+    rng = random.Random(SEED)
+    players, player_bytes = _allocated(lambda: [_player(i + 1, rng) for i in range(size)])
+
+    def history():
+        for player in players:
+            _records(player, years, rng)
+
+    _, record_bytes = _allocated(history)
+    return {"players": size, "records": size * years, "bytes_per_player": player_bytes / size, "bytes_per_record": record_bytes / (size * years)}
+
+def compare(results: list, budgets: dict, tolerance: float) -> list:
+    """Returns descriptions of every measurement over its budget."""
+    failures = []
+    for result in results:
+        for name, budget in budgets.items():
+            if result[name] > budget * (1 + tolerance):
+                failures.append("{} players: {:.1f} {} over budget of {:.1f}".format(result["players"], result[name], name, budget * (1 + tolerance)))
+    return failures
+
+def main(arguments = None):
+    parser = argparse.ArgumentParser(description = "Measure memory used by entities.")
+    parser.add_argument("--sizes", type = int, nargs = "*", default = [10000, 100000], help = "players in each world")
+    parser.add_argument("--years", type = int, default = 10, help = "seasons of history per player")
+    parser.add_argument("--tolerance", type = float, default = 0.05, help = "allowed fractional growth over the budgets")
+    options = parser.parse_args(arguments)
+
+    results = [measure(size, options.years) for size in options.sizes]
+    print(json.dumps(results, indent = 2))
+
+    failures = compare(results, BUDGETS, options.tolerance)
+    for failure in failures:
+        print("REGRESSION " + failure, file = sys.stderr)
+
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
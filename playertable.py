@@ -0,0 +1,434 @@
+"""
+Lane Missel
+
+Memory-mapped player table for very large worlds. The fixed-width attributes of
+every player live in rows of a file mapped into memory, and Player views are
+made on access, so players nobody touches are never deserialized.
+
+Contracts, rights and statistics are not fixed-width. They are written to a
+packed save beside the table when it is flushed, and a player's are only read
+back the first time they are used.
+
+The header holds the generation of the save the table matches, or 0 once it
+changes, so a world can open its table as it is instead of building every
+player from its save.
+"""
+
+import json
+import mmap
+import os
+import struct
+import weakref
+from bisect import bisect_left, bisect_right
+from copy import deepcopy
+from dataclasses import fields
+from typing import Dict, Iterator
+
+from entities import Contract, Goaltender, Player, Skater, StatisticalRecords
+import savefile
+from snapshot import replacing
+
+MAGIC = b"THMP"
+VERSION = 2
+HEADER = struct.Struct("<4sHHQQQ")  # magic, version, row size, rows, removed rows, generation of the matching save.
+
+EXTRAS = ".extras"  # Suffix of the packed save of contracts, records and rights beside a table.
+RIGHTS_COLUMNS = [("player", savefile.INTEGER), ("rights", savefile.STRING)]
+
+# (name, struct code), identifier must stay first.
+FIELDS = [
+    ("identifier", "q"),
+    ("region_id", "i"),
+    ("age", "i"),
+    ("position_id", "i"),
+    ("potential", "i"),
+    ("longevity", "i"),
+    ("fitness", "i"),
+    ("passing", "i"),
+    ("shooting", "i"),
+    ("defending", "i"),
+    ("stopping", "i"),
+    ("flags", "i"),
+    ("first", "32s"),
+    ("last", "32s"),
+    ("special", "16s"),
+]
+ROW = struct.Struct("<" + "".join(code for _, code in FIELDS))
+
+# Bits of the flags field.
+GOALTENDER = 1
+REMOVED = 2
+
+INITIAL_CAPACITY = 1024
+
+def _offsets() -> Dict[str, int]:
+    offsets = {}
+    position = 0
+    for name, code in FIELDS:
+        offsets[name] = position
+        position += struct.calcsize("<" + code)
+    return offsets
+
+OFFSETS = _offsets()
+STRUCTS = {name: struct.Struct("<" + code) for name, code in FIELDS}
+
+def _column(name: str, code: str) -> property:
+    """Returns a property reading and writing a field of a view's row."""
+    field_struct = STRUCTS[name]
+    offset = OFFSETS[name]
+
+    if code.endswith("s"):
+        size = field_struct.size
+
+        def get(self):
+            raw = field_struct.unpack_from(self._table.buffer, self._row_offset + offset)[0]
+            return raw.rstrip(b"\0").decode(errors = "ignore")
+
+        def set(self, value):
+            field_struct.pack_into(self._table.buffer, self._row_offset + offset, value.encode()[:size])
+    else:
+        def get(self):
+            return field_struct.unpack_from(self._table.buffer, self._row_offset + offset)[0]
+
+        def set(self, value):
+            field_struct.pack_into(self._table.buffer, self._row_offset + offset, value)
+
+    return property(get, set)
+
+def _extra(index: int, factory) -> property:
+    """Returns a property for a variable-width attribute kept beside the table."""
+    def get(self):
+        extras = self._table.extras_of(self.identifier)
+        if extras[index] is None:
+            extras[index] = factory()
+        return extras[index]
+
+    def set(self, value):
+        self._table.extras_of(self.identifier)[index] = value
+
+    return property(get, set)
+
+def _dirty() -> property:
+    def get(self):
+        return self.identifier in self._table.changed
+
+    def set(self, value):
+        if value:
+            self._table.mark_changed((self.identifier,))
+        else:
+            self._table.changed.discard(self.identifier)
+
+    return property(get, set)
+
+class _View:
+    """A player backed by a row of a table."""
+    def __init__(self, table, row: int):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_row", row)
+
+    @property
+    def _row_offset(self) -> int:
+        return HEADER.size + self._row * ROW.size
+
+    def __deepcopy__(self, memo):
+        # A copy is a plain player, detached from the table.
+        base = type(self).__mro__[2]
+        return base(**{x.name: deepcopy(getattr(self, x.name), memo) for x in fields(base)})
+
+    contracts = _extra(0, dict)
+    statistics = _extra(1, StatisticalRecords)
+    rights = _extra(2, dict)
+    dirty = _dirty()
+
+def _view_class(base, skip) -> type:
+    columns = {name: _column(name, code) for name, code in FIELDS if name not in skip}
+    view = type(base.__name__ + "View", (_View, base), columns)
+
+    # Views repr as the player they stand in for.
+    view.__qualname__ = base.__qualname__
+    return view
+
+SkaterView = _view_class(Skater, ("flags", "stopping"))
+GoaltenderView = _view_class(Goaltender, ("flags", "shooting", "defending"))
+
+class _Identifiers:
+    """Sequence of the identifier of every row, for bisecting."""
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self):
+        return self.table.rows
+
+    def __getitem__(self, row: int) -> int:
+        return self.table._field(row, "identifier")
+
+class PlayerTable:
+    """
+    A dict-like store of players by identifier, backed by a memory-mapped file.
+    Rows are kept in identifier order, new players must have larger identifiers.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "r+b")
+        self.buffer = mmap.mmap(self.file.fileno(), 0)
+
+        magic, version, row_size, self.rows, self.removed, self.generation = HEADER.unpack_from(self.buffer, 0)
+        assert magic == MAGIC, "Not a player table."
+        assert version == VERSION and row_size == ROW.size, "Unsupported player table."
+
+        # Columns of the extras last flushed, read per player when first used.
+        self.stored = None
+        if os.path.exists(path + EXTRAS):
+            self.stored = savefile.map_sections(path + EXTRAS, mapped = ("records",))
+
+        self.extras = {}            # identifier -> [contracts, statistics, rights]
+        self.changed = set()        # identifiers changed since last cleaned.
+        self.deleted = set()        # identifiers removed since last cleaned.
+        self._views = weakref.WeakValueDictionary()
+        self._identifiers = _Identifiers(self)
+        self.branches = weakref.WeakSet()
+
+    @classmethod
+    def create(cls, path: str, players = None, capacity: int = INITIAL_CAPACITY):
+        """Returns a new table at path holding players."""
+        players = sorted((players or {}).values(), key = lambda x: x.identifier)
+        capacity = max(capacity, len(players))
+        with open(path, "wb") as tablefile:
+            tablefile.write(HEADER.pack(MAGIC, VERSION, ROW.size, 0, 0, 0))
+            tablefile.truncate(HEADER.size + capacity * ROW.size)
+        if os.path.exists(path + EXTRAS):
+            os.remove(path + EXTRAS)
+
+        table = cls(path)
+        for player in players:
+            table[player.identifier] = player
+        return table
+
+    @classmethod
+    def open_saved(cls, path: str, generation: int):
+        """Returns the table at path if it matches the save of generation, else None."""
+        if not generation or not os.path.exists(path):
+            return None
+        with open(path, "rb") as tablefile:
+            header = tablefile.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+
+        magic, version, row_size, _, _, stamp = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or row_size != ROW.size or stamp != generation:
+            return None
+        return cls(path)
+
+    @property
+    def capacity(self) -> int:
+        return (len(self.buffer) - HEADER.size) // ROW.size
+
+    def _field(self, row: int, name: str):
+        return STRUCTS[name].unpack_from(self.buffer, HEADER.size + row * ROW.size + OFFSETS[name])[0]
+
+    def _find(self, identifier: int) -> int:
+        """Returns the row of identifier, or -1."""
+        row = bisect_left(self._identifiers, identifier)
+        if row < self.rows and self._field(row, "identifier") == identifier and not self._field(row, "flags") & REMOVED:
+            return row
+        return -1
+
+    def _write_header(self):
+        HEADER.pack_into(self.buffer, 0, MAGIC, VERSION, ROW.size, self.rows, self.removed, self.generation)
+
+    def mark_changed(self, identifiers):
+        """Marks the players of identifiers as changed, the table no longer matches a save."""
+        self.changed.update(identifiers)
+        if self.generation:
+            self.generation = 0
+            self._write_header()
+
+    def extras_of(self, identifier: int) -> list:
+        """Returns [contracts, statistics, rights] of a player, reading them from the last flush the first time."""
+        extras = self.extras.get(identifier)
+        if extras is None:
+            extras = self.extras[identifier] = self._stored_extras(identifier)
+        return extras
+
+    def _stored_range(self, name: str, identifier: int) -> range:
+        """Returns the rows of a stored table belonging to identifier."""
+        if self.stored is None or name not in self.stored:
+            return range(0)
+        players = self.stored[name][1]["player"]
+        return range(bisect_left(players, identifier), bisect_right(players, identifier))
+
+    def _stored_extras(self, identifier: int) -> list:
+        contracts = {}
+        for i in self._stored_range("contracts", identifier):
+            rows = self.stored["contracts"][1]
+            contracts[rows["key"][i]] = Contract(rows["salary"][i], rows["type_id"][i])
+
+        statistics = None
+        for i in self._stored_range("record_blocks", identifier):
+            rows = self.stored["record_blocks"][1]
+            statistics = savefile.LazyStatisticalRecords(self.stored["records"][1], rows["start"][i], rows["count"][i])
+
+            # The table only keeps extras it was saved with.
+            statistics.clean()
+
+        rights = {}
+        for i in self._stored_range("rights", identifier):
+            rights = json.loads(self.stored["rights"][1]["rights"][i])
+        return [contracts, statistics, rights]
+
+    def _grow(self):
+        size = HEADER.size + max(self.capacity * 2, INITIAL_CAPACITY) * ROW.size
+        self.buffer.close()
+        self.file.truncate(size)
+        self.buffer = mmap.mmap(self.file.fileno(), 0)
+
+    def __len__(self):
+        return self.rows - self.removed
+
+    def __contains__(self, identifier) -> bool:
+        return self._find(identifier) >= 0
+
+    def __getitem__(self, identifier: int) -> Player:
+        view = self._views.get(identifier)
+        if view is not None:
+            return view
+
+        row = self._find(identifier)
+        if row < 0:
+            raise KeyError(identifier)
+
+        view = (GoaltenderView if self._field(row, "flags") & GOALTENDER else SkaterView)(self, row)
+        self._views[identifier] = view
+        return view
+
+    def get(self, identifier: int, default = None):
+        try:
+            return self[identifier]
+        except KeyError:
+            return default
+
+    def loaded(self, identifier: int):
+        """Returns the view of identifier if one is in use, else None."""
+        return self._views.get(identifier)
+
+    def __setitem__(self, identifier: int, player: Player):
+        assert identifier == player.identifier, "Identifier doesn't match player."
+        replacing(self, identifier)
+        self.mark_changed((identifier,))
+        row = self._find(identifier)
+        if row < 0:
+            assert self.rows == 0 or identifier > self._field(self.rows - 1, "identifier"), "Identifiers must be added in order."
+            if self.rows == self.capacity:
+                self._grow()
+            row = self.rows
+            self.rows += 1
+            self._write_header()
+
+        goaltender = isinstance(player, Goaltender)
+        ROW.pack_into(self.buffer, HEADER.size + row * ROW.size, identifier, player.region_id, player.age, player.position_id, player.potential, player.longevity, player.fitness, player.passing,
+                      0 if goaltender else player.shooting, 0 if goaltender else player.defending, player.stopping if goaltender else 0, GOALTENDER if goaltender else 0,
+                      player.first.encode()[:32], player.last.encode()[:32], player.special.encode()[:16])
+        self.extras[identifier] = [player.contracts, player.statistics, player.rights]
+        self._views.pop(identifier, None)
+
+    def __delitem__(self, identifier: int):
+        row = self._find(identifier)
+        if row < 0:
+            raise KeyError(identifier)
+
+        replacing(self, identifier)
+        self.mark_changed(())
+        flags = self._field(row, "flags")
+        STRUCTS["flags"].pack_into(self.buffer, HEADER.size + row * ROW.size + OFFSETS["flags"], flags | REMOVED)
+        self.removed += 1
+        self._write_header()
+        self.extras[identifier] = [{}, None, {}]
+        self._views.pop(identifier, None)
+        self.changed.discard(identifier)
+        self.deleted.add(identifier)
+
+    def pop(self, identifier: int, *default):
+        if identifier not in self and len(default) > 0:
+            return default[0]
+        player = self[identifier]
+        del self[identifier]
+        return player
+
+    def __iter__(self) -> Iterator[int]:
+        for row in range(self.rows):
+            if not self._field(row, "flags") & REMOVED:
+                yield self._field(row, "identifier")
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        for identifier in self:
+            yield self[identifier]
+
+    def items(self):
+        for identifier in self:
+            yield identifier, self[identifier]
+
+    def update(self, players: dict):
+        for identifier in sorted(players):
+            self[identifier] = players[identifier]
+
+    def changed_players(self) -> list:
+        """Returns the players changed since the table was last cleaned."""
+        return [self[x] for x in sorted(self.changed)]
+
+    def clean(self, keep = frozenset()):
+        """Marks every player as saved, except those of identifiers in keep."""
+        self.changed.intersection_update(keep)
+        self.deleted.intersection_update(keep)
+        for identifier, extras in self.extras.items():
+            if extras[1] is not None and identifier not in keep:
+                extras[1].clean()
+
+    def clean_players(self, identifiers):
+        """Marks the players of identifiers as saved."""
+        self.changed.difference_update(identifiers)
+        for identifier in identifiers:
+            extras = self.extras.get(identifier)
+            if extras is not None and extras[1] is not None:
+                extras[1].clean()
+
+    def flush(self):
+        """Writes the table, with its contracts, records and rights beside it, then its generation."""
+        contracts = []
+        records = []
+        blocks = []
+        rights = []
+        for identifier in sorted(self):
+            extras = self.extras.get(identifier)
+            if extras is None:
+                # Never used since the last flush, copied across as it was.
+                extras = self._stored_extras(identifier)
+
+            for key, contract in extras[0].items():
+                savefile.add_row(contracts, identifier, key, contract.salary, contract.type_id)
+            if extras[1] is not None:
+                start = len(records)
+                savefile.record_rows(identifier, extras[1], records)
+                savefile.add_row(blocks, identifier, start, len(records) - start)
+            if extras[2]:
+                savefile.add_row(rights, identifier, json.dumps(extras[2]))
+
+        savefile.write_sections(self.path + EXTRAS, {
+            "contracts": savefile.encode_table(savefile.CONTRACT_COLUMNS, contracts),
+            "records": savefile.encode_table(savefile.RECORD_COLUMNS, records),
+            "record_blocks": savefile.encode_table(savefile.RECORD_BLOCK_COLUMNS, blocks),
+            "rights": savefile.encode_table(RIGHTS_COLUMNS, rights),
+        })
+        self.buffer.flush()
+
+        # Written last, so a table cut short by a crash never matches a save.
+        self._write_header()
+        self.buffer.flush()
+
+    def close(self):
+        self.flush()
+        self._views.clear()
+        self.buffer.close()
+        self.file.close()
@@ -0,0 +1,145 @@
+"""
+Lane Missel
+
+Monte Carlo projection of the remainder of a league's season. Replicas of the
+remaining schedule are split into chunks and simulated across a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from batch import simulate_games
+from engine import Lineup, PERIOD_LENGTH, NUM_PERIODS
+from mechanics import get_lineup
+import rng
+
+@dataclass
+class SeasonSnapshot:
+    """A compact, picklable copy of everything needed to play out a season."""
+    teams: List[int]
+    lineups: Dict[int, Lineup]
+    points: List[int]
+    differential: List[int]
+    remaining: List[Tuple[int, int]]
+    per_win: int = 2
+    per_tie: int = 1
+    period_length: int = PERIOD_LENGTH
+    num_periods: int = NUM_PERIODS
+
+    @classmethod
+    def create(cls, data, league_id: int, year: int = None):
+        """Returns a snapshot of a league's standings and remaining games."""
+        if year is None:
+            year = data.other.current_year
+
+        league = data.leagues[league_id]
+        teams = list(league.teams)
+        lineups = {}
+        points = []
+        differential = []
+
+        for team_id in teams:
+            organization = data.organizations.get(team_id)
+            lineups[team_id] = get_lineup(organization, data.players)
+
+            # Standings so far.
+            statistics = (organization.statistics or {}).get(year)
+            if statistics is None:
+                points.append(0)
+                differential.append(0)
+                continue
+            points.append(statistics.points(cls.per_win, cls.per_tie))
+            differential.append(statistics.goals._for - statistics.goals._againts)
+
+        schedule = league.games.get(year)
+        remaining = [] if schedule is None else [(x.home, x.away) for x in schedule.regular if not x.played]
+
+        return SeasonSnapshot(teams, lineups, points, differential, remaining)
+
+@dataclass
+class Projection:
+    """Outcome of a season projection, position 0 is first place."""
+    teams: List[int]
+    replicas: int
+    playoff_odds: Dict[int, float]
+    expected_points: Dict[int, float]
+    positions: Dict[int, List[float]]
+
+def _simulate_chunk(snapshot: SeasonSnapshot, replicas: int, stream: rng.Stream) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns finishing position counts, indexed [team, position], and total points of every team."""
+    generator = stream.numpy()
+    index = {team: i for i, team in enumerate(snapshot.teams)}
+    count = len(snapshot.teams)
+    points = np.tile(np.array(snapshot.points, dtype=np.float64), (replicas, 1))
+    differential = np.tile(np.array(snapshot.differential, dtype=np.float64), (replicas, 1))
+
+    if len(snapshot.remaining) > 0:
+        matchups = [(snapshot.lineups[home], snapshot.lineups[away]) for home, away in snapshot.remaining]
+        result = simulate_games(matchups * replicas, snapshot.period_length, snapshot.num_periods, seed=generator)
+        goals = result.goals.reshape(replicas, len(matchups), 2)
+
+        # One hot maps from games to teams.
+        home_teams = np.zeros((len(matchups), count))
+        away_teams = np.zeros((len(matchups), count))
+        for i, (home, away) in enumerate(snapshot.remaining):
+            home_teams[i, index[home]] = 1
+            away_teams[i, index[away]] = 1
+
+        home_points = np.where(goals[:, :, 0] > goals[:, :, 1], snapshot.per_win, 0) + np.where(goals[:, :, 0] == goals[:, :, 1], snapshot.per_tie, 0)
+        away_points = np.where(goals[:, :, 1] > goals[:, :, 0], snapshot.per_win, 0) + np.where(goals[:, :, 0] == goals[:, :, 1], snapshot.per_tie, 0)
+        margin = goals[:, :, 0] - goals[:, :, 1]
+
+        points += home_points @ home_teams + away_points @ away_teams
+        differential += margin @ home_teams - margin @ away_teams
+
+    # Rank by points, then goal differential, then a coin flip.
+    order = np.lexsort((generator.random((replicas, count)), -differential, -points), axis=1)
+    positions = np.zeros((count, count), dtype=np.int64)
+    np.add.at(positions, (order, np.arange(count)), 1)
+
+    return positions, points.sum(axis=0)
+
+def project_season(data, league_id: int, replicas: int = 10000, playoff_teams: int = 4, workers: int = None, chunk_size: int = 500, seed = None) -> Projection:
+    """
+    Plays the remaining schedule of a league replicas times and returns the
+    playoff odds, expected points and finishing position distribution of every team.
+    """
+    snapshot = SeasonSnapshot.create(data, league_id)
+    sizes = [chunk_size] * (replicas // chunk_size)
+    if replicas % chunk_size:
+        sizes.append(replicas % chunk_size)
+    streams = rng.create(seed).spawn(len(sizes))
+
+    # Chunks are the same for any number of workers.
+    if workers == 1:
+        results = list(map(_simulate_chunk, [snapshot] * len(sizes), sizes, streams))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_simulate_chunk, [snapshot] * len(sizes), sizes, streams))
+
+    positions = sum(x[0] for x in results) / replicas
+    points = sum(x[1] for x in results) / replicas
+    teams = snapshot.teams
+
+    return Projection(
+        teams,
+        replicas,
+        {team: float(positions[i, :playoff_teams].sum()) for i, team in enumerate(teams)},
+        {team: float(points[i]) for i, team in enumerate(teams)},
+        {team: positions[i].tolist() for i, team in enumerate(teams)},
+    )
+
+if __name__ == '__main__':
+    from data import Data
+
+    data = Data.init_from_file("data/save1.dat")
+    league = data.leagues[1]
+    league.games[data.other.current_year] = league.create_schedule(data.other.other['games_per_team'][1], data.other.current_year)
+    projection = project_season(data, 1, seed=0)
+
+    for team_id in sorted(projection.teams, key = lambda x: projection.expected_points[x], reverse = True):
+        team = data.organizations.get(team_id)
+        print("{:20} {:6.1f} {:6.1%}".format(team.name, projection.expected_points[team_id], projection.playoff_odds[team_id]))
@@ -0,0 +1,59 @@
+"""
+Lane Missel
+
+Seedable random streams for the simulation. A stream is a random.Random that
+can be split into independent child streams, so results only depend on the
+seed and never on the order or process work is done in.
+"""
+
+import random
+from hashlib import sha256
+from typing import List
+
+class Stream(random.Random):
+    """A random stream identified by a root seed and a path of spawn keys."""
+    def __init__(self, seed: int = None, path: tuple = ()):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(128)
+
+        self.entropy = seed
+        self.path = tuple(path)
+        self.spawned = 0
+        super().__init__(self._derive())
+
+    def __repr__(self):
+        return "Stream({}, {})".format(self.entropy, self.path)
+
+    def __reduce__(self):
+        return (Stream, (self.entropy, self.path), (self.spawned, self.getstate()))
+
+    def __setstate__(self, state):
+        self.spawned, internal = state
+        self.setstate(internal)
+
+    def _derive(self) -> int:
+        """Returns the seed of this stream's generator."""
+        text = "{}:{}".format(self.entropy, ".".join(str(x) for x in self.path))
+        return int.from_bytes(sha256(text.encode()).digest(), "big")
+
+    def child(self, key: int):
+        """Returns the independent stream with the given key under this one."""
+        return Stream(self.entropy, self.path + (key,))
+
+    def spawn(self, amount: int) -> List["Stream"]:
+        """Returns amount new independent child streams."""
+        children = [self.child(self.spawned + i) for i in range(amount)]
+        self.spawned += amount
+        return children
+
+    def numpy(self):
+        """Returns a numpy Generator for this stream's path."""
+        import numpy as np
+
+        return np.random.default_rng(np.random.SeedSequence(self.entropy, spawn_key=self.path))
+
+def create(seed = None) -> Stream:
+    """Returns seed if it is a stream already, else a new root stream."""
+    if isinstance(seed, Stream):
+        return seed
+    return Stream(seed)
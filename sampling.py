@@ -0,0 +1,97 @@
+"""
+Lane Missel
+
+Weighted sampling for the simulation. Fixed weights are sampled through
+precomputed alias tables, changing weights through a single linear pass.
+"""
+
+import random
+import sys
+from array import array
+from typing import List
+
+# Turns 53 random bits into a float in [0, 1).
+SCALE = 2.0 ** -53
+
+class AliasTable:
+    """Vose alias table, draws an index of a fixed list of weights in O(1)."""
+    def __init__(self, weights: List[float]):
+        size = len(weights)
+        total = sum(weights)
+        assert size > 0 and total > 0, "weights must have a positive total."
+
+        self.size = size
+        self.probability = [0.0] * size
+        self.alias = list(range(size))
+
+        scaled = [weight * size / total for weight in weights]
+        small = [i for i in range(size) if scaled[i] < 1]
+        large = [i for i in range(size) if scaled[i] >= 1]
+
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+
+            scaled[more] += scaled[less] - 1
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Left overs are full columns (up to rounding error).
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def __len__(self):
+        return self.size
+
+    def draw(self, rng = random) -> int:
+        """Returns an index with probability proportional to its weight."""
+        key = rng.random() * self.size
+        column = int(key)
+
+        if key - column < self.probability[column]:
+            return column
+        return self.alias[column]
+
+    def draw_many(self, amount: int, rng = random) -> List[int]:
+        """Returns a list of amount independent draws, from a single call to rng."""
+        if amount <= 0:
+            return []
+        size = self.size
+        probability = self.probability
+        alias = self.alias
+        draws = []
+
+        # 64 random bits per draw, the top 53 of each make a key in [0, 1).
+        words = array("Q", rng.getrandbits(64 * amount).to_bytes(8 * amount, "little"))
+        if sys.byteorder == "big":
+            words.byteswap()
+
+        for word in words:
+            key = (word >> 11) * SCALE * size
+            column = int(key)
+            draws.append(column if key - column < probability[column] else alias[column])
+
+        return draws
+
+def select(values: List[int], rng = random) -> int:
+    """Returns an index of values with probability proportional to its value."""
+    key = rng.random() * sum(values)
+    reference = 0
+
+    for i, value in enumerate(values):
+        reference += value
+        if key < reference:
+            return i
+
+    # Only reached through rounding error.
+    return len(values) - 1
+
+def select_pair(first: int, second: int, rng = random) -> int:
+    """select for exactly two values, returns 0 or 1."""
+    if rng.random() * (first + second) < first:
+        return 0
+    return 1
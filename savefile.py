@@ -0,0 +1,680 @@
+"""
+Lane Missel
+
+Binary columnar save files. A save is a small header with an offset index,
+followed by one section per table. Every table is stored as typed columns, so
+loading is a bulk unpack of arrays with no interpreter parsing.
+
+    python savefile.py data/save1.dat [target]   converts an old text save.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+from copy import deepcopy
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+from entities import *
+from handler import Organizations, Other
+from snapshot import Branch
+
+MAGIC = b"THMS"
+VERSION = 3
+
+# Section flags.
+COMPRESSED = 1
+
+# Column type codes, 's' is a utf-8 string column.
+INTEGER = "q"
+REAL = "d"
+STRING = "s"
+
+# Stored in place of None for identifiers.
+NONE = -1
+
+def is_binary(path: str) -> bool:
+    """Returns True if the file at path is a binary save."""
+    with open(path, "rb") as savefile:
+        return savefile.read(len(MAGIC)) == MAGIC
+
+def _none(value):
+    return NONE if value is None else value
+
+def _some(value):
+    return None if value == NONE else value
+
+def _encode_column(code: str, values: list) -> bytes:
+    if code != STRING:
+        column = array(code, values)
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column.tobytes()
+
+    # Offsets into a single blob of text.
+    text = [x.encode() for x in values]
+    offsets = array(INTEGER, accumulate(map(len, text), initial = 0))
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return offsets.tobytes() + b"".join(text)
+
+def _decode_column(code: str, rows: int, raw: memoryview) -> list:
+    if code != STRING:
+        column = array(code)
+        column.frombytes(raw)
+        if sys.byteorder == "big":
+            column.byteswap()
+        return column
+
+    offsets = array(INTEGER)
+    size = (rows + 1) * offsets.itemsize
+    offsets.frombytes(raw[:size])
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    text = bytes(raw[size:])
+    return [text[offsets[i]:offsets[i + 1]].decode() for i in range(rows)]
+
+def encode_table(columns: List[Tuple[str, str]], rows: List[tuple]) -> bytes:
+    """Returns rows as a table of named, typed columns in bytes."""
+    parts = [struct.pack("<IH", len(rows), len(columns))]
+    values = zip(*rows) if rows else [()] * len(columns)
+    for (name, code), column in zip(columns, values):
+        raw = _encode_column(code, column)
+        label = name.encode()
+        parts.append(struct.pack("<B", len(label)) + label + code.encode() + struct.pack("<Q", len(raw)))
+        parts.append(raw)
+    return b"".join(parts)
+
+def decode_table(raw: memoryview) -> Tuple[int, Dict[str, list]]:
+    """Returns the row count and columns of a table."""
+    count, width = struct.unpack_from("<IH", raw, 0)
+    position = 6
+    columns = {}
+    for _ in range(width):
+        length = raw[position]
+        name = bytes(raw[position + 1:position + 1 + length]).decode()
+        position += 1 + length
+        code = chr(raw[position])
+        size, = struct.unpack_from("<Q", raw, position + 1)
+        position += 9
+        columns[name] = _decode_column(code, count, raw[position:position + size])
+        position += size
+    return count, columns
+
+class MappedColumn:
+    """A numeric column left in a mapped save, rows are unpacked when indexed."""
+    def __init__(self, code: str, rows: int, raw: memoryview):
+        self.code = code
+        self.rows = rows
+        self.raw = raw
+        self.size = struct.calcsize(code)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(self.rows)
+            return _decode_column(self.code, max(stop - start, 0), self.raw[start * self.size:max(stop, start) * self.size])
+        if index < 0:
+            index += self.rows
+        return struct.unpack_from("<" + self.code, self.raw, index * self.size)[0]
+
+def map_table(raw: memoryview) -> Tuple[int, Dict[str, MappedColumn]]:
+    """Returns the row count and columns of a numeric table, left in raw until indexed."""
+    count, width = struct.unpack_from("<IH", raw, 0)
+    position = 6
+    columns = {}
+    for _ in range(width):
+        length = raw[position]
+        name = bytes(raw[position + 1:position + 1 + length]).decode()
+        position += 1 + length
+        code = chr(raw[position])
+        assert code != STRING, "String columns can't be mapped."
+        size, = struct.unpack_from("<Q", raw, position + 1)
+        position += 9
+        columns[name] = MappedColumn(code, count, raw[position:position + size])
+        position += size
+    return count, columns
+
+def pack_sections(sections: Dict[str, bytes], compress = False) -> bytes:
+    """Returns sections behind a header and offset index, zlib compressed if compress."""
+    names = list(sections.keys())
+    flags = COMPRESSED if compress else 0
+    if compress:
+        sections = {name: zlib.compress(section) for name, section in sections.items()}
+
+    header = len(MAGIC) + 4 + sum(1 + len(x.encode()) + 17 for x in names)
+    index = [MAGIC, struct.pack("<HH", VERSION, len(names))]
+    offset = header
+    for name in names:
+        label = name.encode()
+        index.append(struct.pack("<B", len(label)) + label + struct.pack("<BQQ", flags, offset, len(sections[name])))
+        offset += len(sections[name])
+    return b"".join(index + [sections[x] for x in names])
+
+def write_sections(path: str, sections: Dict[str, bytes], compress = False):
+    """Writes sections to path, replacing it atomically."""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as savefile:
+        savefile.write(pack_sections(sections, compress))
+        savefile.flush()
+        os.fsync(savefile.fileno())
+    os.replace(temporary, path)
+
+def read_index(raw: memoryview) -> Dict[str, Tuple[int, int, int]]:
+    """Returns the (flags, offset, length) of every section in a save."""
+    assert bytes(raw[:len(MAGIC)]) == MAGIC, "Not a binary save."
+    version, count = struct.unpack_from("<HH", raw, len(MAGIC))
+    assert version <= VERSION, "Save version {} is newer than supported.".format(version)
+
+    position = len(MAGIC) + 4
+    index = {}
+    for _ in range(count):
+        length = raw[position]
+        name = bytes(raw[position + 1:position + 1 + length]).decode()
+        position += 1 + length
+
+        # Sections had no flags before version 3.
+        flags = 0
+        if version >= 3:
+            flags = raw[position]
+            position += 1
+
+        offset, size = struct.unpack_from("<QQ", raw, position)
+        index[name] = (flags, offset, size)
+        position += 16
+    return index
+
+def read_sections(raw: memoryview, skip = (), mapped = ()) -> Dict[str, Tuple[int, Dict[str, list]]]:
+    """
+    Returns every table in a packed save, but those named in skip. Tables
+    named in mapped are left in raw, unless compressed, to be read as indexed.
+    """
+    tables = {}
+    for name, (flags, offset, size) in read_index(raw).items():
+        if name in skip:
+            continue
+        section = raw[offset:offset + size]
+        if flags & COMPRESSED:
+            section = memoryview(zlib.decompress(section))
+        elif name in mapped:
+            tables[name] = map_table(section)
+            continue
+        tables[name] = decode_table(section)
+    return tables
+
+def map_sections(path: str, skip = (), mapped = ()) -> Dict[str, Tuple[int, Dict[str, list]]]:
+    """Returns the tables of a packed save file, only its index is read until a table in mapped is indexed."""
+    with open(path, "rb") as savefile:
+        raw = mmap.mmap(savefile.fileno(), 0, access = mmap.ACCESS_READ)
+    # Mapped tables keep views of raw, which stays mapped until they're gone.
+    return read_sections(memoryview(raw), skip, mapped)
+
+PLAYER_COLUMNS = [("identifier", INTEGER), ("first", STRING), ("last", STRING), ("region_id", INTEGER), ("age", INTEGER), ("special", STRING), ("position_id", INTEGER), ("potential", INTEGER), ("longevity", INTEGER), ("fitness", INTEGER), ("passing", INTEGER), ("shooting", INTEGER), ("defending", INTEGER), ("stopping", INTEGER), ("goaltender", INTEGER), ("rights", STRING)]
+CONTRACT_COLUMNS = [("player", INTEGER), ("key", INTEGER), ("salary", INTEGER), ("type_id", INTEGER)]
+RECORD_COLUMNS = [("player", INTEGER), ("year", INTEGER), ("team", INTEGER), ("type", INTEGER), ("goaltender", INTEGER), ("goals", INTEGER), ("assists", INTEGER), ("shots", INTEGER), ("games_played", INTEGER), ("seconds_played", INTEGER), ("plus", INTEGER), ("minus", INTEGER), ("goals_against", INTEGER), ("shots_against", INTEGER), ("wins", INTEGER), ("losses", INTEGER), ("ties", INTEGER)]
+ORGANIZATION_COLUMNS = [("identifier", INTEGER), ("name", STRING), ("location", STRING), ("abbreviation", STRING), ("colors", STRING), ("first_forward", INTEGER), ("first_flex", INTEGER), ("first_defender", INTEGER), ("second_forward", INTEGER), ("second_flex", INTEGER), ("second_defender", INTEGER), ("goaltender", INTEGER), ("backup", INTEGER), ("bias", REAL)]
+ROSTER_COLUMNS = [("organization", INTEGER), ("player", INTEGER), ("active", INTEGER)]
+TEAM_STATISTIC_COLUMNS = [("organization", INTEGER), ("year", INTEGER), ("wins", INTEGER), ("losses", INTEGER), ("ties", INTEGER), ("goals_for", INTEGER), ("goals_against", INTEGER), ("shots_for", INTEGER), ("shots_against", INTEGER), ("possession_for", INTEGER), ("possession_against", INTEGER), ("games", INTEGER)]
+SPENDING_COLUMNS = [("organization", INTEGER), ("year", INTEGER), ("start", INTEGER), ("income", INTEGER), ("expenses", INTEGER)]
+LEAGUE_COLUMNS = [("identifier", INTEGER), ("name", STRING), ("abreviation", STRING)]
+LEAGUE_TEAM_COLUMNS = [("league", INTEGER), ("team", INTEGER)]
+GAME_COLUMNS = [("league", INTEGER), ("year", INTEGER), ("phase", INTEGER), ("home", INTEGER), ("away", INTEGER), ("home_score", INTEGER), ("away_score", INTEGER), ("week", INTEGER), ("played", INTEGER), ("game", INTEGER)]
+OTHER_COLUMNS = [("year", INTEGER), ("year_offset", INTEGER), ("other", STRING)]
+REMOVED_COLUMNS = [("player", INTEGER)]
+RECORD_BLOCK_COLUMNS = [("player", INTEGER), ("start", INTEGER), ("count", INTEGER)]
+GENERATION_COLUMNS = [("generation", INTEGER)]
+RECORD_NAMES = [name for name, _ in RECORD_COLUMNS]
+
+PHASES = ("preseason", "regular", "playoff")
+
+# Sections of players, left out when a save's players are kept elsewhere.
+PLAYER_SECTIONS = ("players", "contracts", "records", "record_blocks")
+
+def add_row(rows: List[tuple], *values):
+    rows.append(values)
+
+def add_player_rows(player: Player, rows: list, contracts: list):
+    """Adds the row and contract rows of a player to rows and contracts."""
+    goaltender = isinstance(player, Goaltender)
+    add_row(rows, player.identifier, player.first, player.last, player.region_id, player.age, player.special, player.position_id, player.potential, player.longevity, player.fitness, player.passing,
+         0 if goaltender else player.shooting, 0 if goaltender else player.defending, player.stopping if goaltender else 0, int(goaltender), json.dumps(player.rights) if player.rights else "")
+    for key, contract in player.contracts.items():
+        add_row(contracts, player.identifier, key, contract.salary, contract.type_id)
+
+def player_rows(players) -> Tuple[dict, dict]:
+    """Returns player and contract rows of players."""
+    rows = []
+    contracts = []
+    for player in players:
+        add_player_rows(player, rows, contracts)
+    return rows, contracts
+
+def record_rows(identifier: int, records: StatisticalRecords, rows: dict, changed = False):
+    """Adds rows of a player's statistical records to rows, with changed only those changed since last cleaned."""
+    if changed and records.changed is not None:
+        for key in list(records.changed):
+            _add_record_row(rows, identifier, key, records.records[key])
+        return
+
+    pending = ()
+    if isinstance(records, LazyStatisticalRecords):
+        # Years never read are copied across still packed. Reading a year
+        # doesn't change it, so one read while this runs is taken packed.
+        pending = records.pending_years()
+        rows.extend((identifier,) + values for values in records.packed_rows(pending))
+
+    for key, stat in list(records.records.items()):
+        if key.year not in pending:
+            _add_record_row(rows, identifier, key, stat)
+
+def _add_record_row(rows: list, identifier: int, key: StatisticalRecordKey, stat: Statistics):
+    goaltender = isinstance(stat, GoaltenderStatistics)
+    record = stat.record if goaltender else Record()
+    add_row(rows, identifier, key.year, _none(key.team), _none(key.type), int(goaltender), stat.goals, stat.assists, stat.shots, stat.games_played, stat.seconds_played, stat.plus, stat.minus,
+         stat.goals_against if goaltender else 0, stat.shots_against if goaltender else 0, record.wins, record.losses, record.ties)
+
+def build_record(columns: dict, i: int) -> Tuple[StatisticalRecordKey, Statistics]:
+    """Returns the key and statistics of a record row."""
+    key = StatisticalRecordKey(columns["year"][i], _some(columns["team"][i]), _some(columns["type"][i]))
+    values = (columns["goals"][i], columns["assists"][i], columns["shots"][i], columns["games_played"][i], columns["seconds_played"][i], columns["plus"][i], columns["minus"][i])
+    if columns["goaltender"][i]:
+        return key, GoaltenderStatistics(*values, columns["goals_against"][i], columns["shots_against"][i], Record(columns["wins"][i], columns["losses"][i], columns["ties"][i]))
+    return key, Statistics(*values)
+
+def build_records(count: int, columns: dict, start: int = 0) -> Dict[int, StatisticalRecords]:
+    """Returns statistical records by player from record rows."""
+    records = {}
+    for i in range(start, start + count):
+        key, stat = build_record(columns, i)
+        records.setdefault(columns["player"][i], {})[key] = stat
+    return {player: StatisticalRecords(value) for player, value in records.items()}
+
+def lazy_records(blocks: Tuple[int, dict], columns: dict) -> Dict[int, StatisticalRecords]:
+    """Returns statistical records by player that read their block of record rows when needed."""
+    count, rows = blocks
+    return {rows["player"][i]: LazyStatisticalRecords(columns, rows["start"][i], rows["count"][i]) for i in range(count)}
+
+class LazyStatisticalRecords(StatisticalRecords):
+    """
+    Statistical records of a player whose rows stay packed in a save's record
+    columns until a year is first asked for, so history nobody looks at is
+    never built. records only holds the years read so far.
+    """
+    def __init__(self, columns: dict, start: int, count: int):
+        StatisticalRecords.__init__(self)
+        self._columns = columns
+        self._start = start
+        self._count = count
+        self._block = None
+        self._pending = None
+
+    def __repr__(self):
+        self._load_all()
+        return "StatisticalRecords(records={!r})".format(self.records)
+
+    def __deepcopy__(self, memo):
+        # Packed columns are never changed, so copies share them.
+        copy = LazyStatisticalRecords(self._columns, self._start, self._count)
+        copy._block = self._block
+        copy._pending = None if self._pending is None else set(self._pending)
+        for key, stat in self.records.items():
+            StatisticalRecords.add_record(copy, key, deepcopy(stat, memo))
+        return copy
+
+    def __eq__(self, other):
+        if not isinstance(other, StatisticalRecords):
+            return NotImplemented
+        self._load_all()
+        other._load_all()
+        return self.records == other.records
+
+    def _read(self, names) -> dict:
+        """Returns columns of names of the player's block, read from the save."""
+        if self._block is not None:
+            return self._block
+        end = self._start + self._count
+        return {name: self._columns[name][self._start:end] for name in names}
+
+    def _rows(self) -> dict:
+        """Returns the player's block of record columns, kept until every year is built."""
+        if self._block is None:
+            self._block = self._read(RECORD_NAMES)
+        return self._block
+
+    @property
+    def pending(self) -> set:
+        """Years still packed."""
+        if self._pending is None:
+            self._pending = set(self._read(["year"])["year"])
+        return self._pending
+
+    def pending_years(self) -> set:
+        """Returns a copy of the years still packed, without keeping anything read."""
+        if self._pending is None:
+            return set(self._read(["year"])["year"])
+        return set(self._pending)
+
+    def _load(self, year: int):
+        if year not in self.pending:
+            return
+
+        self.pending.discard(year)
+        rows = self._rows()
+        years = rows["year"]
+        for i in range(self._count):
+            if years[i] == year:
+                StatisticalRecords.add_record(self, *build_record(rows, i))
+
+        # Every year is built, the block is no longer needed.
+        if len(self.pending) == 0:
+            self._block = None
+
+    def _load_all(self):
+        for year in list(self.pending):
+            self._load(year)
+
+    def packed_rows(self, pending: set = None):
+        """Yields the values after player of every row of pending years, by default those still packed."""
+        pending = self.pending if pending is None else pending
+        if len(pending) == 0:
+            return
+        block = self._read(RECORD_NAMES)
+        rows = zip(*(block[name] for name, _ in RECORD_COLUMNS[1:]))
+        if len(self.records) == 0:
+            yield from rows
+            return
+        for row in rows:
+            if row[0] in pending:
+                yield row
+
+    @property
+    def keys(self):
+        self._load_all()
+        return self.records.keys()
+
+    @property
+    def active_years(self):
+        return self._indexed()[0].keys() | self.pending
+
+def build_players(count: int, columns: dict, contracts: Tuple[int, dict], records: Dict[int, StatisticalRecords]) -> Dict[int, Player]:
+    """Returns players by identifier from player rows."""
+    players = {}
+    for i in range(count):
+        identifier = columns["identifier"][i]
+        values = (identifier, columns["first"][i], columns["last"][i], columns["region_id"][i], columns["age"][i], columns["special"][i], columns["position_id"][i], columns["potential"][i], columns["longevity"][i], columns["fitness"][i], columns["passing"][i], {})
+        statistics = records.get(identifier) or StatisticalRecords()
+        rights = json.loads(columns["rights"][i]) if columns["rights"][i] else {}
+        if columns["goaltender"][i]:
+            players[identifier] = Goaltender(*values, statistics, rights, columns["stopping"][i])
+        else:
+            players[identifier] = Skater(*values, statistics, rights, columns["shooting"][i], columns["defending"][i])
+
+    count, rows = contracts
+    for i in range(count):
+        players[rows["player"][i]].contracts[rows["key"][i]] = Contract(rows["salary"][i], rows["type_id"][i])
+
+    return players
+
+def _organization_sections(organizations, changed = False) -> Dict[str, bytes]:
+    rows = []
+    rosters = []
+    statistics = []
+    spending = []
+
+    for organization in organizations:
+        lineup = organization.lineup
+        add_row(rows, organization.identifier, organization.name, organization.location, organization.abbreviation, organization.colors,
+             _none(lineup.first.forward), _none(lineup.first.flex), _none(lineup.first.defender), _none(lineup.second.forward), _none(lineup.second.flex), _none(lineup.second.defender),
+             _none(lineup.goaltender), _none(lineup.backup), lineup.bias)
+        for player in organization.roster.active:
+            add_row(rosters, organization.identifier, player, 1)
+        for player in organization.roster.reserves:
+            add_row(rosters, organization.identifier, player, 0)
+        years = organization.changed_years if changed else None
+        for year, stat in (organization.statistics or {}).items():
+            if years is not None and year not in years:
+                continue
+            add_row(statistics, organization.identifier, year, stat.record.wins, stat.record.losses, stat.record.ties, stat.goals._for, stat.goals._againts, stat.shots._for, stat.shots._againts, stat.possession._for, stat.possession._againts, stat.games)
+        for year, spent in (organization.spending or {}).items():
+            add_row(spending, organization.identifier, year, spent.start, spent.income, spent.expenses)
+
+    return {
+        "organizations": encode_table(ORGANIZATION_COLUMNS, rows),
+        "rosters": encode_table(ROSTER_COLUMNS, rosters),
+        "team_statistics": encode_table(TEAM_STATISTIC_COLUMNS, statistics),
+        "spending": encode_table(SPENDING_COLUMNS, spending),
+    }
+
+def _build_organizations(tables: dict) -> Dict[int, Organization]:
+    organizations = {}
+    count, rows = tables["organizations"]
+    for i in range(count):
+        lineup = Lineup(
+            Line(_some(rows["first_forward"][i]), _some(rows["first_flex"][i]), _some(rows["first_defender"][i])),
+            Line(_some(rows["second_forward"][i]), _some(rows["second_flex"][i]), _some(rows["second_defender"][i])),
+            _some(rows["goaltender"][i]), _some(rows["backup"][i]), rows["bias"][i])
+        identifier = rows["identifier"][i]
+        organizations[identifier] = Organization(identifier, rows["name"][i], rows["location"][i], rows["abbreviation"][i], rows["colors"][i], Roster(set(), set()), {}, {}, lineup)
+
+    count, rows = tables["rosters"]
+    for i in range(count):
+        roster = organizations[rows["organization"][i]].roster
+        (roster.active if rows["active"][i] else roster.reserves).add(rows["player"][i])
+
+    count, rows = tables["team_statistics"]
+    for i in range(count):
+        organizations[rows["organization"][i]].statistics[rows["year"][i]] = TeamStatistics(
+            Record(rows["wins"][i], rows["losses"][i], rows["ties"][i]), ForAgainst(rows["goals_for"][i], rows["goals_against"][i]),
+            ForAgainst(rows["shots_for"][i], rows["shots_against"][i]), ForAgainst(rows["possession_for"][i], rows["possession_against"][i]), rows["games"][i])
+
+    count, rows = tables["spending"]
+    for i in range(count):
+        organizations[rows["organization"][i]].spending[rows["year"][i]] = Spending(rows["start"][i], rows["income"][i], rows["expenses"][i])
+
+    return organizations
+
+def game_rows(league: League, rows: dict, changed = False):
+    """Adds rows of every game of a league to rows, with changed only those changed since last cleaned."""
+    for year, schedule in league.games.items():
+        for phase, name in enumerate(PHASES):
+            for index, game in enumerate(getattr(schedule, name)):
+                if changed and not game.dirty:
+                    continue
+                add_game_row(rows, league.identifier, year, phase, index, game)
+
+def add_game_row(rows: list, league: int, year: int, phase: int, index: int, game: Game):
+    add_row(rows, league, year, phase, game.home, game.away, game.score[0], game.score[1], game.week, int(game.played), index)
+
+def merge_schedule(schedule: Schedule, changed: Schedule) -> Schedule:
+    """Returns schedule with the games of changed, which may leave gaps as None, set at their index."""
+    merged = Schedule()
+    for name in PHASES:
+        games = list(getattr(schedule, name))
+        for index, game in enumerate(getattr(changed, name)):
+            if game is None:
+                continue
+            if index >= len(games):
+                games.extend([None] * (index + 1 - len(games)))
+            games[index] = game
+        setattr(merged, name, games)
+    return merged
+
+def _league_sections(leagues, changed = False) -> Dict[str, bytes]:
+    rows = []
+    teams = []
+    games = []
+
+    for league in leagues:
+        add_row(rows, league.identifier, league.name, league.abreviation)
+        for team in league.teams:
+            add_row(teams, league.identifier, team)
+        game_rows(league, games, changed)
+
+    return {
+        "leagues": encode_table(LEAGUE_COLUMNS, rows),
+        "league_teams": encode_table(LEAGUE_TEAM_COLUMNS, teams),
+        "games": encode_table(GAME_COLUMNS, games),
+    }
+
+def _build_leagues(tables: dict) -> Dict[int, League]:
+    leagues = {}
+    count, rows = tables["leagues"]
+    for i in range(count):
+        leagues[rows["identifier"][i]] = League(rows["identifier"][i], rows["name"][i], rows["abreviation"][i], [], {})
+
+    count, rows = tables["league_teams"]
+    for i in range(count):
+        leagues[rows["league"][i]].teams.append(rows["team"][i])
+
+    count, rows = tables["games"]
+    for i in range(count):
+        league = leagues[rows["league"][i]]
+        year = rows["year"][i]
+        if year not in league.games:
+            league.games[year] = Schedule()
+        game = Game(rows["home"][i], rows["away"][i], [rows["home_score"][i], rows["away_score"][i]], rows["week"][i], bool(rows["played"][i]))
+        games = getattr(league.games[year], PHASES[rows["phase"][i]])
+
+        # Games were stored in order without their index before, journal entries only hold those changed.
+        index = rows["game"][i] if "game" in rows else len(games)
+        if index >= len(games):
+            games.extend([None] * (index + 1 - len(games)))
+        games[index] = game
+
+    return leagues
+
+def _decode_keys(value):
+    """json turns integer keys into strings, turn them back."""
+    if isinstance(value, dict):
+        return {int(k) if k.lstrip("-").isdigit() else k: _decode_keys(v) for k, v in value.items()}
+    return value
+
+def encode(players, organizations, leagues, other: Other = None, removed = (), changed = False) -> Dict[str, bytes]:
+    """
+    Returns the sections of the given entities. Any subset of the world can be
+    encoded, removed are identifiers of players no longer in the world. With
+    changed, only statistical records, team statistics and schedules changed
+    since last cleaned are encoded, to be merged into what is already loaded.
+    """
+    # Each entity is read once, players of a branch may only be in use one at a time.
+    player_table = []
+    contracts = []
+    records = []
+    blocks = []
+    for player in players:
+        add_player_rows(player, player_table, contracts)
+        start = len(records)
+        record_rows(player.identifier, player.statistics, records, changed)
+        add_row(blocks, player.identifier, start, len(records) - start)
+
+    sections = {
+        "players": encode_table(PLAYER_COLUMNS, player_table),
+        "contracts": encode_table(CONTRACT_COLUMNS, contracts),
+        "records": encode_table(RECORD_COLUMNS, records),
+        "record_blocks": encode_table(RECORD_BLOCK_COLUMNS, blocks),
+    }
+    sections.update(_organization_sections(organizations, changed))
+    sections.update(_league_sections(leagues, changed))
+
+    if other is not None:
+        other_rows = []
+        add_row(other_rows, other.year, other.year_offset, json.dumps(other.other))
+        sections["other"] = encode_table(OTHER_COLUMNS, other_rows)
+
+    if len(removed) > 0:
+        sections["removed"] = encode_table(REMOVED_COLUMNS, [(x,) for x in removed])
+
+    return sections
+
+def decode(tables: dict) -> Tuple[dict, dict, dict, Other, list]:
+    """
+    Returns players, organizations, leagues, other and removed player
+    identifiers from decoded tables. Players are None if their tables aren't.
+    """
+    players = None
+    if "players" in tables:
+        count, rows = tables["records"]
+        if "record_blocks" in tables:
+            records = lazy_records(tables["record_blocks"], rows)
+        else:
+            records = build_records(count, rows)
+        count, rows = tables["players"]
+        players = build_players(count, rows, tables["contracts"], records)
+
+    other = None
+    if "other" in tables:
+        count, rows = tables["other"]
+        other = Other(_decode_keys(json.loads(rows["other"][0])), rows["year"][0], rows["year_offset"][0])
+
+    removed = list(tables["removed"][1]["player"]) if "removed" in tables else []
+
+    return players, _build_organizations(tables), _build_leagues(tables), other, removed
+
+def values(mapping, keys = None):
+    """
+    Returns the entities of a mapping, or those at keys, as they are stored,
+    without wrapping those a branch shares.
+    """
+    if isinstance(mapping, Branch):
+        return mapping.peek_values(keys)
+    return mapping.values() if keys is None else (mapping[x] for x in keys)
+
+@contextmanager
+def reading(*entities):
+    """Closes the iterators of entities however encoding ends, so a branch's base can change them again."""
+    try:
+        yield entities
+    finally:
+        for iterator in entities:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+def save(path: str, players: dict, organizations, leagues: dict, other: Other, compress = False, generation: int = None):
+    """Writes the applications data to a binary save at path, stamped with a journal generation if given."""
+    with reading(values(players), values(organizations.organizations), values(leagues)) as entities:
+        sections = encode(*entities, other)
+    if generation is not None:
+        sections["generation"] = encode_table(GENERATION_COLUMNS, [(generation,)])
+    write_sections(path, sections, compress)
+
+def read_generation(path: str) -> int:
+    """Returns the journal generation of a binary save, or None if it has none."""
+    if not os.path.exists(path):
+        return None
+    # Only the index and the generation's section are read.
+    with open(path, "rb") as savefile, mmap.mmap(savefile.fileno(), 0, access = mmap.ACCESS_READ) as raw:
+        section = read_index(memoryview(raw)).get("generation")
+        if section is None:
+            return None
+        flags, offset, size = section
+        table = raw[offset:offset + size]
+
+    if flags & COMPRESSED:
+        table = zlib.decompress(table)
+    return decode_table(memoryview(table))[1]["generation"][0]
+
+def load(path: str, players = True) -> Tuple[dict, Organizations, dict, Other]:
+    """
+    Returns players, organizations, leagues and other from a binary save.
+    Without players, players are None. Statistical records are left in the
+    mapped save, each player's block is read the first time it's used.
+    """
+    players, organizations, leagues, other, _ = decode(map_sections(path, () if players else PLAYER_SECTIONS, ("records",)))
+    return players, Organizations(organizations), leagues, other
+
+def convert(source: str, target: str = None):
+    """Converts an old text save to a binary save, in place if no target is given."""
+    from data import Data
+
+    data = Data.init_from_file(source)
+    save(target or source, data.players, data.organizations, data.leagues, data.other)
+
+if __name__ == '__main__':
+    convert(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,117 @@
+"""
+Lane Missel
+
+A week's slate of games of every league, simulated at once. Games within a
+week don't depend on each other, so they are split into shards and played across a process pool.
+Workers return compact box score deltas, and the parent commits them in game
+order, so results only depend on the seed, never on the number of workers.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import astuple, dataclass
+from functools import cached_property
+import os
+from typing import Dict, List, Tuple
+
+import engine
+from entities import *
+from mechanics import commit_box_score, get_lineup
+import rng
+
+SHARDS_PER_WORKER = 4   # More shards than workers keeps the pool busy when shards are uneven.
+
+@dataclass
+class GameDelta:
+    """
+    Everything a finished game adds to the world. It is read by commit_box_score
+    in place of the game's box score.
+    """
+    index: int
+    goals: List[int]
+    shots: List[int]
+    possessions: List[int]
+    decisions: List[int]
+    players: List[Tuple[int, int, bool, tuple]]    # (identifier, side, goaltender, statistics)
+
+    @classmethod
+    def create(cls, index: int, box: engine.BoxScore):
+        """Returns the delta of a box score, finishing it."""
+        statistics = box.finish()
+        players = [(identifier, box.sides[identifier], isinstance(stat, engine.GoaltenderGameStatistics), astuple(stat)) for identifier, stat in statistics.items()]
+        return cls(index, box.goals, box.shots, box.possessions, box.decisions, players)
+
+    @cached_property
+    def sides(self) -> Dict[int, int]:
+        return {identifier: side for identifier, side, _, _ in self.players}
+
+    def finish(self) -> dict:
+        """Returns the game statistics of every player who played, by identifier."""
+        return {identifier: (engine.GoaltenderGameStatistics if goaltender else engine.SkaterGameStatistics)(*values) for identifier, _, goaltender, values in self.players}
+
+    def team(self, side: int):
+        """Returns goals, shots and possessions of a team as (for, against) pairs."""
+        return ((self.goals[side], self.goals[1 - side]), (self.shots[side], self.shots[1 - side]), (self.possessions[side], self.possessions[1 - side]))
+
+def _play_shard(lineups: Dict[int, engine.Lineup], games: List[Tuple[int, int, int, rng.Stream]]) -> List[GameDelta]:
+    """Plays a shard's games, given as (index, home, away, stream), returns their deltas."""
+    deltas = []
+    for index, home, away, stream in games:
+        box = engine.BoxScore(lineups[home], lineups[away])
+        engine.simulate_game(lineups[home], lineups[away], rng = stream, box_score = box)
+        deltas.append(GameDelta.create(index, box))
+    return deltas
+
+def slate(data, year: int, week: int) -> List[Tuple[int, Game]]:
+    """Returns (league, game) of every league's regular season games of a week not played yet, in schedule order."""
+    games = []
+    for league in data.leagues.values():
+        schedule = league.games.get(year)
+        if schedule is None or not any(x.week == week and not x.played for x in schedule.regular):
+            continue
+
+        # Playing a game changes the league, so it is touched before its games are taken.
+        league.touch()
+        games += [(league.identifier, x) for x in league.games[year].regular if x.week == week and not x.played]
+    return games
+
+def play_week(data, year: int, week: int, seed = None, workers: int = None, executor = None) -> List[Game]:
+    """
+    Plays every league's regular season games of a week, returns them. Each game
+    has its own child stream of seed, and a pool of workers, or executor if
+    given, plays them in shards.
+    """
+    games = slate(data, year, week)
+    if len(games) == 0:
+        return []
+    stream = rng.create(seed)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Lineups don't change during a week, so each team's is built once.
+    teams = {team for _, game in games for team in (game.home, game.away)}
+    lineups = {team: get_lineup(data.organizations.get(team), data.players) for team in teams}
+
+    count = min(len(games), workers * SHARDS_PER_WORKER) if workers > 1 else 1
+    shards = [[] for _ in range(count)]
+    for index, (_, game) in enumerate(games):
+        shards[index * count // len(games)].append((index, game.home, game.away, stream.child(index)))
+    arguments = [{team: lineups[team] for _, home, away, _ in shard for team in (home, away)} for shard in shards]
+
+    if executor is not None:
+        results = list(executor.map(_play_shard, arguments, shards))
+    elif workers == 1:
+        results = list(map(_play_shard, arguments, shards))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_play_shard, arguments, shards))
+
+    # One reduce, in schedule order.
+    leaders = data.leaders.seasons if data.leaders is not None else {}
+    deltas = sorted((x for result in results for x in result), key = lambda x: x.index)
+    for delta in deltas:
+        league, game = games[delta.index]
+        commit_box_score(delta, game, data.players, data.organizations, year, GameTypes.regular.value, leaders.get((league, year)))
+
+    # The week is written to the database, if any, in one transaction.
+    data.sync_database()
+    return [game for _, game in games]
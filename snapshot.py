@@ -0,0 +1,289 @@
+"""
+Lane Missel
+
+Copy-on-write storage for forking the world. A branch reads every entity from
+the world's own mapping, its base, and only keeps a copy of an entity once
+either side changes it. Tracked objects tell open branches before they change,
+so the world keeps using its entities as they are, while the branch hands out
+shared entities that copy themselves on their first change.
+"""
+
+from collections.abc import MutableMapping
+from copy import deepcopy
+import threading
+import weakref
+
+from entities import Game, Tracked
+
+class Store(dict):
+    """A dict of entities that tells the branches over it before a key is set or removed."""
+    __slots__ = ("branches",)
+
+    def __init__(self, *args, **kwargs):
+        self.branches = weakref.WeakSet()
+        super().__init__(*args, **kwargs)
+
+    def __reduce__(self):
+        return Store, (dict(self),)
+
+    def __setitem__(self, key, value):
+        replacing(self, key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        replacing(self, key)
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            replacing(self, key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def setdefault(self, key, default = None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+def replacing(base, key):
+    """Tells the branches over base that key is about to be set or removed."""
+    for branch in list(base.branches):
+        branch.replacing(key)
+
+def changing_all(base):
+    """Tells the branches over base that every entity is about to change."""
+    for branch in list(base.branches):
+        branch.changing_all()
+
+class _Shared:
+    """An entity of a branch, read from the entity it shares until it is changed."""
+    def __init__(self, branch, key):
+        object.__setattr__(self, "_branch", branch)
+        object.__setattr__(self, "_key", key)
+
+    @property
+    def dirty(self):
+        branch = self._branch
+        return self._key in branch.local and branch.local[self._key].dirty
+
+    @dirty.setter
+    def dirty(self, value):
+        if value or self._key in self._branch.local:
+            self._branch.own(self._key).dirty = value
+
+    def touch(self):
+        self._branch.own(self._key).touch()
+
+    def clean(self):
+        if self._key in self._branch.local:
+            self._branch.own(self._key).clean()
+
+    def __eq__(self, other):
+        if isinstance(other, _Shared):
+            other = other._branch.peek(other._key)
+        return self._branch.peek(self._key) == other
+
+    __hash__ = None
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self._branch.peek(self._key), memo)
+
+    def __reduce__(self):
+        return deepcopy, (self._branch.peek(self._key),)
+
+def _shared_field(name: str) -> property:
+    def get(self):
+        return getattr(self._branch.peek(self._key), name)
+
+    def set(self, value):
+        setattr(self._branch.own(self._key), name, value)
+
+    return property(get, set)
+
+_classes = {}
+
+def _shared_class(cls) -> type:
+    """Returns the class of shared entities of cls's dataclass."""
+    for plain in cls.__mro__:
+        if "__dataclass_fields__" in plain.__dict__:
+            break
+    if plain not in _classes:
+        namespace = {name: _shared_field(name) for name in plain.__dataclass_fields__}
+        namespace["__qualname__"] = plain.__qualname__
+        _classes[plain] = type(plain.__name__, (_Shared, plain), namespace)
+    return _classes[plain]
+
+def _forget(watcher):
+    if watcher in Tracked.watchers:
+        Tracked.watchers.remove(watcher)
+
+class Branch(MutableMapping):
+    """
+    A mapping of entities over the world's mapping. Entities are read from the
+    base until they change, then the branch keeps its own copy. Looking up an
+    entity never copies it, the entity returned copies itself on its first
+    change, so nested values must be changed after touch().
+    """
+    def __init__(self, base, local = None, removed = None, games = False):
+        self.base = base
+        self.local = {} if local is None else local
+        self.removed = set() if removed is None else removed
+        self.owned = set()
+        self.games = games
+        self.lock = threading.RLock()
+        self._shared = weakref.WeakValueDictionary()
+        self._leagues = None
+
+        base.branches.add(self)
+        self._watcher = weakref.ref(self, _forget)
+        Tracked.watchers.append(self._watcher)
+
+    # Bases keep their branches in a weak set.
+    __hash__ = object.__hash__
+
+    def close(self):
+        """Stops following the base, the branch must no longer be used."""
+        self.base.branches.discard(self)
+        _forget(self._watcher)
+
+    def fork(self) -> "Branch":
+        """Returns a branch with this branch's entities, both copy an entity before changing it."""
+        with self.lock:
+            self.owned.clear()
+            return Branch(self.base, dict(self.local), set(self.removed), self.games)
+
+    def peek(self, key):
+        """Returns the entity at key as it is stored, it must not be changed."""
+        if key in self.local:
+            return self.local[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def peek_values(self, keys = None):
+        """
+        Yields the entities at keys, or every entity, as they are stored. They
+        must not be changed, and the base can't change one while it's in use.
+        """
+        for key in list(self) if keys is None else keys:
+            with self.lock:
+                yield self.peek(key)
+
+    def own(self, key):
+        """Returns the branch's own copy of the entity at key, copying it if it's shared."""
+        if key not in self.owned:
+            with self.lock:
+                self.local[key] = deepcopy(self.peek(key))
+                self.owned.add(key)
+        return self.local[key]
+
+    def changing(self, entity):
+        """Keeps a copy of a base entity about to be changed through the base."""
+        if isinstance(entity, Game):
+            if not self.games:
+                return
+            key = self._league_of(entity)
+        else:
+            key = getattr(entity, "identifier", None)
+        if key is None or key in self.local or key in self.removed:
+            return
+
+        with self.lock:
+            loaded = getattr(self.base, "loaded", self.base.get)
+            if key not in self.local and loaded(key) is entity:
+                self.local[key] = deepcopy(entity)
+                self.owned.add(key)
+
+    def changing_all(self):
+        """Keeps a copy of every base entity, as they're all about to be changed through the base."""
+        with self.lock:
+            for key in self.base:
+                if key not in self.local and key not in self.removed:
+                    self.local[key] = deepcopy(self.base[key])
+                    self.owned.add(key)
+
+    def replacing(self, key):
+        """Keeps the entity at key as it is, as the base is about to set or remove it."""
+        with self.lock:
+            if key in self.local or key in self.removed:
+                return
+            if key in self.base:
+                self.local[key] = deepcopy(self.base[key])
+                self.owned.add(key)
+            else:
+                self.removed.add(key)
+
+    def _league_of(self, game: Game):
+        if self._leagues is None:
+            self._leagues = {}
+            for key, league in self.base.items():
+                for schedule in league.games.values():
+                    for x in schedule.regular + schedule.playoff:
+                        self._leagues[id(x)] = key
+        return self._leagues.get(id(game))
+
+    def __getitem__(self, key):
+        entity = self._shared.get(key)
+        if entity is None:
+            entity = _shared_class(type(self.peek(key)))(self, key)
+            self._shared[key] = entity
+        return entity
+
+    def __setitem__(self, key, value):
+        if isinstance(value, _Shared):
+            value = deepcopy(value)
+        with self.lock:
+            self.local[key] = value
+            self.owned.add(key)
+            self.removed.discard(key)
+
+    def __delitem__(self, key):
+        with self.lock:
+            if key not in self:
+                raise KeyError(key)
+            self.local.pop(key, None)
+            self.owned.discard(key)
+            if key in self.base:
+                self.removed.add(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self.local:
+            return True
+        return key not in self.removed and key in self.base
+
+    def __iter__(self):
+        for key in self.base:
+            if key not in self.removed:
+                yield key
+        for key in self.local:
+            if key not in self.base:
+                yield key
+
+    def __len__(self):
+        return len(self.base) - len(self.removed) + sum(1 for x in self.local if x not in self.base)
+
+    def commit(self):
+        """Writes the branch's changes to the base, the branch must no longer be used."""
+        self.close()
+        for key in self.removed:
+            if key in self.base:
+                del self.base[key]
+        for key, entity in self.local.items():
+            if self.base.get(key) is not entity:
+                self.base[key] = entity
+                entity.touch()